@@ -1,7 +1,23 @@
 # Modified from code by Emma Sawain
 # https://github.com/newexo/cifar-ten/blob/master/code/NSGAII.py
 
+import json
+import os
 import sys
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+
+import numpy as np
+
+from evolutionary import evaluation
+from evolutionary import sorting
+from evolutionary.chromosome import (
+    Chromosome,
+    crossover_genes,
+    mutate_genes,
+    with_genes,
+)
+from evolutionary.instrumentation import NULL_INSTRUMENT
+from evolutionary.population import Population
 
 
 def domination_count_and_set(population, element):
@@ -43,58 +59,26 @@ def domination_count_and_set(population, element):
 def fast_nondominated_sort(population):
     # gives the list of the domination fronts, in order, and a dictionary with the ranks of the chromosomes
 
-    domination_dict = {}
-    for chromosome in population:
-        domination_dict[chromosome] = domination_count_and_set(population, chromosome)
-    i = 0
+    keys = list(population.keys())
+    if len(keys) == 0:
+        return [{}, []]
+    objectives = np.array([population[key] for key in keys], dtype=np.float64)
     domination_fronts = []
-    domination_fronts.append([])
     rank_list = {}
-    for chromosome in domination_dict:
-        if domination_dict[chromosome][0] == 0:
-            domination_fronts[0].append(chromosome)
-            rank_list[chromosome] = 1
-    while domination_fronts[i] != []:
-        domination_fronts.append([])
-        for chromosome in domination_fronts[i]:
-            for chrom in domination_dict[chromosome][1]:
-                domination_dict[chrom][0] -= 1
-                if domination_dict[chrom][0] == 0:
-                    domination_fronts[i + 1].append(chrom)
-                    rank_list[chrom] = i + 2
-        i += 1
-    return [rank_list, domination_fronts[: len(domination_fronts) - 1]]
+    for rank, front in enumerate(sorting.nondominated_fronts(objectives), 1):
+        domination_fronts.append([keys[i] for i in front])
+        for i in front:
+            rank_list[keys[i]] = rank
+    return [rank_list, domination_fronts]
 
 
 def crowding_distance(population):
     # gives a dictionary in which the value of each chromosome is its crowding distance
 
-    l = len(population)
-    num_objectives = len(list(population.values())[0])
-    crowding_distances = {}
-    for chromosome in population:
-        crowding_distances[chromosome] = 0
-    for i in range(num_objectives):
-        ordered_by_objective = sorted(population, key=lambda x: population[x][i])
-        if (
-            population[ordered_by_objective[0]]
-            == population[ordered_by_objective[l - 1]]
-        ):
-            for j in range(1, l - 1):
-                crowding_distances[ordered_by_objective[j]] -= 1
-        else:
-            crowding_distances[ordered_by_objective[0]] -= float("inf")
-            crowding_distances[ordered_by_objective[l - 1]] -= float("inf")
-            for j in range(1, l - 1):
-                crowding_distance = (
-                    float(population[ordered_by_objective[j + 1]][i])
-                    - float(population[ordered_by_objective[j - 1]][i])
-                ) / (
-                    float(population[ordered_by_objective[l - 1]][i])
-                    - float(population[ordered_by_objective[0]][i])
-                )
-                crowding_distances[ordered_by_objective[j]] -= crowding_distance
-    return crowding_distances
+    keys = list(population.keys())
+    objectives = np.array([population[key] for key in keys], dtype=np.float64)
+    distances = sorting.crowding_distances(objectives)
+    return dict(zip(keys, distances.tolist()))
 
 
 def log_stdout(generation, population, objectives, fronts):
@@ -126,95 +110,651 @@ def log_discard(generation, population, objectives, fronts):
     pass
 
 
+def features(genes):
+    # the genes a surrogate learns objectives from, leaving out the mutation rate in gene 0
+    return genes[:, 1:]
+
+
 class NSGAII(object):
-    def __init__(self, context, initial_population):
+    def __init__(
+        self,
+        context,
+        initial_population,
+        executor=None,
+        chunksize=1,
+        cache=None,
+        tournament=False,
+        archive=None,
+        surrogate=None,
+        oversample=4,
+        instrument=None,
+        evaluator=None,
+    ):
         self.context = context
+        self.cache = cache
+        # an optional ParetoArchive offered every evaluated individual
+        self.archive = archive
+        # with a surrogate, such as a MetaModel, oversample times as many children are bred
+        # each generation and only those it predicts best are evaluated; it learns from every
+        # evaluation
+        self.surrogate = surrogate
+        self.oversample = oversample
+        # timers and counters around the phases of evolve, which do nothing unless given
+        self.instrument = NULL_INSTRUMENT if instrument is None else instrument
+        # with tournament, mates are picked by binary crowded tournaments on the ranks and
+        # crowding distances of the parents, otherwise by a random permutation
+        self.tournament = tournament
+        self.ranks = None
+        self.crowding = None
+        # number of generations evolved so far and of objectives assigned, which checkpoints
+        # save and restore
+        self.generation = 0
+        self.evaluations = 0
+        # the indices of the chromosomes of the last call of objectives_of given penalty objectives
+        self.timed_out = []
+        # evaluator, a callable giving the objectives of a list of chromosomes such as a
+        # distributed.Coordinator, takes the place of executor
+        if evaluator is not None:
+            self.evaluate = evaluator
+        elif executor is None:
+            self.evaluate = evaluation.batch_evaluate
+        else:
+            self.evaluate = evaluation.ExecutorEvaluator(executor, chunksize)
 
-        def poppair(i):
-            key = i, 0
-            return key, initial_population[i]
+        # the genes of every individual live in the store, and chromosomes are copies of the
+        # prototype carrying those genes, made when the chromosome API needs them
+        self.prototype = initial_population[0] if len(initial_population) else None
+        self.store = Population.from_chromosomes(initial_population)
+        if self.prototype is None:
+            # an empty population has nothing to evaluate, nor objectives to size the store by
+            self.store.allocate_objectives(0)
+        self.front_rows = []
+        self.front_keys = np.empty((2, 0), dtype=np.int64)
 
-        self.population = dict([poppair(i) for i in range(len(initial_population))])
+    def chromosomes(self, rows):
+        # gives chromosomes carrying the genes of the given rows of the store
+        return with_genes(self.prototype, self.store.genes[rows])
 
-    def get_objectives(self, population):
-        objectives = {}
-        for chromosome in population:
-            objectives[chromosome] = population[chromosome].getObjectives()
+    def objectives_dict(self, rows):
+        return dict(zip(self.store.keys(rows), self.store.objectives[rows].tolist()))
+
+    @property
+    def population(self):
+        # the parents as a dictionary from (index, generation) keys to chromosomes
+        parents = self.store.parents
+        return dict(zip(self.store.keys(parents), self.chromosomes(parents)))
+
+    @property
+    def fronts(self):
+        # the domination fronts of the last combined population, as lists of keys
+        index, generation = self.front_keys
+        return [
+            list(zip(index[front].tolist(), generation[front].tolist()))
+            for front in self.front_rows
+        ]
+
+    def nondominated_sort(self, objectives):
+        # gives the list of domination fronts using the sorter suited to the number of objectives
+
+        keys = list(objectives.keys())
+        matrix = np.array([objectives[key] for key in keys], dtype=np.float64)
+        fronts = sorting.nondominated_sort(matrix)
+        return [[keys[i] for i in front] for front in fronts]
+
+    def objectives_of(self, chromosomes):
+        # gives the objectives of the chromosomes, setting timed_out to the indices of those
+        # the evaluator gave penalty objectives as their evaluation passed its deadline
+        if self.cache is None:
+            objectives = self.evaluate(chromosomes)
+            self.timed_out = list(getattr(self.evaluate, "timed_out", ()))
+        else:
+            objectives = self.cache.evaluate(chromosomes, self.evaluate)
+            self.timed_out = self.cache.timed_out
         return objectives
 
-    def new_population(self, parents, parents_objectives, children):
-        # combines the two new populations and then selects the best chromosome with respect to the crowded comparison order
+    async def objectives_of_async(self, chromosomes, concurrency=None):
+        self.timed_out = []
+        if self.cache is None:
+            return await evaluation.evaluate_async(chromosomes, concurrency)
+        keys, values, pending = self.cache.lookup(chromosomes)
+        results = await evaluation.evaluate_async(
+            [chromosomes[i] for i in pending], concurrency
+        )
+        return self.cache.fill(keys, values, pending, results)
+
+    def get_objectives(self, population):
+        keys = list(population.keys())
+        values = self.objectives_of([population[key] for key in keys])
+        return dict(zip(keys, values))
+
+    def new_population(self):
+        # selects the best of the parents and children in the store with respect to the crowded
+        # comparison order, keeping them as the parents of the next generation
 
-        children_objectives = self.get_objectives(children)
+        store = self.store
+        objectives = store.objectives[: store.size]
+        with self.instrument.phase("sort"):
+            fronts = sorting.nondominated_sort(objectives)
 
-        combined_population_hyperparameters = dict(
-            list(parents.items()) + list(children.items())
+        survivors = []
+        ranks = []
+        crowding = []
+        spaces_remaining = store.num_parents
+        for rank, front in enumerate(fronts):
+            if spaces_remaining == 0:
+                break
+            # only the partially admitted front needs crowding distances, unless they are
+            # kept for tournaments
+            if len(front) > spaces_remaining or self.tournament:
+                with self.instrument.phase("crowding"):
+                    distances = sorting.crowding_distances(objectives[front])
+                if len(front) > spaces_remaining:
+                    admitted = sorting.least_crowded(distances, spaces_remaining)
+                    front = front[admitted]
+                    distances = distances[admitted]
+                crowding.append(distances)
+            survivors.append(front)
+            ranks.append(np.full(len(front), rank))
+            spaces_remaining -= len(front)
+
+        if self.tournament and survivors:
+            self.ranks = np.concatenate(ranks)
+            self.crowding = np.concatenate(crowding)
+        self.front_rows = fronts
+        self.front_keys = np.stack(
+            [store.index[: store.size], store.generation[: store.size]]
         )
-        combined_population_objectives = dict(
-            list(parents_objectives.items()) + list(children_objectives.items())
+        store.survive(np.concatenate(survivors) if survivors else np.arange(0))
+
+    def batched_variation(self):
+        # whole population operators apply unless the chromosome class has its own variation
+        cls = type(self.prototype)
+        return all(
+            getattr(cls, name) is getattr(Chromosome, name)
+            for name in ("mutate", "crossover", "mutationRate")
         )
-        fns = fast_nondominated_sort(combined_population_objectives)
-        fronts = fns[1]
-
-        new_pop_hyperparameters = {}
-        new_pop_objectives = {}
-        spaces_remaining = len(parents)
-        front = 0
-        while spaces_remaining > 0:
-            if spaces_remaining >= len(fronts[front]):
-                for chromosome in fronts[front]:
-                    new_pop_objectives[chromosome] = combined_population_objectives[
-                        chromosome
-                    ]
-                    new_pop_hyperparameters[
-                        chromosome
-                    ] = combined_population_hyperparameters[chromosome]
-                    spaces_remaining -= 1
-                front += 1
-            else:
-                crowding_distances = crowding_distance(combined_population_objectives)
-                front_with_crowding = dict(
-                    (key, crowding_distances[key]) for key in fronts[front]
-                )
-                sorted_by_crowding = sorted(
-                    front_with_crowding, key=lambda x: front_with_crowding[x]
+
+    def mating_pairs(self):
+        # gives two arrays of parent rows, paired by position, in time linear in the parents
+
+        n = self.store.num_parents
+        count = 2 * (n // 2)
+        if self.tournament:
+            if self.ranks is None or len(self.ranks) != n:
+                self.ranks, self.crowding = sorting.ranks_and_crowding(
+                    self.store.objectives[self.store.parents]
                 )
-                for i in range(spaces_remaining):
-                    new_pop_objectives[
-                        sorted_by_crowding[i]
-                    ] = combined_population_objectives[sorted_by_crowding[i]]
-                    new_pop_hyperparameters[
-                        sorted_by_crowding[i]
-                    ] = combined_population_hyperparameters[sorted_by_crowding[i]]
-                spaces_remaining = 0
-        return new_pop_hyperparameters, new_pop_objectives, fronts
-
-    def make_children(self, parents, generation):
-        children = {}
-        keys = list(parents.keys())
-        while len(keys) > 1:
-            choice1, choice2 = self.context.r.choice(len(keys), size=2, replace=False)
-            key1 = keys[choice1]
-            key2 = keys[choice2]
-            keys.remove(key1)
-            keys.remove(key2)
-            child0, child1 = parents[key1].crossover(parents[key2])
+            mates = sorting.crowded_tournament(
+                self.ranks, self.crowding, count, self.context.r
+            )
+        else:
+            mates = self.context.r.permutation(n)
+        return mates[0:count:2], mates[1:count:2]
+
+    def make_children(self, generation):
+        # breeds children from pairs of parents into the store, returning them as chromosomes
+
+        self.store.clear_children()
+        if self.prototype is None:
+            # an empty population has nothing to breed from
+            return []
+        if self.screening():
+            return self.screened_children(generation)
+        first, second = self.mating_pairs()
+        return self.breed(first, second, generation + 1)
+
+    def screening(self):
+        # whether the surrogate has seen enough evaluations to pre-screen children
+        return (
+            self.surrogate is not None
+            and self.oversample > 1
+            and len(self.surrogate) >= max(self.store.num_parents, 1)
+            and len(self.surrogate) >= getattr(self.surrogate, "n_neighbors", 1)
+        )
+
+    def screened_children(self, generation):
+        # breeds oversample times as many children as usual and keeps in the store those
+        # ranking best on objectives predicted by the surrogate, in the crowded comparison order
+
+        store = self.store
+        next_index = store.next_index
+        candidates = []
+        for _ in range(self.oversample):
+            store.clear_children()
+            first, second = self.mating_pairs()
+            self.breed(first, second, generation + 1)
+            candidates.append(store.genes[store.children].copy())
+        candidates = np.concatenate(candidates)
+        count = len(candidates) // self.oversample
+
+        predicted = np.asarray(self.surrogate.predict(features(candidates)))
+        ranks, crowding = sorting.ranks_and_crowding(
+            predicted.reshape(len(candidates), -1)
+        )
+        best = np.sort(np.lexsort((crowding, ranks))[:count])
+
+        store.clear_children()
+        store.next_index = next_index
+        rows = store.add(candidates[best], generation + 1)
+        return self.chromosomes(rows)
+
+    def breed(self, first, second, generation):
+        # adds two children of each pair of parent rows to the store, returning them as chromosomes
+
+        store = self.store
+        if self.batched_variation():
+            rows = store.extend(2 * len(first), generation)
+            children = store.genes[rows]
+            children[0::2], children[1::2] = crossover_genes(
+                store.genes[first], store.genes[second], self.context.r
+            )
+            mutate_genes(children, self.context.r)
+            return self.chromosomes(rows)
+
+        needed = np.union1d(first, second)
+        parents = dict(zip(needed.tolist(), self.chromosomes(needed)))
+        children = []
+        for row1, row2 in zip(first.tolist(), second.tolist()):
+            child0, child1 = parents[row1].crossover(parents[row2])
             child0.mutate()
             child1.mutate()
-            new_key1 = key1[0], generation + 1
-            new_key2 = key2[0], generation + 1
-            children[new_key1] = child0
-            children[new_key2] = child1
+            children.append(child0)
+            children.append(child1)
+        store.add([child.genes for child in children], generation)
         return children
 
-    def evolve(self, num_generations=100, log_out=log_discard):
-        objectives = self.get_objectives(self.population)
-        for generation in range(num_generations):
-            self.population, objectives, self.fronts = self.new_population(
+    def parent_ranks(self):
+        # gives the rank of each parent in the last fronts, or -1 for a parent not in them,
+        # matching rows by index, which is unique over the run
+
+        index = self.front_keys[0]
+        parents = self.store.index[self.store.parents]
+        if len(index) == 0:
+            return np.full(len(parents), -1)
+        ranks = np.full(len(index), -1)
+        for rank, front in enumerate(self.front_rows):
+            ranks[front] = rank
+        order = np.argsort(index)
+        found = order[
+            np.minimum(np.searchsorted(index, parents, sorter=order), len(index) - 1)
+        ]
+        return np.where(index[found] == parents, ranks[found], -1)
+
+    def log(self, log_out, generation):
+        # loggers with a record method get arrays straight from the store, the dictionaries of
+        # the logging API are only built for loggers that use them
+        if log_out is log_discard:
+            return
+        if hasattr(log_out, "record"):
+            if log_out.wants(generation):
+                store = self.store
+                parents = store.parents
+                log_out.record(
+                    generation,
+                    store.index[parents],
+                    store.generation[parents],
+                    store.genes[parents],
+                    store.objectives[parents],
+                    self.parent_ranks(),
+                )
+        else:
+            parents = self.store.parents
+            log_out(
+                generation,
                 self.population,
-                objectives,
-                self.make_children(self.population, generation),
+                self.objectives_dict(parents),
+                self.fronts,
+            )
+
+    def set_objectives(self, rows, objectives, timed_out=()):
+        # stores the objectives of newly evaluated rows and offers them to the archive, except
+        # the penalty objectives of the positions among them in timed_out, which count as no
+        # evaluation and are not learnt from
+        store = self.store
+        store.set_objectives(rows, objectives)
+        rows = np.arange(len(store.objectives))[rows]
+        if len(timed_out):
+            rows = np.delete(rows, timed_out)
+        self.evaluations += len(rows)
+        if self.surrogate is not None:
+            self.surrogate.fit(features(store.genes[rows]), store.objectives[rows])
+        if self.archive is not None:
+            self.archive.update(
+                store.objectives[rows],
+                store.genes[rows],
+                store.index[rows],
+                store.generation[rows],
+            )
+
+    def evaluate_parents(self):
+        if self.store.objectives is None:
+            parents = self.store.parents
+            objectives = self.objectives_of(self.chromosomes(parents))
+            self.set_objectives(parents, objectives, self.timed_out)
+
+    def save_checkpoint(self, path):
+        # writes the parents with their objectives and keys, the generation counter, the random
+        # state, the points of the archive and those the surrogate has learnt from to an
+        # uncompressed .npz file, replacing any previous checkpoint at once
+
+        store = self.store
+        parents = store.parents
+        state = {
+            "generation": self.generation,
+            "evaluations": self.evaluations,
+            "next_index": store.next_index,
+            "context": self.context.get_state(),
+        }
+        if store.objectives is None:
+            objectives = np.empty((store.num_parents, 0))
+        else:
+            objectives = store.objectives[parents]
+        arrays = dict(
+            genes=store.genes[parents],
+            objectives=objectives,
+            index=store.index[parents],
+            generation=store.generation[parents],
+            state=np.array(json.dumps(state)),
+        )
+        if self.ranks is not None:
+            arrays["ranks"] = self.ranks
+            arrays["crowding"] = self.crowding
+        if self.archive is not None and len(self.archive):
+            objectives, genes, keys = self.archive.arrays()
+            arrays["archive_objectives"] = objectives
+            arrays["archive_genes"] = genes
+            arrays["archive_keys"] = keys
+        if self.surrogate is not None and len(self.surrogate):
+            arrays["surrogate_x"] = self.surrogate.x
+            arrays["surrogate_y"] = self.surrogate.y
+            arrays["surrogate_indexed"] = np.array(
+                getattr(self.surrogate, "indexed", len(self.surrogate))
+            )
+        temporary = "%s.tmp" % path
+        with open(temporary, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(temporary, path)
+
+    def load_checkpoint(self, path):
+        # restores the state saved by save_checkpoint, after which evolving continues exactly
+        # as the saved run would have; chromosomes are still made from this instance's prototype
+
+        with np.load(path) as data:
+            state = json.loads(str(data["state"]))
+            store = Population.from_genes(data["genes"])
+            n = store.num_parents
+            store.index[:n] = data["index"]
+            store.generation[:n] = data["generation"]
+            if data["objectives"].shape[1] > 0:
+                store.set_objectives(store.parents, data["objectives"])
+            if "ranks" in data:
+                self.ranks = data["ranks"]
+                self.crowding = data["crowding"]
+            else:
+                self.ranks = None
+                self.crowding = None
+            if self.archive is not None:
+                if "archive_objectives" in data:
+                    self.archive.restore(
+                        data["archive_objectives"],
+                        data["archive_genes"],
+                        data["archive_keys"],
+                    )
+                else:
+                    self.archive.restore(
+                        np.empty((0, 0)), np.empty((0, 0)), np.empty((2, 0), np.int64)
+                    )
+            if self.surrogate is not None and "surrogate_x" in data:
+                self.surrogate.restore(
+                    data["surrogate_x"],
+                    data["surrogate_y"],
+                    int(data["surrogate_indexed"]),
+                )
+        store.next_index = state["next_index"]
+        self.store = store
+        self.generation = state["generation"]
+        self.evaluations = state.get("evaluations", 0)
+        self.context.set_state(state["context"])
+        self.front_rows = []
+        self.front_keys = np.empty((2, 0), dtype=np.int64)
+
+    def autosave(self, checkpoint_path, checkpoint_every, last):
+        if checkpoint_path is not None and (
+            self.generation % checkpoint_every == 0 or last
+        ):
+            self.save_checkpoint(checkpoint_path)
+
+    def begin_generation(self, generation):
+        # starts a generation of evolve or evolve_async, giving the children to evaluate
+        self.instrument.start_generation(self, generation)
+        with self.instrument.phase("make_children"):
+            return self.make_children(generation)
+
+    def select(
+        self, generation, log_out, stopping, checkpoint_path, checkpoint_every, last
+    ):
+        # ends a generation of evolve or evolve_async once its children are evaluated, keeping
+        # the survivors as parents, and gives whether stopping says to stop
+        instrument = self.instrument
+        with instrument.phase("select"):
+            self.new_population()
+        with instrument.phase("log"):
+            self.log(log_out, generation)
+        instrument.end_generation(self)
+        self.generation = generation + 1
+        stop = stopping is not None and stopping.update(self)
+        self.autosave(checkpoint_path, checkpoint_every, stop or last)
+        return stop
+
+    def evolve(
+        self,
+        num_generations=100,
+        log_out=log_discard,
+        checkpoint_path=None,
+        checkpoint_every=10,
+        stopping=None,
+    ):
+        # evolves num_generations more generations, or fewer when stopping, a Stopping, says so,
+        # saving a checkpoint to checkpoint_path, if given, every checkpoint_every generations
+        # and after the last one
+        self.evaluate_parents()
+        if stopping is not None:
+            stopping.start()
+        last = self.generation + num_generations - 1
+        for generation in range(self.generation, last + 1):
+            children = self.begin_generation(generation)
+            with self.instrument.phase("evaluate"):
+                objectives = self.objectives_of(children)
+                self.set_objectives(self.store.children, objectives, self.timed_out)
+            if self.select(
+                generation,
+                log_out,
+                stopping,
+                checkpoint_path,
+                checkpoint_every,
+                generation == last,
+            ):
+                break
+
+        return self.population.values()
+
+    async def evolve_async(
+        self,
+        num_generations=100,
+        log_out=log_discard,
+        concurrency=None,
+        checkpoint_path=None,
+        checkpoint_every=10,
+        stopping=None,
+    ):
+        # like evolve, but awaits the objectives of each generation concurrently, so a
+        # generation takes as long as its slowest evaluation rather than the sum of them all
+        if self.store.objectives is None:
+            parents = self.store.parents
+            self.set_objectives(
+                parents,
+                await self.objectives_of_async(self.chromosomes(parents), concurrency),
+            )
+        if stopping is not None:
+            stopping.start()
+        last = self.generation + num_generations - 1
+        for generation in range(self.generation, last + 1):
+            children = self.begin_generation(generation)
+            with self.instrument.phase("evaluate"):
+                self.set_objectives(
+                    self.store.children,
+                    await self.objectives_of_async(children, concurrency),
+                )
+            if self.select(
+                generation,
+                log_out,
+                stopping,
+                checkpoint_path,
+                checkpoint_every,
+                generation == last,
+            ):
+                break
+
+        return self.population.values()
+
+    def steady_state_mates(self, fronts):
+        # picks one pair of parent rows at random, or by two crowded tournaments, computing
+        # crowding distances only for the fronts of the candidates
+
+        mu = self.store.num_parents
+        r = self.context.r
+        if not self.tournament:
+            return r.choice(mu, size=(2, 1), replace=False)
+        candidates = r.choice(mu, size=4)
+        ranks = fronts.ranks
+        distances = np.zeros(len(ranks))
+        for rank in set(ranks[candidates].tolist()):
+            front = fronts.fronts[rank]
+            distances[front] = sorting.crowding_distances(self.store.objectives[front])
+        winners = sorting.tournament_winners(
+            ranks, distances, candidates[0::2], candidates[1::2]
+        )
+        return winners[:1], winners[1:]
+
+    def replace_worst(self, fronts):
+        # inserts the evaluated child after the parents into the fronts, removes the most
+        # crowded member of the last front, and moves the child into the freed row if it survived
+
+        store = self.store
+        mu = store.num_parents
+        fronts.insert(mu)
+        last = fronts.fronts[-1]
+        distances = sorting.crowding_distances(store.objectives[last])
+        worst = last[int(np.argmax(distances))]
+        fronts.remove(worst)
+        if worst != mu:
+            store.replace(worst, mu)
+            fronts.relabel(mu, worst)
+        store.clear_children()
+
+    def record_fronts(self, fronts):
+        mu = self.store.num_parents
+        self.front_rows = [np.array(front) for front in fronts.fronts]
+        self.front_keys = np.stack([self.store.index[:mu], self.store.generation[:mu]])
+
+    def evolve_steady_state(self, num_evaluations=1000, log_out=log_discard):
+        # (mu + 1) evolution: each step breeds and evaluates a single child, inserts it into
+        # fronts maintained incrementally, and removes the most crowded member of the last front,
+        # so a step costs a few front comparisons instead of a full sort. Every mu steps, which
+        # evaluate as many children as a generation, count as a generation: the generation
+        # counter advances and log_out is called.
+
+        self.evaluate_parents()
+        store = self.store
+        mu = store.num_parents
+        start = self.generation
+        fronts = sorting.IncrementalFronts(store.objectives, np.arange(mu))
+        for step in range(num_evaluations):
+            store.clear_children()
+            first, second = self.steady_state_mates(fronts)
+            child = self.breed(first, second, start + step // mu + 1)[0]
+            store.clear_children(keep=1)
+            objectives = self.objectives_of([child])
+            self.set_objectives(slice(mu, mu + 1), objectives, self.timed_out)
+            self.replace_worst(fronts)
+
+            if (step + 1) % mu == 0:
+                self.record_fronts(fronts)
+                self.log(log_out, start + step // mu)
+                self.generation = start + (step + 1) // mu
+
+        self.record_fronts(fronts)
+        self.ranks = None
+        self.crowding = None
+        return self.population.values()
+
+    def evolve_asynchronous(
+        self, executor, num_evaluations=1000, in_flight=None, log_out=log_discard
+    ):
+        # barrier free steady state evolution: keeps in_flight children, by default as many as
+        # parents, evaluating on a concurrent.futures style executor, and as soon as one
+        # finishes inserts it as in evolve_steady_state and dispatches a child bred from the
+        # parents of that moment. Which children survive depends on the order evaluations
+        # finish in, so runs are only repeatable when evaluation times are.
+
+        self.evaluate_parents()
+        store = self.store
+        mu = store.num_parents
+        in_flight = mu if in_flight is None else in_flight
+        start = self.generation
+        fronts = sorting.IncrementalFronts(store.objectives, np.arange(mu))
+        pending = {}
+        dispatched = 0
+
+        def dispatch():
+            store.clear_children()
+            first, second = self.steady_state_mates(fronts)
+            child = self.breed(first, second, start + dispatched // mu + 1)[0]
+            future = None
+            cache_key = None
+            if self.cache is not None:
+                keys, values, missing = self.cache.lookup([child])
+                cache_key = keys[0]
+                if not missing:
+                    # cached objectives complete at once, without using a worker
+                    future = Future()
+                    future.set_result(values)
+            if future is None:
+                future = executor.submit(evaluation.evaluate, [child])
+            pending[future] = (
+                store.genes[mu].copy(),
+                store.index[mu],
+                store.generation[mu],
+                cache_key,
             )
-            log_out(generation, self.population, objectives, self.fronts)
+            store.clear_children()
+
+        while dispatched < min(in_flight, num_evaluations):
+            dispatch()
+            dispatched += 1
+
+        completed = 0
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                genes, index, generation, cache_key = pending.pop(future)
+                objectives = future.result()
+                if cache_key is not None:
+                    self.cache.put(cache_key, objectives[0])
+                store.clear_children()
+                store.add([genes], generation, index=[index])
+                self.set_objectives(slice(mu, mu + 1), objectives)
+                self.replace_worst(fronts)
+                completed += 1
+                if completed % mu == 0:
+                    self.record_fronts(fronts)
+                    self.log(log_out, start + completed // mu - 1)
+                    self.generation = start + completed // mu
+                if dispatched < num_evaluations:
+                    dispatch()
+                    dispatched += 1
 
+        self.record_fronts(fronts)
+        self.ranks = None
+        self.crowding = None
         return self.population.values()
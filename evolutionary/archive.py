@@ -0,0 +1,293 @@
+import operator
+
+import numpy as np
+
+from evolutionary import sorting
+from evolutionary.population import grow
+
+
+class Node(object):
+    # a node of the ND-tree, bounding its points by their ideal and nadir points
+    #
+    # A leaf holds the archive rows of its points, an internal node its children. The bounds
+    # are not tightened when points are removed, so they stay valid, if loose, bounds. They are
+    # python lists, as comparing a few numbers is much cheaper without numpy.
+
+    __slots__ = ("ideal", "nadir", "rows", "children")
+
+    def __init__(self, ideal, nadir, rows=None, children=None):
+        self.ideal = ideal
+        self.nadir = nadir
+        self.rows = rows
+        self.children = children
+
+    @property
+    def leaf(self):
+        return self.children is None
+
+    def empty(self):
+        return not (self.rows if self.leaf else self.children)
+
+    def extend_bounds(self, point):
+        self.ideal = list(map(min, self.ideal, point))
+        self.nadir = list(map(max, self.nadir, point))
+
+
+def covers(a, b):
+    # whether a is no worse than b on every objective
+    return all(map(operator.le, a, b))
+
+
+class ParetoArchive(object):
+    # every nondominated point offered to it, with the genes and key of the individual
+    #
+    # Points are kept in an ND-tree (Jaszkiewicz and Lust, 2018), so a new point is only
+    # compared against the leaves whose bounds it could dominate or be dominated by, which
+    # keeps updates sublinear in the size of the archive. A point equal to an archived one is
+    # rejected. Points are stored in arrays that double in size when full, and rows freed by
+    # dominated points are reclaimed once they outnumber the live ones.
+
+    def __init__(self, max_leaf=20, num_children=None):
+        if max_leaf < 2:
+            raise ValueError("max_leaf must be at least 2, got %d" % max_leaf)
+        self.max_leaf = max_leaf
+        self.num_children = num_children
+        self.objectives = None
+        self.genes = None
+        self.keys = None
+        self.alive = None
+        self.size = 0
+        self.count = 0
+        self.root = None
+
+    def __len__(self):
+        return self.count
+
+    def allocate(self, num_objectives, num_genes, capacity=1024):
+        self.objectives = np.empty((capacity, num_objectives), dtype=np.float64)
+        self.genes = np.empty((capacity, num_genes), dtype=np.float64)
+        self.keys = np.empty((2, capacity), dtype=np.int64)
+        self.alive = np.zeros(capacity, dtype=bool)
+        if self.num_children is None:
+            self.num_children = num_objectives + 1
+        self.root = self.new_leaf()
+
+    def new_leaf(self):
+        m = self.objectives.shape[1]
+        return Node([np.inf] * m, [-np.inf] * m, rows=[])
+
+    def update(self, objectives, genes=None, index=None, generation=None):
+        # offers a batch of points, given as rows, to the archive and returns how many it kept;
+        # points dominated within the batch are dropped before touching the tree
+
+        objectives = np.asarray(objectives, dtype=np.float64)
+        n = len(objectives)
+        genes = np.empty((n, 0)) if genes is None else np.asarray(genes, np.float64)
+        index = np.full(n, -1) if index is None else np.asarray(index)
+        generation = np.full(n, -1) if generation is None else np.asarray(generation)
+        if n == 0:
+            return 0
+        if self.objectives is None:
+            self.allocate(objectives.shape[1], genes.shape[1])
+
+        first = sorting.nondominated_sort(objectives)[0]
+        _, unique = np.unique(objectives[first], axis=0, return_index=True)
+        kept = 0
+        for i in first[np.sort(unique)].tolist():
+            kept += self.add(objectives[i].tolist(), genes[i], index[i], generation[i])
+        return kept
+
+    def add(self, point, genes, index, generation):
+        # offers a single point, given as a list, returning whether it was kept
+        if self.root.empty():
+            self.root = self.new_leaf()
+        elif not self.update_node(self.root, point):
+            return False
+        elif self.root.empty():
+            self.root = self.new_leaf()
+        row = self.append(point, genes, index, generation)
+        self.insert(self.root, row, point)
+        if self.size - self.count > max(self.count, 1024):
+            self.compact()
+        return True
+
+    def update_node(self, node, point):
+        # removes the points of node that point dominates, giving False if one of them
+        # dominates or equals point, in which case the archive is left as it was
+
+        if covers(node.nadir, point):
+            return False
+        if covers(point, node.ideal):
+            self.discard(node)
+            return True
+        if covers(node.ideal, point) or covers(point, node.nadir):
+            if node.leaf:
+                points = self.objectives[node.rows]
+                if np.any(np.all(points <= point, axis=1)):
+                    return False
+                dominated = np.all(point <= points, axis=1)
+                if np.any(dominated):
+                    rows = np.array(node.rows)
+                    self.alive[rows[dominated]] = False
+                    self.count -= int(np.sum(dominated))
+                    node.rows = rows[~dominated].tolist()
+            else:
+                for child in node.children:
+                    if not self.update_node(child, point):
+                        return False
+                node.children = [child for child in node.children if not child.empty()]
+                if len(node.children) == 1:
+                    child = node.children[0]
+                    node.rows = child.rows
+                    node.children = child.children
+        return True
+
+    def discard(self, node):
+        # drops every point below node
+        if node.leaf:
+            self.alive[node.rows] = False
+            self.count -= len(node.rows)
+            node.rows = []
+        else:
+            for child in node.children:
+                self.discard(child)
+            node.children = None
+            node.rows = []
+
+    def insert(self, node, row, point):
+        # adds row to the leaf whose bounds have the closest centre, splitting it when full
+        while not node.leaf:
+            node.extend_bounds(point)
+            node = min(node.children, key=lambda child: centre_distance(child, point))
+        node.extend_bounds(point)
+        node.rows.append(row)
+        if len(node.rows) > self.max_leaf:
+            self.split(node)
+
+    def split(self, node):
+        # turns a full leaf into an internal node with num_children leaves, seeded by the
+        # points farthest from the seeds already chosen
+
+        rows = np.array(node.rows)
+        points = self.objectives[rows]
+        distances = np.sum((points[:, None, :] - points[None, :, :]) ** 2, axis=2)
+        seeds = [int(np.argmax(np.mean(distances, axis=1)))]
+        nearest = distances[seeds[0]].copy()
+        while len(seeds) < min(self.num_children, len(rows)):
+            seed = int(np.argmax(nearest))
+            seeds.append(seed)
+            np.minimum(nearest, distances[seed], out=nearest)
+        groups = np.argmin(distances[seeds], axis=0)
+        groups[seeds] = np.arange(len(seeds))
+
+        children = []
+        for group in range(len(seeds)):
+            members = groups == group
+            child = Node(
+                points[members].min(axis=0).tolist(),
+                points[members].max(axis=0).tolist(),
+                rows=rows[members].tolist(),
+            )
+            children.append(child)
+        node.rows = None
+        node.children = children
+
+    def append(self, point, genes, index, generation):
+        if self.size == len(self.alive):
+            capacity = 2 * len(self.alive)
+            self.objectives = grow(self.objectives, capacity)
+            self.genes = grow(self.genes, capacity)
+            self.keys = grow(self.keys.T, capacity).T
+            self.alive = grow(self.alive, capacity)
+            self.alive[self.size :] = False
+        row = self.size
+        self.objectives[row] = point
+        self.genes[row] = genes
+        self.keys[:, row] = index, generation
+        self.alive[row] = True
+        self.size += 1
+        self.count += 1
+        return row
+
+    def compact(self):
+        # moves the live points to the front of the arrays and renumbers the leaves
+        live = np.flatnonzero(self.alive[: self.size])
+        renumber = np.full(self.size, -1)
+        renumber[live] = np.arange(len(live))
+        self.objectives[: len(live)] = self.objectives[live]
+        self.genes[: len(live)] = self.genes[live]
+        self.keys[:, : len(live)] = self.keys[:, live]
+        self.alive[: len(live)] = True
+        self.alive[len(live) :] = False
+        self.size = len(live)
+
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node.leaf:
+                node.rows = renumber[node.rows].tolist()
+            else:
+                stack.extend(node.children)
+
+    def arrays(self):
+        # gives the objectives, genes and (index, generation) keys of the archived points, as
+        # arrays in the order the points were added
+        if self.objectives is None:
+            return np.empty((0, 0)), np.empty((0, 0)), np.empty((2, 0), dtype=np.int64)
+        live = np.flatnonzero(self.alive[: self.size])
+        return self.objectives[live], self.genes[live], self.keys[:, live]
+
+    def restore(self, objectives, genes, keys):
+        # replaces the archive by the points given by arrays, as saved from a checkpoint
+        self.objectives = None
+        self.genes = None
+        self.keys = None
+        self.alive = None
+        self.size = 0
+        self.count = 0
+        self.root = None
+        self.update(objectives, genes, keys[0], keys[1])
+
+    def best(self, objective, upper=None):
+        # gives the objectives and genes of the archived point lowest on the given objective
+        # among those with every objective at most its bound in upper, where None or inf
+        # leaves an objective unbounded, or None when no point qualifies
+
+        if self.count == 0:
+            return None
+        m = self.objectives.shape[1]
+        if upper is None:
+            upper = np.full(m, np.inf)
+        else:
+            upper = np.array(
+                [np.inf if bound is None else bound for bound in upper],
+                dtype=np.float64,
+            )
+        best_value = np.inf
+        best_row = -1
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if not covers(node.ideal, upper) or node.ideal[objective] >= best_value:
+                continue
+            if not node.leaf:
+                stack.extend(node.children)
+                continue
+            if not node.rows:
+                continue
+            points = self.objectives[node.rows]
+            values = np.where(
+                np.all(points <= upper, axis=1), points[:, objective], np.inf
+            )
+            i = int(np.argmin(values))
+            if values[i] < best_value:
+                best_value = values[i]
+                best_row = node.rows[i]
+        if best_row < 0:
+            return None
+        return self.objectives[best_row].copy(), self.genes[best_row].copy()
+
+
+def centre_distance(node, point):
+    # the squared distance from point to the centre of the bounds of node, times four
+    return sum((a + b - 2 * x) ** 2 for a, b, x in zip(node.ideal, node.nadir, point))
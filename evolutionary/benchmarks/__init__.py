@@ -0,0 +1,17 @@
+from evolutionary.benchmarks.problems import (
+    PROBLEMS,
+    Problem,
+    ZDT1,
+    ZDT2,
+    ZDT3,
+    ZDT4,
+    ZDT5,
+    ZDT6,
+    DTLZ1,
+    DTLZ2,
+    DTLZ3,
+    DTLZ4,
+    DTLZ5,
+    DTLZ6,
+    DTLZ7,
+)
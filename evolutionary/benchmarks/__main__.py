@@ -0,0 +1,3 @@
+from evolutionary.benchmarks.harness import main
+
+main()
@@ -0,0 +1,197 @@
+import argparse
+import json
+import platform
+import sys
+import time
+
+import numpy as np
+
+from evolutionary import NSGAII
+from evolutionary import sorting
+from evolutionary._version import __version__
+from evolutionary.benchmarks.problems import DTLZ2, ZDT1
+from evolutionary.context import Context
+
+SIZES = (100, 1000, 10000, 100000)
+NUM_OBJECTIVES = (2, 3, 5, 10)
+
+
+def problem(context, num_objectives):
+    # ZDT1 for two objectives, DTLZ2 for more
+    if num_objectives == 2:
+        return ZDT1(context)
+    return DTLZ2(context, num_objectives=num_objectives)
+
+
+def random_objectives(size, num_objectives, seed):
+    # points near a front, so that sorting meets realistic numbers of fronts
+    r = np.random.RandomState(seed)
+    points = r.rand(size, num_objectives)
+    return points / np.linalg.norm(points, axis=1, keepdims=True) + 0.1 * r.rand(
+        size, 1
+    )
+
+
+def fresh(size, num_objectives, seed):
+    context = Context(seed)
+    return NSGAII.NSGAII(
+        context, [problem(context, num_objectives) for i in range(size)]
+    )
+
+
+def evaluated(size, num_objectives, seed):
+    # an NSGAII with evaluated parents and children
+    nsgaii = fresh(size, num_objectives, seed)
+    nsgaii.evaluate_parents()
+    children = nsgaii.make_children(0)
+    nsgaii.set_objectives(nsgaii.store.children, nsgaii.objectives_of(children))
+    return nsgaii
+
+
+def time_call(function, setup=None, repeat=3):
+    # the least wall clock time of repeat calls of function on what setup gives
+    times = []
+    for _ in range(repeat):
+        argument = None if setup is None else setup()
+        start = time.perf_counter()
+        function(argument)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def operations(size, num_objectives, seed, generations):
+    # the operations timed, as name, function and setup
+    def objectives_dict():
+        objectives = random_objectives(size, num_objectives, seed)
+        return dict(enumerate(objectives.tolist()))
+
+    return [
+        (
+            "fast_nondominated_sort",
+            NSGAII.fast_nondominated_sort,
+            objectives_dict,
+        ),
+        (
+            "nondominated_sort",
+            sorting.nondominated_sort,
+            lambda: random_objectives(size, num_objectives, seed),
+        ),
+        ("crowding_distance", NSGAII.crowding_distance, objectives_dict),
+        (
+            "crowding_distances",
+            sorting.crowding_distances,
+            lambda: random_objectives(size, num_objectives, seed),
+        ),
+        (
+            "new_population",
+            lambda nsgaii: nsgaii.new_population(),
+            lambda: evaluated(size, num_objectives, seed),
+        ),
+        (
+            "make_children",
+            lambda nsgaii: nsgaii.make_children(0),
+            lambda: evaluated(size, num_objectives, seed),
+        ),
+        (
+            "evolve",
+            lambda nsgaii: nsgaii.evolve(generations),
+            lambda: fresh(size, num_objectives, seed),
+        ),
+    ]
+
+
+def run(
+    sizes=SIZES,
+    num_objectives=NUM_OBJECTIVES,
+    names=None,
+    repeat=3,
+    generations=5,
+    max_seconds=10.0,
+    seed=1,
+):
+    # times every operation for every population size and number of objectives, skipping
+    # the larger sizes of an operation once a smaller one took longer than max_seconds, and
+    # gives the results with a description of the machine as a dictionary for json
+
+    results = []
+    slow = set()
+    for m in num_objectives:
+        for size in sorted(sizes):
+            for name, function, setup in operations(size, m, seed, generations):
+                if names is not None and name not in names:
+                    continue
+                result = {"operation": name, "size": size, "num_objectives": m}
+                if (name, m) in slow:
+                    result["seconds"] = None
+                    result["skipped"] = True
+                else:
+                    result["seconds"] = time_call(function, setup, repeat)
+                    if result["seconds"] > max_seconds:
+                        slow.add((name, m))
+                results.append(result)
+    return {
+        "version": __version__,
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "seed": seed,
+        "repeat": repeat,
+        "generations": generations,
+        "results": results,
+    }
+
+
+def compare(baseline, report):
+    # adds to each result of report the ratio of its time to that of the same operation,
+    # size and number of objectives in the baseline report
+    times = dict(
+        ((r["operation"], r["size"], r["num_objectives"]), r["seconds"])
+        for r in baseline["results"]
+    )
+    for result in report["results"]:
+        before = times.get(
+            (result["operation"], result["size"], result["num_objectives"])
+        )
+        if before and result["seconds"] is not None:
+            result["ratio"] = result["seconds"] / before
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m evolutionary.benchmarks",
+        description="Times sorting, selection, variation and evolve runs as JSON.",
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--objectives", type=int, nargs="+", default=NUM_OBJECTIVES)
+    parser.add_argument("--operations", nargs="+", default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--generations", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default=None, help="file to write, or stdout")
+    parser.add_argument(
+        "--baseline", default=None, help="earlier output to give time ratios against"
+    )
+    args = parser.parse_args(argv)
+
+    report = run(
+        args.sizes,
+        args.objectives,
+        args.operations,
+        args.repeat,
+        args.generations,
+        args.max_seconds,
+        args.seed,
+    )
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            compare(json.load(f), report)
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=1)
+        sys.stdout.write("\n")
+    else:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=1)
+    return report
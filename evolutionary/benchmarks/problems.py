@@ -0,0 +1,228 @@
+import numpy as np
+
+from evolutionary.chromosome import Chromosome
+
+
+class Problem(Chromosome):
+    # a chromosome whose objectives are a test function of the genes after the mutation rate
+    #
+    # Subclasses set num_variables and num_objectives and define objectives, which maps a
+    # matrix with a row of variables in [0, 1] per individual to a matrix of objectives, so a
+    # whole population is evaluated at once through batch_objectives.
+
+    num_variables = None
+    num_objectives = 2
+
+    def __init__(self, context, genes=None):
+        Chromosome.__init__(self, context, genes, numberOfGenes=1 + self.num_variables)
+
+    def copy(self):
+        return type(self)(self.context, self.genes)
+
+    def getObjectives(self):
+        x = np.array([self.genes[1:]], dtype=np.float64)
+        return self.objectives(x)[0].tolist()
+
+    def batch_objectives(self, genes):
+        return self.objectives(genes[:, 1:])
+
+    def objectives(self, x):
+        raise NotImplementedError()
+
+
+class ZDT(Problem):
+    # the two objective problems of Zitzler, Deb and Thiele (2000), with f2 = g h
+
+    num_variables = 30
+
+    def objectives(self, x):
+        f1 = self.f1(x)
+        g = self.g(x)
+        return np.stack([f1, g * self.h(f1, g)], axis=1)
+
+    def f1(self, x):
+        return x[:, 0]
+
+    def g(self, x):
+        return 1 + 9 * np.mean(x[:, 1:], axis=1)
+
+    def h(self, f1, g):
+        return 1 - np.sqrt(f1 / g)
+
+
+class ZDT1(ZDT):
+    pass
+
+
+class ZDT2(ZDT):
+    def h(self, f1, g):
+        return 1 - (f1 / g) ** 2
+
+
+class ZDT3(ZDT):
+    def h(self, f1, g):
+        return 1 - np.sqrt(f1 / g) - f1 / g * np.sin(10 * np.pi * f1)
+
+
+class ZDT4(ZDT):
+    # variables after the first range over [-5, 5]
+    num_variables = 10
+
+    def g(self, x):
+        y = 10 * x[:, 1:] - 5
+        return 1 + 10 * y.shape[1] + np.sum(y**2 - 10 * np.cos(4 * np.pi * y), axis=1)
+
+
+class ZDT5(ZDT):
+    # a binary problem, each variable being a bit set when it is at least 0.5: a substring of
+    # 30 bits followed by 10 of 5 bits
+
+    num_variables = 80
+
+    def ones(self, x):
+        bits = x >= 0.5
+        return np.sum(bits[:, :30], axis=1), np.sum(
+            bits[:, 30:].reshape(len(x), 10, 5), axis=2
+        )
+
+    def objectives(self, x):
+        first, rest = self.ones(x)
+        f1 = 1.0 + first
+        g = np.sum(np.where(rest < 5, 2 + rest, 1), axis=1).astype(np.float64)
+        return np.stack([f1, g / f1], axis=1)
+
+
+class ZDT6(ZDT):
+    num_variables = 10
+
+    def f1(self, x):
+        return 1 - np.exp(-4 * x[:, 0]) * np.sin(6 * np.pi * x[:, 0]) ** 6
+
+    def g(self, x):
+        return 1 + 9 * np.mean(x[:, 1:], axis=1) ** 0.25
+
+    def h(self, f1, g):
+        return 1 - (f1 / g) ** 2
+
+
+class DTLZ(Problem):
+    # the scalable problems of Deb, Thiele, Laumanns and Zitzler (2002), with num_objectives
+    # objectives on num_objectives + k - 1 variables, the last k of which set the distance g
+    # to the Pareto front
+
+    k = 10
+
+    def __init__(self, context, genes=None, num_objectives=3, k=None):
+        self.num_objectives = num_objectives
+        if k is not None:
+            self.k = k
+        self.num_variables = num_objectives + self.k - 1
+        Problem.__init__(self, context, genes)
+
+    def copy(self):
+        return type(self)(self.context, self.genes, self.num_objectives, self.k)
+
+    def split(self, x):
+        m = self.num_objectives
+        return x[:, : m - 1], x[:, m - 1 :]
+
+    def spherical(self, angles, radius):
+        # objectives on the sphere of the given radius at the num_objectives - 1 angles, the
+        # i-th being the product of the cosines of the first num_objectives - i angles and the
+        # sine of the next one
+        n = len(angles)
+        ones = np.ones((n, 1))
+        cosines = np.cumprod(np.concatenate([ones, np.cos(angles)], axis=1), axis=1)
+        sines = np.concatenate([ones, np.sin(angles[:, ::-1])], axis=1)
+        return radius[:, None] * cosines[:, ::-1] * sines
+
+
+def rastrigin_distance(xm):
+    return 100 * (
+        xm.shape[1] + np.sum((xm - 0.5) ** 2 - np.cos(20 * np.pi * (xm - 0.5)), axis=1)
+    )
+
+
+def sphere_distance(xm):
+    return np.sum((xm - 0.5) ** 2, axis=1)
+
+
+class DTLZ1(DTLZ):
+    k = 5
+
+    def objectives(self, x):
+        xs, xm = self.split(x)
+        n = len(x)
+        products = np.cumprod(np.concatenate([np.ones((n, 1)), xs], axis=1), axis=1)
+        complements = np.concatenate([np.ones((n, 1)), 1 - xs[:, ::-1]], axis=1)
+        radius = 0.5 * (1 + rastrigin_distance(xm))
+        return radius[:, None] * products[:, ::-1] * complements
+
+
+class DTLZ2(DTLZ):
+    def objectives(self, x):
+        xs, xm = self.split(x)
+        return self.spherical(xs * np.pi / 2, 1 + sphere_distance(xm))
+
+
+class DTLZ3(DTLZ):
+    def objectives(self, x):
+        xs, xm = self.split(x)
+        return self.spherical(xs * np.pi / 2, 1 + rastrigin_distance(xm))
+
+
+class DTLZ4(DTLZ):
+    alpha = 100
+
+    def objectives(self, x):
+        xs, xm = self.split(x)
+        return self.spherical(xs**self.alpha * np.pi / 2, 1 + sphere_distance(xm))
+
+
+class DTLZ5(DTLZ):
+    def distance(self, xm):
+        return sphere_distance(xm)
+
+    def objectives(self, x):
+        xs, xm = self.split(x)
+        g = self.distance(xm)
+        angles = np.pi / (4 * (1 + g[:, None])) * (1 + 2 * g[:, None] * xs)
+        angles[:, 0] = xs[:, 0] * np.pi / 2
+        return self.spherical(angles, 1 + g)
+
+
+class DTLZ6(DTLZ5):
+    def distance(self, xm):
+        return np.sum(xm**0.1, axis=1)
+
+
+class DTLZ7(DTLZ):
+    k = 20
+
+    def objectives(self, x):
+        xs, xm = self.split(x)
+        g = 1 + 9 * np.mean(xm, axis=1)
+        h = self.num_objectives - np.sum(
+            xs / (1 + g[:, None]) * (1 + np.sin(3 * np.pi * xs)), axis=1
+        )
+        return np.concatenate([xs, ((1 + g) * h)[:, None]], axis=1)
+
+
+PROBLEMS = dict(
+    (cls.__name__, cls)
+    for cls in (
+        ZDT1,
+        ZDT2,
+        ZDT3,
+        ZDT4,
+        ZDT5,
+        ZDT6,
+        DTLZ1,
+        DTLZ2,
+        DTLZ3,
+        DTLZ4,
+        DTLZ5,
+        DTLZ6,
+        DTLZ7,
+    )
+)
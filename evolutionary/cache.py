@@ -0,0 +1,120 @@
+import collections
+import hashlib
+import shelve
+
+import numpy as np
+
+
+class ObjectiveCache(object):
+    # memoizes objectives by a hash of the chromosome class and its gene vector
+    #
+    # The most recently used maxsize entries are kept in memory. With a filename every result is
+    # also written to a shelve file, which outlives the run and is consulted on a memory miss.
+    # With a quantum, genes are rounded to multiples of it before hashing, so chromosomes closer
+    # than the quantum share their objectives. Penalty objectives an evaluator gives in place
+    # of an evaluation past its deadline are never stored, and after evaluate timed_out lists
+    # the indices of the chromosomes that got them.
+
+    def __init__(self, maxsize=1024, quantum=None, filename=None):
+        if maxsize < 0:
+            raise ValueError("maxsize must not be negative, got %d" % maxsize)
+        self.maxsize = maxsize
+        self.quantum = quantum
+        self.entries = collections.OrderedDict()
+        self.spill = None if filename is None else shelve.open(filename)
+        self.hits = 0
+        self.misses = 0
+        self.timed_out = []
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self.spill is not None:
+            self.spill.close()
+            self.spill = None
+
+    def key(self, chromosome):
+        genes = np.asarray(chromosome.genes, dtype=np.float64)
+        if self.quantum is not None:
+            genes = np.round(genes / self.quantum).astype(np.int64)
+        digest = hashlib.blake2b(digest_size=16)
+        cls = type(chromosome)
+        digest.update(("%s.%s" % (cls.__module__, cls.__qualname__)).encode())
+        digest.update(np.ascontiguousarray(genes).tobytes())
+        return digest.hexdigest()
+
+    def get(self, key):
+        # gives the cached objectives for key, or None
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        if self.spill is not None and key in self.spill:
+            objectives = self.spill[key]
+            self.remember(key, objectives)
+            return objectives
+        return None
+
+    def put(self, key, objectives):
+        self.remember(key, objectives)
+        if self.spill is not None:
+            self.spill[key] = objectives
+
+    def remember(self, key, objectives):
+        self.entries[key] = objectives
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def lookup(self, chromosomes):
+        # gives the keys of the chromosomes, their cached objectives or None, and the indices of
+        # the chromosomes still to evaluate, skipping those repeating an earlier genome
+        keys = [self.key(chromosome) for chromosome in chromosomes]
+        values = []
+        pending = []
+        first = {}
+        for i, key in enumerate(keys):
+            objectives = self.get(key)
+            if objectives is None and key not in first:
+                first[key] = i
+                pending.append(i)
+                self.misses += 1
+            else:
+                self.hits += 1
+            values.append(objectives)
+        return keys, values, pending
+
+    def fill(self, keys, values, pending, results, timed_out=()):
+        # stores the objectives evaluated for the pending chromosomes, other than the positions
+        # among them in timed_out, and completes values
+        penalised = set(keys[pending[j]] for j in timed_out)
+        found = {}
+        for i, objectives in zip(pending, results):
+            if keys[i] not in penalised:
+                self.put(keys[i], objectives)
+            found[keys[i]] = objectives
+        self.timed_out = [
+            i
+            for i, (key, value) in enumerate(zip(keys, values))
+            if value is None and key in penalised
+        ]
+        return [
+            list(found[key] if value is None else value)
+            for key, value in zip(keys, values)
+        ]
+
+    def evaluate(self, chromosomes, evaluate):
+        # gives the objectives of the chromosomes, calling evaluate only on those not cached
+        chromosomes = list(chromosomes)
+        keys, values, pending = self.lookup(chromosomes)
+        if not pending:
+            return self.fill(keys, values, pending, [])
+        results = evaluate([chromosomes[i] for i in pending])
+        timed_out = getattr(evaluate, "timed_out", ())
+        return self.fill(keys, values, pending, results, timed_out)
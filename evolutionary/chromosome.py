@@ -2,19 +2,64 @@ import numpy as np
 
 
 def softmax(logits):
-    distribution = np.exp(logits)
-    distribution /= np.sum(distribution)
+    # shifting by the largest logit keeps np.exp from overflowing without changing the result
+    logits = np.asarray(logits, dtype=np.float64)
+    distribution = np.exp(logits - np.max(logits, axis=-1, keepdims=True))
+    distribution /= np.sum(distribution, axis=-1, keepdims=True)
     return distribution
 
 
+def select_indices(genes, num_options, r):
+    # decodes every row of an (N, G) gene matrix into categorical choices among num_options
+    #
+    # After the mutation rate, each run of num_options genes holds the logits of one choice,
+    # and genes left over at the end are ignored. Adding Gumbel noise to the logits and taking
+    # the largest samples all choices from their softmax distributions at once.
+    genes = np.asarray(genes, dtype=np.float64)
+    num_segments = (genes.shape[1] - 1) // num_options
+    logits = genes[:, 1 : 1 + num_segments * num_options]
+    logits = logits.reshape(len(genes), num_segments, num_options)
+    return np.argmax(logits + r.gumbel(size=logits.shape), axis=2)
+
+
+def mutate_genes(genes, r, rates=None):
+    # mutates an (N, G) gene matrix in place, replacing each gene of a row by a uniform draw with
+    # the mutation rate of the row, by default its first gene
+    if rates is None:
+        rates = genes[:, :1]
+    mask = r.random(genes.shape) < np.reshape(rates, (-1, 1))
+    genes[mask] = r.random(np.count_nonzero(mask))
+    return genes
+
+
+def crossover_genes(genes0, genes1, r):
+    # uniform crossover of the paired rows of two (N, G) gene matrices, giving two child matrices
+    swap = r.random(genes0.shape) < 0.5
+    return np.where(swap, genes1, genes0), np.where(swap, genes0, genes1)
+
+
+def with_genes(prototype, genes):
+    # gives copies of prototype carrying each row of an (N, G) gene matrix in turn
+    chromosomes = []
+    for row in np.asarray(genes).tolist():
+        chromosome = prototype.copy()
+        chromosome.genes = row
+        # a copy may carry the phenotype decoded from the genes of the prototype
+        chromosome.phenotype_cache = {}
+        chromosomes.append(chromosome)
+    return chromosomes
+
+
 class Chromosome(object):
     def __init__(self, context, genes=None, numberOfGenes=None):
         self.context = context
+        # choices decoded by select, keyed by the number of options, until the genes change
+        self.phenotype_cache = {}
 
         if genes is not None:
             self.genes = list(genes)
         else:
-            self.genes = [self.r.rand() for i in range(numberOfGenes)]
+            self.genes = [self.r.random() for i in range(numberOfGenes)]
 
     @property
     def r(self):
@@ -30,23 +75,30 @@ class Chromosome(object):
         return self.genes[0]
 
     def mutate(self):
-        rate = self.mutationRate()
-        for i in range(len(self.genes)):
-            if self.r.rand() < rate:
-                self.genes[i] = self.r.rand()
+        genes = np.array([self.genes], dtype=np.float64)
+        mutate_genes(genes, self.r, self.mutationRate())
+        self.genes = genes[0].tolist()
+        self.phenotype_cache = {}
 
     def crossover(self, other):
         child0 = self.copy()
         child1 = other.copy()
-        for i in range(len(child0.genes)):
-            if self.r.rand() < 0.5:
-                child0.genes[i] = other.genes[i]
-                child1.genes[i] = self.genes[i]
+        genes0, genes1 = crossover_genes(
+            np.array([self.genes], dtype=np.float64),
+            np.array([other.genes], dtype=np.float64),
+            self.r,
+        )
+        child0.genes = genes0[0].tolist()
+        child1.genes = genes1[0].tolist()
+        child0.phenotype_cache = {}
+        child1.phenotype_cache = {}
         return child0, child1
 
     def select(self, objects):
-        selections = []
-        for i in range(1, len(self), len(objects)):
-            p = softmax(self.genes[i : i + len(objects)])
-            selections.append(self.r.choice(objects, p=p))
-        return selections
+        # decodes the genes into one choice among objects per segment, drawn once and then
+        # cached until mutate or crossover changes the genes
+        num_options = len(objects)
+        if num_options not in self.phenotype_cache:
+            indices = select_indices([self.genes], num_options, self.r)[0]
+            self.phenotype_cache[num_options] = indices.tolist()
+        return [objects[i] for i in self.phenotype_cache[num_options]]
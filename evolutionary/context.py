@@ -2,14 +2,28 @@ import numpy as np
 
 
 class Context(object):
-    def __init__(self, seed=1):
+    # source of randomness shared by the chromosomes and the algorithm
+    #
+    # By default r is a legacy np.random.RandomState seeded as before. With legacy=False it is an
+    # np.random.Generator on PCG64. Either way spawn gives child contexts on independent streams
+    # derived with np.random.SeedSequence, for workers, islands or batches that must not share
+    # a generator. Only methods common to both backends, such as random, choice, permutation
+    # and gumbel, should be used through r.
+
+    def __init__(self, seed=1, legacy=True):
+        self.__legacy = legacy
         self.__seed = seed
-        self.__random_state = np.random.RandomState(seed)
+        self.__random_state = self.__make_random_state(seed)
+        self.__seed_sequence = None
 
     @property
     def r(self):
         return self.__random_state
 
+    @property
+    def legacy(self):
+        return self.__legacy
+
     @property
     def seed(self):
         return self.__seed
@@ -26,7 +40,70 @@ class Context(object):
     @random_state.setter
     def random_state(self, random_state):
         self.__random_state = random_state
-        self.__seed = random_state.get_state()[1][0]
+        if isinstance(random_state, np.random.Generator):
+            self.__legacy = False
+            self.__seed = random_state.bit_generator.seed_seq
+        else:
+            self.__legacy = True
+            self.__seed = random_state.get_state()[1][0]
+        self.__seed_sequence = None
+
+    @property
+    def seed_sequence(self):
+        # the np.random.SeedSequence children are spawned from
+        if self.__seed_sequence is None:
+            self.__seed_sequence = fresh_seed_sequence(self.__seed)
+        return self.__seed_sequence
+
+    def __make_random_state(self, seed):
+        if isinstance(seed, np.random.SeedSequence):
+            if self.__legacy:
+                return np.random.RandomState(np.random.MT19937(seed))
+            return np.random.Generator(np.random.PCG64(seed))
+        if self.__legacy:
+            return np.random.RandomState(seed)
+        return np.random.Generator(np.random.PCG64(seed))
 
     def reset(self):
-        self.__random_state.seed(self.__seed)
+        if self.__legacy and not isinstance(self.__seed, np.random.SeedSequence):
+            self.__random_state.seed(self.__seed)
+        else:
+            self.__random_state = self.__make_random_state(
+                fresh_seed_sequence(self.__seed)
+            )
+        self.__seed_sequence = None
+
+    def get_state(self):
+        # the state of the generator as a dictionary of plain python values, which json accepts
+        if self.__legacy:
+            state = self.__random_state.get_state(legacy=False)
+            state["state"]["key"] = state["state"]["key"].tolist()
+            return state
+        return self.__random_state.bit_generator.state
+
+    def set_state(self, state):
+        # restores a state given by get_state
+        if self.__legacy:
+            state = dict(state, state=dict(state["state"]))
+            state["state"]["key"] = np.array(state["state"]["key"], dtype=np.uint32)
+            self.__random_state.set_state(state)
+        else:
+            self.__random_state.bit_generator.state = state
+
+    def spawn(self, n):
+        # gives n child contexts with independent streams and the same backend
+        #
+        # Children depend only on the seed and on how many were spawned before, so the same
+        # sequence of calls gives the same streams, and reset starts the count again.
+        return [
+            Context(seed, legacy=self.__legacy) for seed in self.seed_sequence.spawn(n)
+        ]
+
+
+def fresh_seed_sequence(seed):
+    # a np.random.SeedSequence for the seed that has not spawned any children yet
+    if isinstance(seed, np.random.SeedSequence):
+        return np.random.SeedSequence(
+            seed.entropy, spawn_key=seed.spawn_key, pool_size=seed.pool_size
+        )
+    return np.random.SeedSequence(seed)
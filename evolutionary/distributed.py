@@ -0,0 +1,466 @@
+import argparse
+import importlib
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import traceback
+from multiprocessing.connection import Client, Listener
+
+import numpy as np
+
+from evolutionary import evaluation
+from evolutionary.context import Context
+
+# chromosome attributes a worker sets itself rather than receiving them
+LOCAL_ATTRIBUTES = ("context", "genes", "phenotype_cache")
+
+
+def class_path(cls):
+    return "%s:%s" % (cls.__module__, cls.__qualname__)
+
+
+def load_class(path):
+    module, qualname = path.split(":")
+    cls = importlib.import_module(module)
+    for name in qualname.split("."):
+        cls = getattr(cls, name)
+    return cls
+
+
+def specification(chromosome):
+    # what a worker needs to rebuild chromosomes like this one from their genes: the path of
+    # the class and the attributes other than the genes and the context
+    attributes = dict(
+        (name, value)
+        for name, value in vars(chromosome).items()
+        if name not in LOCAL_ATTRIBUTES
+    )
+    return class_path(type(chromosome)), attributes
+
+
+class Batch(object):
+    # the objectives of one call of the coordinator, filled in as tasks complete
+    def __init__(self, first, sizes):
+        self.first = first
+        self.sizes = sizes
+        self.objectives = [None] * len(sizes)
+        # the tasks past their deadline, which hold the penalty until the call fills in rows
+        # of it
+        self.expired = []
+        # when a worker first started each task, from which its deadline runs
+        self.started = [None] * len(sizes)
+        num_tasks = len(sizes)
+        self.remaining = num_tasks
+        self.error = None
+        self.done = threading.Event()
+
+
+class Coordinator(object):
+    # evaluates chromosomes on workers connected over multiprocessing.connection
+    #
+    # Workers, on this or other machines, connect to address with the shared authkey, which
+    # guards a channel over which every message is unpickled, so it must be kept secret; by
+    # default it is random, which suits workers from spawn_workers, and remote workers need
+    # one given explicitly, set as EVOLUTIONARY_AUTHKEY where they run. Calling
+    # the coordinator with chromosomes splits their genes into tasks of batch_size rows and
+    # hands them to idle workers, each of which may hold prefetch tasks so that it never waits
+    # for a round trip. A task is sent with the path of the chromosome class and its other
+    # attributes, and a worker rebuilds the chromosomes and returns their objectives as an
+    # array. Workers send a heartbeat every heartbeat seconds; one not heard from for timeout
+    # seconds, or whose connection breaks, is dropped and its tasks are given to other workers.
+    # A coordinator can be passed to NSGAII as its evaluator.
+    #
+    # Stragglers are handled by speculation and deadlines, timing each task from when a worker
+    # reports starting it rather than from when it was sent, as a prefetched task waits behind
+    # the others of its worker. With speculate_after, a worker with nothing to do launches a
+    # second copy of a task started that many seconds ago and not yet done, and the first
+    # result wins. With deadline, a task still unfinished deadline seconds per chromosome after
+    # it first started is given penalty objectives, infinite by default, so that its children
+    # are dominated and new_population removes them; when evaluations can hang, a batch_size of
+    # 1 keeps a hung evaluation from taking its batch with it. A single penalty value is
+    # repeated for each objective, as many as the other results of the call or a num_objectives
+    # attribute of the chromosomes show.
+    # After each call timed_out lists the indices of the chromosomes given penalty objectives.
+    # statistics gives counts of the tasks, reassignments, duplicates launched, chromosomes
+    # timed out and results discarded because another copy or the deadline came first.
+
+    def __init__(
+        self,
+        address=("localhost", 0),
+        authkey=None,
+        batch_size=16,
+        prefetch=2,
+        timeout=10.0,
+        deadline=None,
+        speculate_after=None,
+        penalty=np.inf,
+    ):
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1, got %d" % batch_size)
+        self.authkey = os.urandom(32) if authkey is None else authkey
+        self.batch_size = batch_size
+        self.prefetch = prefetch
+        self.timeout = timeout
+        self.deadline = deadline
+        self.speculate_after = speculate_after
+        self.penalty = penalty
+        self.num_objectives = None
+        self.timed_out = []
+        self.listener = Listener(address, authkey=self.authkey)
+        self.address = self.listener.address
+        self.tasks = queue.Queue()
+        self.lock = threading.Lock()
+        self.workers = {}
+        self.next_task = 0
+        self.stopping = False
+        # tasks sent and not yet done, by id, with the number of copies running
+        self.running = {}
+        self.reassigned = 0
+        self.duplicates = 0
+        self.timeouts = 0
+        self.discarded = 0
+        self.processes = []
+        self.accepting = threading.Thread(target=self.accept, daemon=True)
+        self.accepting.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def accept(self):
+        while not self.stopping:
+            try:
+                connection = self.listener.accept()
+            except Exception:
+                # a failed handshake only loses that connection
+                if self.stopping:
+                    return
+                continue
+            if self.stopping:
+                connection.close()
+                return
+            thread = threading.Thread(
+                target=self.serve, args=(connection,), daemon=True
+            )
+            thread.start()
+
+    def serve(self, connection):
+        # sends tasks to one worker and takes its results until it stops or is lost
+        in_flight = {}
+        last_seen = time.monotonic()
+        name = None
+        try:
+            message = connection.recv()
+            if message[0] != "ready":
+                return
+            name = message[1]
+            with self.lock:
+                self.workers[name] = in_flight
+            while not self.stopping:
+                while len(in_flight) < self.prefetch:
+                    try:
+                        task = self.tasks.get_nowait()
+                    except queue.Empty:
+                        break
+                    if self.pending(task):
+                        self.dispatch(connection, in_flight, task)
+                if not in_flight and self.speculate_after is not None:
+                    task = self.straggler()
+                    if task is not None:
+                        self.dispatch(connection, in_flight, task)
+                if connection.poll(0.05):
+                    message = connection.recv()
+                    last_seen = time.monotonic()
+                    if message[0] == "started":
+                        self.start(in_flight.get(message[1]))
+                    elif message[0] == "result":
+                        self.complete(in_flight.pop(message[1], None), message[2])
+                    elif message[0] == "error":
+                        self.fail(in_flight.pop(message[1], None), message[2])
+                elif time.monotonic() - last_seen > self.timeout:
+                    break
+            if self.stopping:
+                connection.send(("stop",))
+        except (EOFError, OSError):
+            pass
+        finally:
+            connection.close()
+            with self.lock:
+                if name is not None:
+                    self.workers.pop(name, None)
+                for task_id, task in in_flight.items():
+                    if task_id in self.running:
+                        self.running[task_id][1] -= 1
+                    if self.pending(task):
+                        self.reassigned += 1
+                        self.tasks.put(task)
+
+    def pending(self, task):
+        _, batch, slot, _, _ = task
+        return batch.objectives[slot] is None and not batch.done.is_set()
+
+    def dispatch(self, connection, in_flight, task):
+        task_id, batch, slot, spec, genes = task
+        with self.lock:
+            self.running.setdefault(task_id, [task, 0])[1] += 1
+        in_flight[task_id] = task
+        connection.send(("task", task_id, spec, genes))
+
+    def start(self, task):
+        if task is None:
+            return
+        _, batch, slot, _, _ = task
+        with self.lock:
+            if batch.started[slot] is None:
+                batch.started[slot] = time.monotonic()
+
+    def straggler(self):
+        # the oldest task running on a single worker for longer than speculate_after, if any,
+        # counted as a duplicate as the caller launches it
+        now = time.monotonic()
+        with self.lock:
+            for task, copies in self.running.values():
+                _, batch, slot, _, _ = task
+                started = batch.started[slot]
+                if (
+                    copies == 1
+                    and started is not None
+                    and self.pending(task)
+                    and now - started > self.speculate_after
+                ):
+                    self.duplicates += 1
+                    return task
+        return None
+
+    def fill(self, batch, slot, objectives):
+        # called holding the lock
+        batch.objectives[slot] = objectives
+        self.running.pop(batch.first + slot, None)
+        batch.remaining -= 1
+        if batch.remaining == 0:
+            batch.done.set()
+
+    def complete(self, task, objectives):
+        if task is None:
+            return
+        _, batch, slot, _, _ = task
+        with self.lock:
+            if not self.pending(task):
+                self.discarded += 1
+                return
+            if objectives.ndim == 2:
+                self.num_objectives = objectives.shape[1]
+            self.fill(batch, slot, objectives)
+
+    def expire(self, batch):
+        # ends the tasks of batch whose deadline has passed, which get penalty objectives when
+        # the call returns
+        now = time.monotonic()
+        with self.lock:
+            for slot, started in enumerate(batch.started):
+                size = batch.sizes[slot]
+                if (
+                    started is None
+                    or batch.objectives[slot] is not None
+                    or now - started <= self.deadline * size
+                ):
+                    continue
+                self.timeouts += size
+                batch.expired.append(slot)
+                self.fill(batch, slot, self.penalty)
+
+    def fail(self, task, error):
+        if task is None:
+            return
+        _, batch, _, _, _ = task
+        with self.lock:
+            batch.error = error
+            batch.done.set()
+
+    def __call__(self, chromosomes):
+        # gives the objectives of the chromosomes, in order, waiting for workers to compute them
+        chromosomes = list(chromosomes)
+        self.timed_out = []
+        if not chromosomes:
+            return []
+        if self.num_objectives is None:
+            self.num_objectives = getattr(chromosomes[0], "num_objectives", None)
+        spec = specification(chromosomes[0])
+        genes = np.array([chromosome.genes for chromosome in chromosomes], np.float64)
+        pieces = [
+            genes[start : start + self.batch_size]
+            for start in range(0, len(genes), self.batch_size)
+        ]
+        with self.lock:
+            first = self.next_task
+            self.next_task += len(pieces)
+        batch = Batch(first, [len(piece) for piece in pieces])
+        for slot, piece in enumerate(pieces):
+            self.tasks.put((first + slot, batch, slot, spec, piece))
+        while not batch.done.wait(None if self.deadline is None else 0.05):
+            self.expire(batch)
+        with self.lock:
+            for task_id in range(first, first + len(pieces)):
+                self.running.pop(task_id, None)
+        if batch.error is not None:
+            raise RuntimeError("evaluation failed on a worker:\n%s" % batch.error)
+        for slot in sorted(batch.expired):
+            size = batch.sizes[slot]
+            batch.objectives[slot] = evaluation.penalties(
+                self.penalty, size, self.num_objectives
+            )
+            first = slot * self.batch_size
+            self.timed_out.extend(range(first, first + size))
+        return np.concatenate(batch.objectives).tolist()
+
+    def statistics(self):
+        with self.lock:
+            return {
+                "tasks": self.next_task,
+                "reassigned": self.reassigned,
+                "duplicates": self.duplicates,
+                "timeouts": self.timeouts,
+                "discarded": self.discarded,
+            }
+
+    @property
+    def num_workers(self):
+        with self.lock:
+            return len(self.workers)
+
+    def wait_for_workers(self, count, timeout=None):
+        # waits until count workers are connected, giving whether they are
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.num_workers < count:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def spawn_workers(self, count, heartbeat=1.0, mp_context=None):
+        # starts count worker processes on this machine
+        mp_context = multiprocessing.get_context() if mp_context is None else mp_context
+        for _ in range(count):
+            process = mp_context.Process(
+                target=run_worker,
+                args=(self.address, self.authkey),
+                kwargs={"heartbeat": heartbeat},
+                daemon=True,
+            )
+            process.start()
+            self.processes.append(process)
+        return self.processes[-count:]
+
+    def close(self):
+        # tells the workers to stop and stops accepting new ones
+        if self.stopping:
+            return
+        self.stopping = True
+        try:
+            # wakes the thread blocked in accept
+            Client(self.address, authkey=self.authkey).close()
+        except Exception:
+            pass
+        self.accepting.join()
+        self.listener.close()
+        for process in self.processes:
+            process.join(timeout=self.timeout)
+            if process.is_alive():
+                process.terminate()
+
+
+class Worker(object):
+    # evaluates the tasks a coordinator sends, rebuilding chromosomes from their genes
+
+    def __init__(self, address, authkey, name=None, heartbeat=1.0):
+        self.connection = Client(address, authkey=authkey)
+        self.name = (
+            "%s-%d" % (os.uname().nodename, os.getpid()) if name is None else name
+        )
+        self.heartbeat = heartbeat
+        self.lock = threading.Lock()
+        self.context = Context()
+        self.classes = {}
+        self.stopped = threading.Event()
+
+    def send(self, message):
+        with self.lock:
+            self.connection.send(message)
+
+    def beat(self):
+        while not self.stopped.wait(self.heartbeat):
+            try:
+                self.send(("heartbeat",))
+            except (OSError, ValueError):
+                return
+
+    def chromosomes(self, spec, genes):
+        path, attributes = spec
+        if path not in self.classes:
+            self.classes[path] = load_class(path)
+        cls = self.classes[path]
+        chromosomes = []
+        for row in genes.tolist():
+            chromosome = cls.__new__(cls)
+            vars(chromosome).update(attributes)
+            chromosome.context = self.context
+            chromosome.phenotype_cache = {}
+            chromosome.genes = row
+            chromosomes.append(chromosome)
+        return chromosomes
+
+    def run(self):
+        self.send(("ready", self.name))
+        if self.heartbeat is not None:
+            threading.Thread(target=self.beat, daemon=True).start()
+        try:
+            while True:
+                try:
+                    message = self.connection.recv()
+                except EOFError:
+                    break
+                if message[0] == "stop":
+                    break
+                _, task_id, spec, genes = message
+                self.send(("started", task_id))
+                try:
+                    objectives = evaluation.batch_evaluate(
+                        self.chromosomes(spec, genes)
+                    )
+                    self.send(("result", task_id, np.array(objectives, np.float64)))
+                except Exception:
+                    self.send(("error", task_id, traceback.format_exc()))
+        finally:
+            self.stopped.set()
+            self.connection.close()
+
+
+def run_worker(address, authkey, name=None, heartbeat=1.0):
+    Worker(address, authkey, name, heartbeat).run()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m evolutionary.distributed",
+        description="Runs a worker evaluating chromosomes for a coordinator.",
+    )
+    parser.add_argument("address", help="host:port of the coordinator")
+    parser.add_argument("--heartbeat", type=float, default=1.0)
+    parser.add_argument("--name", default=None)
+    args = parser.parse_args(argv)
+    host, port = args.address.rsplit(":", 1)
+    authkey = os.environ.get("EVOLUTIONARY_AUTHKEY")
+    if not authkey:
+        parser.error(
+            "EVOLUTIONARY_AUTHKEY must be set to the authkey of the coordinator"
+        )
+    authkey = authkey.encode()
+    run_worker((host, int(port)), authkey, args.name, args.heartbeat)
+
+
+if __name__ == "__main__":
+    main()
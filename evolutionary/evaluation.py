@@ -0,0 +1,216 @@
+import asyncio
+import inspect
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+def evaluate(chromosomes):
+    # gives the objectives of each chromosome, in order, calling getObjectives one at a time
+    return [chromosome.getObjectives() for chromosome in chromosomes]
+
+
+def batch_evaluate(chromosomes):
+    # gives the objectives of chromosomes of one class, in order, in a single call of its
+    # batch_objectives on the (N, G) matrix of their genes when it has one, which should give
+    # an (N, M) matrix, and otherwise calling getObjectives one at a time
+    chromosomes = list(chromosomes)
+    if not chromosomes or not hasattr(chromosomes[0], "batch_objectives"):
+        return evaluate(chromosomes)
+    genes = np.array([chromosome.genes for chromosome in chromosomes], np.float64)
+    objectives = chromosomes[0].batch_objectives(genes)
+    return np.asarray(objectives, np.float64).reshape(len(genes), -1).tolist()
+
+
+def penalties(penalty, count, num_objectives):
+    # count rows of penalty objectives, penalty being a vector or one value for each of
+    # num_objectives objectives
+    penalty = np.asarray(penalty, np.float64)
+    if penalty.ndim == 0:
+        if num_objectives is None:
+            raise RuntimeError(
+                "every evaluation passed its deadline and the chromosomes have no "
+                "num_objectives attribute, so penalty must be given as a vector"
+            )
+        penalty = np.full(num_objectives, penalty)
+    return np.broadcast_to(penalty, (count, len(penalty)))
+
+
+def timed_evaluate(name, slot, chromosomes):
+    # evaluates a chunk for ExecutorEvaluator, first recording the time it started in its slot
+    # of the shared memory of that name unless another copy started earlier
+    try:
+        memory = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        # the call which submitted the chunk has returned, so nothing waits for the result
+        return None
+    try:
+        started = np.ndarray((slot + 1,), dtype=np.float64, buffer=memory.buf)
+        if started[slot] == 0:
+            started[slot] = time.time()
+        del started
+    finally:
+        memory.close()
+    return batch_evaluate(chromosomes)
+
+
+def chunks(sequence, size):
+    # splits a sequence into consecutive pieces of at most size elements
+    return [sequence[i : i + size] for i in range(0, len(sequence), size)]
+
+
+class ExecutorEvaluator(object):
+    # evaluates chromosomes on anything with a concurrent.futures style submit method
+    #
+    # Chromosomes are sent in chunks of chunksize to amortise dispatch, a chunk taking one call
+    # when their class has batch_objectives, and results are gathered in submission order, so
+    # the objectives do not depend on which evaluation finishes first.
+    # With a process pool, chromosomes are pickled, so getObjectives must not rely on changing
+    # the chromosome it is called on.
+    #
+    # Stragglers are handled as by distributed.Coordinator. With speculate_after, a chunk that
+    # has been running that many seconds is submitted once more and the first copy to finish
+    # wins. With deadline, a chunk still running deadline seconds per chromosome after it
+    # started gets penalty objectives, infinite by default, so that new_population removes its
+    # children. A single penalty value is repeated for each objective, as many as the other
+    # results of the call or a num_objectives attribute of the chromosomes show. A chunk
+    # waiting behind others for a worker has not started: each chunk records when it starts in
+    # shared memory, so the executor must run calls on this machine. An executor cannot stop a
+    # call once started, so a hung evaluation keeps its worker; copies not yet started are
+    # cancelled. After each call timed_out lists the indices of the chromosomes given penalty
+    # objectives, which are not evaluations and should not be learnt from. statistics counts
+    # the chunks, duplicates submitted and chromosomes timed out.
+
+    def __init__(
+        self,
+        executor,
+        chunksize=1,
+        deadline=None,
+        speculate_after=None,
+        penalty=np.inf,
+    ):
+        if chunksize < 1:
+            raise ValueError("chunksize must be at least 1, got %d" % chunksize)
+        self.executor = executor
+        self.chunksize = chunksize
+        self.deadline = deadline
+        self.speculate_after = speculate_after
+        self.penalty = penalty
+        self.num_objectives = None
+        self.timed_out = []
+        self.tasks = 0
+        self.duplicates = 0
+        self.timeouts = 0
+
+    def __call__(self, chromosomes):
+        chromosomes = list(chromosomes)
+        pieces = chunks(chromosomes, self.chunksize)
+        self.tasks += len(pieces)
+        self.timed_out = []
+        if self.num_objectives is None and chromosomes:
+            self.num_objectives = getattr(chromosomes[0], "num_objectives", None)
+        if self.deadline is None and self.speculate_after is None:
+            futures = [self.executor.submit(batch_evaluate, chunk) for chunk in pieces]
+            objectives = []
+            for future in futures:
+                objectives.extend(future.result())
+            return objectives
+        memory = shared_memory.SharedMemory(create=True, size=8 * max(len(pieces), 1))
+        try:
+            started = np.ndarray((len(pieces),), dtype=np.float64, buffer=memory.buf)
+            started[:] = 0
+            try:
+                return self.supervise(pieces, memory.name, started)
+            finally:
+                # the view must go before the buffer can close
+                del started
+        finally:
+            memory.close()
+            memory.unlink()
+
+    def supervise(self, pieces, name, started):
+        # waits for the chunks, launching copies of stragglers and penalising those past their
+        # deadline, and gives their objectives in order; started holds the time each chunk
+        # started, or 0 while it waits for a worker
+        def submit(i):
+            return self.executor.submit(timed_evaluate, name, i, pieces[i])
+
+        copies = [[submit(i)] for i in range(len(pieces))]
+        results = [None] * len(pieces)
+        expired = []
+        remaining = set(range(len(pieces)))
+        while remaining:
+            wait(
+                [future for i in remaining for future in copies[i]],
+                timeout=0.05,
+                return_when=FIRST_COMPLETED,
+            )
+            now = time.time()
+            for i in sorted(remaining):
+                done = [future for future in copies[i] if future.done()]
+                if done:
+                    results[i] = done[0].result()
+                    if results[i]:
+                        self.num_objectives = len(results[i][0])
+                elif started[i] == 0:
+                    continue
+                elif self.deadline is not None and now - started[
+                    i
+                ] > self.deadline * len(pieces[i]):
+                    # the penalty is filled in once the other results give its width
+                    expired.append(i)
+                    first = i * self.chunksize
+                    self.timed_out.extend(range(first, first + len(pieces[i])))
+                    self.timeouts += len(pieces[i])
+                else:
+                    if (
+                        self.speculate_after is not None
+                        and len(copies[i]) == 1
+                        and now - started[i] > self.speculate_after
+                    ):
+                        copies[i].append(submit(i))
+                        self.duplicates += 1
+                    continue
+                remaining.discard(i)
+                for future in copies[i]:
+                    future.cancel()
+        for i in expired:
+            rows = penalties(self.penalty, len(pieces[i]), self.num_objectives)
+            results[i] = rows.tolist()
+        objectives = []
+        for rows in results:
+            objectives.extend(rows)
+        return objectives
+
+    def statistics(self):
+        return {
+            "tasks": self.tasks,
+            "duplicates": self.duplicates,
+            "timeouts": self.timeouts,
+        }
+
+
+async def objectives_async(chromosome):
+    # awaits getObjectives when it is a coroutine function, otherwise runs it in a worker thread
+    if inspect.iscoroutinefunction(chromosome.getObjectives):
+        return await chromosome.getObjectives()
+    return await asyncio.to_thread(chromosome.getObjectives)
+
+
+async def evaluate_async(chromosomes, concurrency=None):
+    # awaits the objectives of all chromosomes concurrently, with at most concurrency in flight,
+    # and gives them in the order of the chromosomes
+    if concurrency is not None and concurrency < 1:
+        raise ValueError("concurrency must be at least 1, got %d" % concurrency)
+    if concurrency is None:
+        return list(await asyncio.gather(*map(objectives_async, chromosomes)))
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(chromosome):
+        async with semaphore:
+            return await objectives_async(chromosome)
+
+    return list(await asyncio.gather(*map(limited, chromosomes)))
@@ -0,0 +1,76 @@
+import numpy as np
+
+from evolutionary import sorting
+
+
+def hypervolume(objectives, reference, samples=None, r=None):
+    # the volume dominated by the rows of objectives and bounded by the reference point, when
+    # minimising, exact unless samples is given for more than two objectives, in which case
+    # it is a Monte Carlo estimate drawing that many points from r
+
+    objectives = np.asarray(objectives, dtype=np.float64)
+    reference = np.asarray(reference, dtype=np.float64)
+    objectives = objectives.reshape(len(objectives), len(reference))
+    objectives = objectives[np.all(objectives < reference, axis=1)]
+    if len(objectives) == 0:
+        return 0.0
+    if len(reference) == 1:
+        return float(reference[0] - np.min(objectives))
+    if len(reference) == 2:
+        return hypervolume_2d(objectives, reference)
+    if samples is None:
+        return hypervolume_wfg(nondominated(objectives), reference)
+    return hypervolume_monte_carlo(objectives, reference, samples, r)
+
+
+def nondominated(objectives):
+    # the distinct rows of the first front
+    first = objectives[sorting.nondominated_sort(objectives)[0]]
+    return np.unique(first, axis=0)
+
+
+def hypervolume_2d(objectives, reference):
+    # sweeps the points in order of the first objective, in O(N log N)
+    order = np.lexsort((objectives[:, 1], objectives[:, 0]))
+    x = objectives[order, 0]
+    y = np.minimum.accumulate(objectives[order, 1])
+    widths = np.diff(np.append(x, reference[0]))
+    return float(np.sum(widths * (reference[1] - y)))
+
+
+def hypervolume_wfg(objectives, reference):
+    # the WFG algorithm (While, Bradstreet and Barone, 2012) on distinct nondominated rows:
+    # the volume is the sum over the points of the volume each one adds to those after it,
+    # which is its own box less the volume of the later points limited to that box
+
+    if len(objectives) == 1:
+        return float(np.prod(reference - objectives[0]))
+    if objectives.shape[1] == 2:
+        return hypervolume_2d(objectives, reference)
+    # sorting on the last objective keeps the limited sets of later points small
+    objectives = objectives[np.argsort(objectives[:, -1])[::-1]]
+    total = 0.0
+    for k, point in enumerate(objectives):
+        total += np.prod(reference - point)
+        rest = objectives[k + 1 :]
+        if len(rest):
+            total -= hypervolume_wfg(nondominated(np.maximum(rest, point)), reference)
+    return float(total)
+
+
+def hypervolume_monte_carlo(objectives, reference, samples, r, chunk=65536):
+    # the fraction of uniform samples in the box between the ideal and reference points that
+    # some row dominates, times the volume of the box
+    if r is None:
+        r = np.random.RandomState()
+    objectives = nondominated(objectives)
+    ideal = np.min(objectives, axis=0)
+    box = reference - ideal
+    dominated = 0
+    for start in range(0, samples, chunk):
+        points = ideal + box * r.random((min(chunk, samples - start), len(reference)))
+        covered = np.zeros(len(points), dtype=bool)
+        for row in objectives:
+            covered |= np.all(row <= points, axis=1)
+        dominated += int(np.sum(covered))
+    return float(np.prod(box) * dominated / samples)
@@ -0,0 +1,182 @@
+import cProfile
+import contextlib
+import io
+import pstats
+import time
+import tracemalloc
+
+import numpy as np
+
+
+class NullInstrument(object):
+    # the instrument NSGAII uses by default, whose every method does nothing
+
+    null_phase = contextlib.nullcontext()
+
+    def phase(self, name):
+        return self.null_phase
+
+    def count(self, name, n=1):
+        pass
+
+    def start_generation(self, nsgaii, generation):
+        pass
+
+    def end_generation(self, nsgaii):
+        pass
+
+
+NULL_INSTRUMENT = NullInstrument()
+
+
+class Phase(object):
+    # times one run of a phase into the totals of its instrument
+    __slots__ = ("instrument", "name", "start")
+
+    def __init__(self, instrument, name):
+        self.instrument = instrument
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.instrument.add_time(self.name, time.perf_counter() - self.start)
+
+
+class Instrument(object):
+    # timers and counters around the phases of evolve, recorded per generation
+    #
+    # The phases of a generation are make_children, evaluate, select and log; select contains
+    # the sort and crowding phases, whose time is also part of its own. Each generation gives a
+    # record with its wall clock time, the time of each phase, the objectives assigned and
+    # evaluations per second of evaluate, the cache hits, and the sizes of the fronts. With
+    # trace_memory the peak of memory allocated through python during the generation is
+    # recorded with tracemalloc, and with profile_generation that generation runs under
+    # cProfile, its statistics being kept in profile. close stops tracemalloc if the instrument
+    # started it.
+
+    def __init__(self, trace_memory=False, profile_generation=None):
+        self.trace_memory = trace_memory
+        self.profile_generation = profile_generation
+        self.profile = None
+        self.totals = {}
+        self.calls = {}
+        self.counters = {}
+        self.generations = []
+        self.current = None
+        self.start = None
+        self.evaluations = 0
+        self.hits = None
+        self.profiler = None
+        self.started_tracing = False
+
+    def phase(self, name):
+        return Phase(self, name)
+
+    def add_time(self, name, seconds):
+        self.totals[name] = self.totals.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + 1
+        if self.current is not None:
+            phases = self.current["phases"]
+            phases[name] = phases.get(name, 0.0) + seconds
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def start_generation(self, nsgaii, generation):
+        self.current = {"generation": generation, "phases": {}}
+        self.evaluations = nsgaii.evaluations
+        self.hits = None if nsgaii.cache is None else nsgaii.cache.hits
+        self.start = time.perf_counter()
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self.started_tracing = True
+            tracemalloc.reset_peak()
+        if generation == self.profile_generation:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def end_generation(self, nsgaii):
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.profile = pstats.Stats(self.profiler)
+            self.profiler = None
+        record = self.current
+        record["seconds"] = time.perf_counter() - self.start
+        if self.trace_memory:
+            record["peak_memory"] = tracemalloc.get_traced_memory()[1]
+
+        evaluations = nsgaii.evaluations - self.evaluations
+        self.count("evaluations", evaluations)
+        record["evaluations"] = evaluations
+        evaluating = record["phases"].get("evaluate", 0.0)
+        record["evaluations_per_second"] = (
+            evaluations / evaluating if evaluating > 0 else None
+        )
+        if self.hits is not None:
+            hits = nsgaii.cache.hits - self.hits
+            self.count("cache_hits", hits)
+            record["cache_hits"] = hits
+        record["front_sizes"] = [len(front) for front in nsgaii.front_rows]
+        self.generations.append(record)
+        self.current = None
+
+    def close(self):
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+
+    def summary(self):
+        # totals over the generations recorded, as a dictionary
+        seconds = sum(record["seconds"] for record in self.generations)
+        evaluating = self.totals.get("evaluate", 0.0)
+        evaluations = sum(record["evaluations"] for record in self.generations)
+        summary = {
+            "generations": len(self.generations),
+            "seconds": seconds,
+            "phases": dict(
+                (name, {"seconds": total, "calls": self.calls[name]})
+                for name, total in self.totals.items()
+            ),
+            "counters": dict(self.counters),
+            "evaluations_per_second": (
+                evaluations / evaluating if evaluating > 0 else None
+            ),
+            "mean_fronts": (
+                float(np.mean([len(r["front_sizes"]) for r in self.generations]))
+                if self.generations
+                else None
+            ),
+        }
+        if self.trace_memory and self.generations:
+            summary["peak_memory"] = max(r["peak_memory"] for r in self.generations)
+        return summary
+
+    def report(self, profile_lines=20):
+        # a summary for people to read, with the top of the profile if one was captured
+        summary = self.summary()
+        lines = [
+            "%d generations in %.3f s" % (summary["generations"], summary["seconds"])
+        ]
+        for name, phase in sorted(
+            summary["phases"].items(), key=lambda item: -item[1]["seconds"]
+        ):
+            lines.append(
+                "  %-16s %10.4f s %8d calls" % (name, phase["seconds"], phase["calls"])
+            )
+        for name, value in sorted(summary["counters"].items()):
+            lines.append("  %-16s %10d" % (name, value))
+        if summary["evaluations_per_second"] is not None:
+            lines.append(
+                "  evaluations per second %.1f" % summary["evaluations_per_second"]
+            )
+        if "peak_memory" in summary:
+            lines.append("  peak memory %d bytes" % summary["peak_memory"])
+        if self.profile is not None:
+            stream = io.StringIO()
+            self.profile.stream = stream
+            self.profile.sort_stats("cumulative").print_stats(profile_lines)
+            lines.append(stream.getvalue())
+        return "\n".join(lines)
@@ -0,0 +1,267 @@
+import multiprocessing
+import queue
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from evolutionary import NSGAII
+from evolutionary import sorting
+from evolutionary.chromosome import with_genes
+from evolutionary.context import Context
+
+TOPOLOGIES = ("ring", "full")
+
+
+def sources(island, num_islands, topology):
+    # the islands whose emigrants island receives
+    if topology == "ring":
+        return [(island - 1) % num_islands] if num_islands > 1 else []
+    return [source for source in range(num_islands) if source != island]
+
+
+def elites(objectives, count):
+    # the rows of the count best individuals in the crowded comparison order, which are those
+    # of the first front when it has at least count members
+    ranks, distances = sorting.ranks_and_crowding(objectives)
+    return np.lexsort((distances, ranks))[:count]
+
+
+class Migration(object):
+    # the shared memory through which islands exchange emigrants
+    #
+    # For each island there is room for the genes and objectives of migrants individuals. An
+    # island writes its emigrants into its own slot, and after a barrier every island reads the
+    # slots of its sources, so nothing is pickled; a second barrier keeps a fast island from
+    # overwriting its slot before everyone has read it.
+
+    def __init__(self, num_islands, migrants, num_genes, num_objectives, name=None):
+        self.shapes = (
+            (num_islands, migrants, num_genes),
+            (num_islands, migrants, num_objectives),
+        )
+        size = 8 * sum(int(np.prod(shape)) for shape in self.shapes)
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+        genes_shape, objectives_shape = self.shapes
+        self.genes = np.ndarray(genes_shape, dtype=np.float64, buffer=self.memory.buf)
+        self.objectives = np.ndarray(
+            objectives_shape,
+            dtype=np.float64,
+            buffer=self.memory.buf,
+            offset=8 * int(np.prod(genes_shape)),
+        )
+
+    @property
+    def name(self):
+        return self.memory.name
+
+    def close(self):
+        # drops the views before closing, as the buffer cannot close while they exist
+        self.genes = None
+        self.objectives = None
+        self.memory.close()
+
+
+def migrate(nsgaii, migration, island, islands, barrier):
+    # sends the elites of nsgaii to the other islands and lets those it receives compete with
+    # its parents for survival
+    store = nsgaii.store
+    parents = store.parents
+    count = migration.genes.shape[1]
+    rows = elites(store.objectives[parents], count)
+    migration.genes[island] = store.genes[rows]
+    migration.objectives[island] = store.objectives[rows]
+    barrier.wait()
+    genes = np.concatenate([migration.genes[source] for source in islands])
+    objectives = np.concatenate([migration.objectives[source] for source in islands])
+    barrier.wait()
+
+    store.clear_children()
+    rows = store.add(genes, nsgaii.generation)
+    store.set_objectives(rows, objectives)
+    nsgaii.new_population()
+
+
+def run_island(
+    island,
+    context,
+    make_population,
+    options,
+    name,
+    shape,
+    topology,
+    interval,
+    num_generations,
+    barrier,
+    results,
+):
+    # the body of an island process, which evolves and migrates, then puts its final parents
+    # on the results queue
+    migration = None
+    try:
+        num_islands, migrants, num_genes, num_objectives = shape
+        migration = Migration(num_islands, migrants, num_genes, num_objectives, name)
+        nsgaii = NSGAII.NSGAII(context, make_population(context), **options)
+        islands = sources(island, num_islands, topology)
+        done = 0
+        while done < num_generations:
+            step = min(interval, num_generations - done)
+            nsgaii.evolve(step)
+            done += step
+            if done < num_generations and islands:
+                migrate(nsgaii, migration, island, islands, barrier)
+        store = nsgaii.store
+        parents = store.parents
+        results.put(
+            (
+                island,
+                None,
+                store.genes[parents].copy(),
+                store.objectives[parents].copy(),
+                nsgaii.evaluations,
+            )
+        )
+    except BaseException as error:
+        barrier.abort()
+        results.put((island, error, None, None, None))
+    finally:
+        if migration is not None:
+            migration.close()
+
+
+def collect(results, processes):
+    # gets a result from every process, failing rather than waiting forever when one of them
+    # dies without reporting
+    received = []
+    while len(received) < len(processes):
+        try:
+            received.append(results.get(timeout=0.1))
+        except queue.Empty:
+            failed = [p.exitcode for p in processes if p.exitcode not in (None, 0)]
+            if failed or all(p.exitcode is not None for p in processes):
+                for process in processes:
+                    process.terminate()
+                raise RuntimeError(
+                    "island processes exited without reporting, with codes %s"
+                    % [p.exitcode for p in processes]
+                )
+    return received
+
+
+class Islands(object):
+    # several NSGAII populations evolving in their own processes, exchanging elites
+    #
+    # make_population is a picklable callable giving the initial chromosomes of an island from
+    # its Context, which is one of those spawned from context, so islands draw independent
+    # streams and a run is repeatable. options are passed on to each NSGAII. Every interval
+    # generations each island sends its migrants best individuals, taken from its first front,
+    # to its neighbours on a ring or to every other island, where they replace the worst.
+    # Migration is synchronous, so runs do not depend on process scheduling. num_objectives
+    # sizes the shared buffers, and defaults to the attribute of that name on the chromosomes.
+
+    def __init__(
+        self,
+        context,
+        make_population,
+        num_islands,
+        topology="ring",
+        interval=10,
+        migrants=2,
+        num_objectives=None,
+        options=None,
+        mp_context=None,
+    ):
+        if topology not in TOPOLOGIES:
+            raise ValueError(
+                "topology must be one of %s, got %r" % (", ".join(TOPOLOGIES), topology)
+            )
+        if interval < 1:
+            raise ValueError("interval must be at least 1, got %d" % interval)
+        self.context = context
+        self.make_population = make_population
+        self.num_islands = num_islands
+        self.topology = topology
+        self.interval = interval
+        self.migrants = migrants
+        self.options = {} if options is None else options
+        self.mp_context = (
+            multiprocessing.get_context() if mp_context is None else mp_context
+        )
+
+        # a population made with a throwaway context gives the shapes to share
+        probe = make_population(Context(0))
+        self.prototype = probe[0]
+        self.num_genes = len(probe[0].genes)
+        received = len(sources(0, num_islands, topology)) * migrants
+        if migrants > len(probe) or received > len(probe):
+            raise ValueError(
+                "islands of %d individuals cannot send %d migrants and receive %d"
+                % (len(probe), migrants, received)
+            )
+        # the width of the objectives is known without evaluating anything only when the
+        # chromosomes declare it, as the benchmark problems do
+        if num_objectives is None:
+            num_objectives = getattr(self.prototype, "num_objectives", None)
+        if num_objectives is None:
+            raise ValueError(
+                "num_objectives must be given for chromosomes without a num_objectives attribute"
+            )
+        self.num_objectives = num_objectives
+        self.genes = None
+        self.objectives = None
+        self.evaluations = None
+
+    def run(self, num_generations):
+        # evolves every island num_generations generations and gives all final parents as
+        # chromosomes, island by island
+        n = self.num_islands
+        migration = Migration(n, self.migrants, self.num_genes, self.num_objectives)
+        barrier = self.mp_context.Barrier(n)
+        results = self.mp_context.Queue()
+        shape = (n, self.migrants, self.num_genes, self.num_objectives)
+        processes = [
+            self.mp_context.Process(
+                target=run_island,
+                args=(
+                    island,
+                    context,
+                    self.make_population,
+                    self.options,
+                    migration.name,
+                    shape,
+                    self.topology,
+                    self.interval,
+                    num_generations,
+                    barrier,
+                    results,
+                ),
+            )
+            for island, context in enumerate(self.context.spawn(n))
+        ]
+        try:
+            for process in processes:
+                process.start()
+            received = collect(results, processes)
+            for process in processes:
+                process.join()
+        finally:
+            migration.close()
+            migration.memory.unlink()
+
+        received.sort(key=lambda result: result[0])
+        errors = [error for _, error, _, _, _ in received if error is not None]
+        if errors:
+            raise next(
+                (e for e in errors if not isinstance(e, threading.BrokenBarrierError)),
+                errors[0],
+            )
+        self.genes = np.stack([genes for _, _, genes, _, _ in received])
+        self.objectives = np.stack([objectives for _, _, _, objectives, _ in received])
+        self.evaluations = [evaluations for _, _, _, _, evaluations in received]
+        return self.chromosomes()
+
+    def chromosomes(self):
+        return with_genes(self.prototype, self.genes.reshape(-1, self.num_genes))
@@ -1,20 +1,126 @@
 import numpy as np
-from sklearn.neighbors import KNeighborsRegressor
+from sklearn.neighbors import NearestNeighbors
+
+from evolutionary import sorting
+from evolutionary.population import grow
 
 
 class MetaModel(object):
-    x = None
-    y = None
+    # k nearest neighbours regression on every point seen, updated incrementally
+    #
+    # Points are appended to arrays that double in size when full. The neighbour index m covers
+    # the first indexed points and is only rebuilt once the points added since exceed
+    # rebuild_fraction of those, so each point costs amortised O(log n) of rebuilding. Points
+    # not yet indexed are searched by brute force when predicting, and predictions are the
+    # uniform average of the n_neighbors nearest targets, as with KNeighborsRegressor.
+
+    def __init__(self, n_neighbors=5, rebuild_fraction=0.25):
+        self.n_neighbors = n_neighbors
+        self.rebuild_fraction = rebuild_fraction
+        self.m = None
+        self.size = 0
+        self.indexed = 0
+        self._x = None
+        self._y = None
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def x(self):
+        return None if self._x is None else self._x[: self.size]
+
+    @property
+    def y(self):
+        return None if self._y is None else self._y[: self.size]
 
     def fit(self, x, y):
-        self.m = KNeighborsRegressor()
-        if self.x is None:
-            self.x = x
-            self.y = y
-        else:
-            self.x = np.concatenate([self.x, x])
-            self.y = np.concatenate([self.y, y])
-        self.m.fit(self.x, self.y)
+        # adds the points x with targets y to those seen before
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        if self._x is None:
+            capacity = max(len(x), 1024)
+            self._x = np.empty((capacity,) + x.shape[1:])
+            self._y = np.empty((capacity,) + y.shape[1:])
+        size = self.size + len(x)
+        if size > len(self._x):
+            capacity = max(size, 2 * len(self._x))
+            self._x = grow(self._x, capacity)
+            self._y = grow(self._y, capacity)
+        self._x[self.size : size] = x
+        self._y[self.size : size] = y
+        self.size = size
+        if self.m is None or size - self.indexed > self.rebuild_fraction * self.indexed:
+            self.rebuild()
+
+    def restore(self, x, y, indexed=None):
+        # replaces the points seen by x with targets y, as saved in a checkpoint, the first
+        # indexed of them being in the neighbour index as they were when saved
+        indexed = len(x) if indexed is None else indexed
+        self.m = None
+        self.size = 0
+        self.indexed = 0
+        self._x = None
+        self._y = None
+        self.fit(x[:indexed], y[:indexed])
+        if indexed < len(x):
+            self.fit(x[indexed:], y[indexed:])
+
+    def rebuild(self):
+        self.m = NearestNeighbors().fit(self.x)
+        self.indexed = self.size
+
+    def kneighbors(self, x):
+        # gives the distances to and rows of the n_neighbors nearest points seen, nearest first
+        k = self.n_neighbors
+        if self.m is None or k > self.size:
+            raise ValueError(
+                "Expected n_neighbors <= n_samples_fit, but n_neighbors = %d, "
+                "n_samples_fit = %d" % (k, self.size)
+            )
+        x = np.asarray(x, dtype=np.float64)
+        distances, rows = self.m.kneighbors(x, min(k, self.indexed))
+        if self.indexed == self.size:
+            return distances, rows
+
+        tail = self._x[self.indexed : self.size]
+        step = sorting.chunk_rows(len(tail), x.shape[1])
+        nearest_distances = np.empty((len(x), k))
+        nearest_rows = np.empty((len(x), k), dtype=np.int64)
+        for start in range(0, len(x), step):
+            queries = x[start : start + step]
+            tail_distances = np.sqrt(
+                np.maximum(
+                    np.sum(queries**2, axis=1)[:, None]
+                    - 2 * queries @ tail.T
+                    + np.sum(tail**2, axis=1)[None, :],
+                    0.0,
+                )
+            )
+            candidates = np.concatenate(
+                [distances[start : start + step], tail_distances], axis=1
+            )
+            candidate_rows = np.concatenate(
+                [
+                    rows[start : start + step],
+                    np.broadcast_to(
+                        np.arange(self.indexed, self.size), tail_distances.shape
+                    ),
+                ],
+                axis=1,
+            )
+            order = np.argpartition(candidates, k - 1, axis=1)[:, :k]
+            nearest = np.take_along_axis(candidates, order, axis=1)
+            order = np.take_along_axis(order, np.argsort(nearest, axis=1), axis=1)
+            nearest_distances[start : start + step] = np.take_along_axis(
+                candidates, order, axis=1
+            )
+            nearest_rows[start : start + step] = np.take_along_axis(
+                candidate_rows, order, axis=1
+            )
+        return nearest_distances, nearest_rows
 
     def predict(self, x):
-        return self.m.predict(x)
+        # predicts the targets of all rows of x at once
+        _, rows = self.kneighbors(x)
+        return np.mean(self._y[rows], axis=1)
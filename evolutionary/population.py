@@ -0,0 +1,146 @@
+import numpy as np
+
+
+class Population(object):
+    # parents and children of one generation held in preallocated arrays
+    #
+    # Rows [0, num_parents) hold the parents and rows [num_parents, size) the children bred from
+    # them, in a buffer of twice the capacity, so a generation only writes into existing memory.
+    # Each individual is identified by an integer index, unique over the run, and the generation
+    # it was born in, which together form the (index, generation) keys of the dictionary API.
+
+    def __init__(self, capacity, num_genes, num_objectives=None):
+        self.capacity = capacity
+        self.genes = np.empty((2 * capacity, num_genes), dtype=np.float64)
+        self.index = np.empty(2 * capacity, dtype=np.int64)
+        self.generation = np.empty(2 * capacity, dtype=np.int64)
+        self.objectives = None
+        self.num_parents = 0
+        self.size = 0
+        self.next_index = 0
+        # survivors are gathered here before moving back to the front of the buffer
+        self._genes = np.empty((capacity, num_genes), dtype=np.float64)
+        self._keys = np.empty((2, capacity), dtype=np.int64)
+        self._objectives = None
+        if num_objectives is not None:
+            self.allocate_objectives(num_objectives)
+
+    @classmethod
+    def from_genes(cls, genes, generation=0):
+        genes = np.asarray(genes, dtype=np.float64)
+        if genes.ndim != 2:
+            genes = genes.reshape(len(genes), -1 if len(genes) else 0)
+        population = cls(len(genes), genes.shape[1])
+        population.add(genes, generation)
+        population.num_parents = len(genes)
+        return population
+
+    @classmethod
+    def from_chromosomes(cls, chromosomes, generation=0):
+        return cls.from_genes(
+            [chromosome.genes for chromosome in chromosomes], generation
+        )
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def num_genes(self):
+        return self.genes.shape[1]
+
+    @property
+    def num_objectives(self):
+        return None if self.objectives is None else self.objectives.shape[1]
+
+    @property
+    def parents(self):
+        return slice(0, self.num_parents)
+
+    @property
+    def children(self):
+        return slice(self.num_parents, self.size)
+
+    def allocate_objectives(self, num_objectives):
+        self.objectives = np.full((2 * self.capacity, num_objectives), np.nan)
+        self._objectives = np.empty((self.capacity, num_objectives), dtype=np.float64)
+
+    def set_objectives(self, rows, objectives):
+        objectives = np.asarray(objectives, dtype=np.float64)
+        if len(objectives) == 0:
+            # no rows, as when a generation breeds no children, nor a width to allocate
+            return
+        if self.objectives is None:
+            self.allocate_objectives(objectives.shape[-1])
+        self.objectives[rows] = objectives
+
+    def add(self, genes, generation, index=None):
+        # appends individuals born in generation, by default giving them fresh indices, and
+        # returns their rows
+        genes = np.asarray(genes, dtype=np.float64).reshape(len(genes), self.num_genes)
+        rows = self.extend(len(genes), generation)
+        self.genes[rows] = genes
+        if index is not None:
+            self.index[rows] = index
+            self.next_index -= len(genes)
+        return rows
+
+    def extend(self, count, generation):
+        # reserves rows for count individuals born in generation, whose genes the caller writes
+        start = self.size
+        stop = start + count
+        if stop > len(self.genes):
+            raise ValueError(
+                "population holds at most %d individuals, got %d"
+                % (len(self.genes), stop)
+            )
+        self.index[start:stop] = np.arange(self.next_index, self.next_index + count)
+        self.generation[start:stop] = generation
+        if self.objectives is not None:
+            self.objectives[start:stop] = np.nan
+        self.next_index += count
+        self.size = stop
+        return slice(start, stop)
+
+    def clear_children(self, keep=0):
+        # drops all but the first keep children
+        self.size = self.num_parents + keep
+
+    def replace(self, row, source):
+        # overwrites an individual with the one in the source row
+        self.genes[row] = self.genes[source]
+        self.index[row] = self.index[source]
+        self.generation[row] = self.generation[source]
+        if self.objectives is not None:
+            self.objectives[row] = self.objectives[source]
+
+    def survive(self, rows):
+        # keeps only the given rows, in the given order, as the parents of the next generation
+        n = len(rows)
+        if n > self.capacity:
+            raise ValueError(
+                "population holds at most %d parents, got %d" % (self.capacity, n)
+            )
+        np.take(self.genes, rows, axis=0, out=self._genes[:n])
+        np.take(self.index, rows, out=self._keys[0, :n])
+        np.take(self.generation, rows, out=self._keys[1, :n])
+        self.genes[:n] = self._genes[:n]
+        self.index[:n] = self._keys[0, :n]
+        self.generation[:n] = self._keys[1, :n]
+        if self.objectives is not None:
+            np.take(self.objectives, rows, axis=0, out=self._objectives[:n])
+            self.objectives[:n] = self._objectives[:n]
+        self.num_parents = n
+        self.size = n
+
+    def keys(self, rows=None):
+        # gives the (index, generation) keys of the rows, by default all rows in use
+        if rows is None:
+            rows = slice(0, self.size)
+        return list(zip(self.index[rows].tolist(), self.generation[rows].tolist()))
+
+
+def grow(array, capacity):
+    # a copy of array with room for capacity rows, the first ones holding array
+    grown = np.empty((capacity,) + array.shape[1:], dtype=array.dtype)
+    grown[: len(array)] = array
+    return grown
@@ -0,0 +1,174 @@
+import json
+import queue
+import threading
+
+import numpy as np
+
+
+class RecordLogger(object):
+    # appends one record per logged individual to a file, written by a background thread
+    #
+    # A record holds the generation logged, the key of the individual, as its index and the
+    # generation it was born in, its genes, its objectives and its rank in the last fronts. With
+    # format="ndjson" each record is a line of JSON, with format="npy" each logged generation is
+    # one structured .npy array appended to the file, which read_records gives back.
+    #
+    # NSGAII hands over arrays from its store, which are copied and queued; formatting and
+    # writing happen on the writer thread. At most maxsize generations wait in the queue, after
+    # which logging blocks until the writer catches up. Only every every-th generation is
+    # logged, and with front_only only the individuals of the first front, and a generation
+    # that is not logged costs a modulo.
+
+    formats = ("ndjson", "npy")
+
+    def __init__(self, filename, format="ndjson", every=1, front_only=False, maxsize=8):
+        if format not in self.formats:
+            raise ValueError(
+                "format must be one of %s, got %r" % (", ".join(self.formats), format)
+            )
+        if every < 1:
+            raise ValueError("every must be at least 1, got %d" % every)
+        self.filename = filename
+        self.format = format
+        self.every = every
+        self.front_only = front_only
+        self.queue = queue.Queue(maxsize)
+        self.error = None
+        self.file = open(filename, "a" if format == "ndjson" else "ab")
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def wants(self, generation):
+        return generation % self.every == 0
+
+    def record(self, generation, index, born, genes, objectives, ranks):
+        # queues the records of one generation, given as arrays with a row per individual
+        if self.error is not None:
+            raise self.error
+        if self.front_only:
+            rows = np.flatnonzero(ranks == 0)
+        else:
+            rows = slice(None)
+        self.queue.put(
+            (
+                generation,
+                np.array(index[rows]),
+                np.array(born[rows]),
+                np.array(genes[rows], dtype=np.float64),
+                np.array(objectives[rows], dtype=np.float64),
+                np.array(ranks[rows]),
+            )
+        )
+
+    def __call__(self, generation, population, objectives, fronts):
+        # the dictionary logging API, for callers that do not hand over arrays
+        if not self.wants(generation):
+            return
+        keys = list(population.keys())
+        ranks = dict((key, rank) for rank, front in enumerate(fronts) for key in front)
+        self.record(
+            generation,
+            np.array([index for index, _ in keys], dtype=np.int64),
+            np.array([born for _, born in keys], dtype=np.int64),
+            np.array([population[key].genes for key in keys]),
+            np.array([objectives[key] for key in keys]),
+            np.array([ranks.get(key, -1) for key in keys], dtype=np.int64),
+        )
+
+    def run(self):
+        while True:
+            batch = self.queue.get()
+            if batch is None:
+                break
+            if isinstance(batch, threading.Event):
+                self.file.flush()
+                batch.set()
+                continue
+            if self.error is not None:
+                continue
+            try:
+                self.write(*batch)
+            except Exception as error:
+                self.error = error
+
+    def write(self, generation, index, born, genes, objectives, ranks):
+        if self.format == "npy":
+            np.save(
+                self.file, to_records(generation, index, born, genes, objectives, ranks)
+            )
+            return
+        lines = [
+            json.dumps(
+                {
+                    "generation": generation,
+                    "key": [i, b],
+                    "genes": g,
+                    "objectives": o,
+                    "rank": k,
+                }
+            )
+            for i, b, g, o, k in zip(
+                index.tolist(),
+                born.tolist(),
+                genes.tolist(),
+                objectives.tolist(),
+                ranks.tolist(),
+            )
+        ]
+        if lines:
+            self.file.write("\n".join(lines) + "\n")
+
+    def flush(self):
+        # waits for the queued records to be written
+        if self.thread.is_alive():
+            done = threading.Event()
+            self.queue.put(done)
+            done.wait()
+        if self.error is not None:
+            raise self.error
+
+    def close(self):
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+        self.file.close()
+        if self.error is not None:
+            raise self.error
+
+
+def to_records(generation, index, born, genes, objectives, ranks):
+    records = np.empty(
+        len(index),
+        dtype=[
+            ("generation", np.int64),
+            ("index", np.int64),
+            ("born", np.int64),
+            ("genes", np.float64, genes.shape[1:]),
+            ("objectives", np.float64, objectives.shape[1:]),
+            ("rank", np.int64),
+        ],
+    )
+    records["generation"] = generation
+    records["index"] = index
+    records["born"] = born
+    records["genes"] = genes
+    records["objectives"] = objectives
+    records["rank"] = ranks
+    return records
+
+
+def read_records(filename):
+    # gives all records of a file written with format="npy" as one structured array
+    batches = []
+    with open(filename, "rb") as f:
+        while f.peek(1):
+            batches.append(np.load(f))
+    if not batches:
+        return np.empty(0)
+    return np.concatenate(batches)
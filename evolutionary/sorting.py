@@ -0,0 +1,344 @@
+import bisect
+
+import numpy as np
+
+# upper bound on the number of booleans held in a single (rows, columns, objectives) comparison block
+CHUNK_ELEMENTS = 2**22
+
+
+def chunk_rows(num_columns, num_objectives, chunk_elements=CHUNK_ELEMENTS):
+    # how many rows of the domination relation to build at once so that memory stays bounded
+    return max(1, chunk_elements // max(1, num_columns * num_objectives))
+
+
+def dominates(rows, columns):
+    # boolean matrix whose (i, j) entry says rows[i] dominates columns[j] when minimising
+    # looping over the objectives keeps every temporary two dimensional
+    no_worse = np.ones((len(rows), len(columns)), dtype=bool)
+    better = np.zeros((len(rows), len(columns)), dtype=bool)
+    for k in range(rows.shape[1]):
+        row = rows[:, k, np.newaxis]
+        column = columns[np.newaxis, :, k]
+        no_worse &= row <= column
+        better |= row < column
+    return no_worse & better
+
+
+def domination_counts(objectives, chunk_elements=CHUNK_ELEMENTS):
+    # number of points that dominate each point
+    n, m = objectives.shape
+    counts = np.zeros(n, dtype=np.int64)
+    step = chunk_rows(n, m, chunk_elements)
+    for start in range(0, n, step):
+        block = dominates(objectives[start : start + step], objectives)
+        counts += block.sum(axis=0)
+    return counts
+
+
+def nondominated_fronts(objectives, chunk_elements=CHUNK_ELEMENTS):
+    # peels the domination fronts of an (N, M) objective matrix, returning arrays of row indices
+    #
+    # Points of a front are ordered as fast_nondominated_sort discovers them: the first front in
+    # row order, every later front by the position of the last dominator in the previous front,
+    # ties broken by row order.
+
+    objectives = np.asarray(objectives, dtype=np.float64)
+    n, m = objectives.shape
+    if n == 0:
+        return []
+    counts = domination_counts(objectives, chunk_elements)
+    step = chunk_rows(n, m, chunk_elements)
+
+    front = np.flatnonzero(counts == 0)
+    remaining = np.flatnonzero(counts > 0)
+    fronts = []
+    while len(front) > 0:
+        fronts.append(front)
+        # only points not yet assigned to a front can be dominated by this one
+        remaining_objectives = objectives[remaining]
+        remaining_counts = counts[remaining]
+        last_dominator = np.full(len(remaining), -1, dtype=np.int64)
+        for start in range(0, len(front), step):
+            block = dominates(
+                objectives[front[start : start + step]], remaining_objectives
+            )
+            remaining_counts -= block.sum(axis=0)
+            # position in the front of the last row in this block dominating each column
+            last = start + len(block) - 1 - np.argmax(block[::-1], axis=0)
+            last_dominator = np.where(block.any(axis=0), last, last_dominator)
+        counts[remaining] = remaining_counts
+        freed = remaining_counts == 0
+        front = remaining[freed][np.argsort(last_dominator[freed], kind="stable")]
+        remaining = remaining[~freed]
+    return fronts
+
+
+def fronts_from_ranks(ranks):
+    # groups row indices by their 0 based rank, keeping row order inside each front
+    if len(ranks) == 0:
+        return []
+    order = np.argsort(ranks, kind="stable")
+    boundaries = np.flatnonzero(np.diff(ranks[order])) + 1
+    return np.split(order, boundaries)
+
+
+def _lexicographic_order(objectives):
+    # np.lexsort treats its last key as the primary one
+    return np.lexsort(objectives.T[::-1])
+
+
+def _duplicates_previous(sorted_objectives):
+    # marks the rows of a lexicographically sorted matrix equal to the row before them
+    duplicate = np.zeros(len(sorted_objectives), dtype=bool)
+    duplicate[1:] = np.all(sorted_objectives[1:] == sorted_objectives[:-1], axis=1)
+    return duplicate
+
+
+def nondominated_ranks_2d(objectives):
+    # 0 based front of every row of an (N, 2) objective matrix in O(N log N)
+    #
+    # After a lexicographic sort every dominator of a point precedes it, so a sweep only needs
+    # the smallest second objective seen so far in each front. Those minima increase with the
+    # front, and a binary search finds the first front not dominating the point.
+
+    objectives = np.asarray(objectives, dtype=np.float64)
+    order = _lexicographic_order(objectives)
+    duplicate = _duplicates_previous(objectives[order])
+    ranks = np.empty(len(objectives), dtype=np.int64)
+    front_minima = []
+    rank = 0
+    for i, second, same in zip(
+        order.tolist(), objectives[order, 1].tolist(), duplicate.tolist()
+    ):
+        # identical points never dominate each other and share a front
+        if not same:
+            rank = bisect.bisect_right(front_minima, second)
+            if rank == len(front_minima):
+                front_minima.append(second)
+            else:
+                front_minima[rank] = second
+        ranks[i] = rank
+    return ranks
+
+
+class _Staircase(object):
+    # the points of one front projected on the last two objectives, keeping only those
+    # nondominated in the projection: ascending in the first coordinate, descending in the second
+
+    def __init__(self):
+        self.first = []
+        self.second = []
+
+    def dominates(self, first, second):
+        i = bisect.bisect_right(self.first, first) - 1
+        return i >= 0 and self.second[i] <= second
+
+    def insert(self, first, second):
+        i = bisect.bisect_left(self.first, first)
+        j = i
+        while j < len(self.second) and self.second[j] >= second:
+            j += 1
+        self.first[i:j] = [first]
+        self.second[i:j] = [second]
+
+
+def nondominated_ranks_3d(objectives):
+    # 0 based front of every row of an (N, 3) objective matrix
+    #
+    # The same lexicographic sweep as in two dimensions, where each front keeps a staircase of
+    # the last two objectives. A binary search over the fronts finds the first one whose
+    # staircase does not dominate the point, for O(N log^2 N) comparisons.
+
+    objectives = np.asarray(objectives, dtype=np.float64)
+    order = _lexicographic_order(objectives)
+    duplicate = _duplicates_previous(objectives[order])
+    ranks = np.empty(len(objectives), dtype=np.int64)
+    staircases = []
+    rank = 0
+    for i, (second, third), same in zip(
+        order.tolist(), objectives[order, 1:].tolist(), duplicate.tolist()
+    ):
+        if not same:
+            low, high = 0, len(staircases)
+            while low < high:
+                middle = (low + high) // 2
+                if staircases[middle].dominates(second, third):
+                    low = middle + 1
+                else:
+                    high = middle
+            rank = low
+            if rank == len(staircases):
+                staircases.append(_Staircase())
+            staircases[rank].insert(second, third)
+        ranks[i] = rank
+    return ranks
+
+
+def nondominated_sort(objectives, chunk_elements=CHUNK_ELEMENTS):
+    # picks the fastest sorter for the number of objectives, returning fronts of row indices
+    #
+    # The sweeps for two and three objectives order every front by row, while the general
+    # engine keeps the discovery order of fast_nondominated_sort.
+
+    objectives = np.asarray(objectives, dtype=np.float64)
+    if objectives.ndim == 2 and objectives.shape[1] == 2:
+        return fronts_from_ranks(nondominated_ranks_2d(objectives))
+    if objectives.ndim == 2 and objectives.shape[1] == 3:
+        return fronts_from_ranks(nondominated_ranks_3d(objectives))
+    return nondominated_fronts(objectives, chunk_elements)
+
+
+def crowding_distances(objectives):
+    # crowding distance of every row of an (N, M) objective matrix, negated like
+    # NSGAII.crowding_distance so that an ascending order puts the least crowded points first
+
+    objectives = np.asarray(objectives, dtype=np.float64)
+    n, m = objectives.shape
+    distances = np.zeros(n)
+    if n == 0:
+        return distances
+    for k in range(m):
+        order = np.argsort(objectives[:, k], kind="stable")
+        first, last = order[0], order[-1]
+        if np.array_equal(objectives[first], objectives[last]):
+            distances[order[1:-1]] -= 1
+            continue
+        distances[first] -= np.inf
+        distances[last] -= np.inf
+        column = objectives[order, k]
+        span = column[-1] - column[0]
+        # an objective constant over the points separates none of them
+        if span > 0:
+            distances[order[1:-1]] -= (column[2:] - column[:-2]) / span
+    return distances
+
+
+def least_crowded(distances, count):
+    # indices, in order, of the count smallest crowding distances, found by partial sorting
+    if count >= len(distances):
+        return np.arange(len(distances))
+    if count <= 0:
+        return np.arange(0)
+    return np.sort(np.argpartition(distances, count - 1)[:count])
+
+
+def ranks_and_crowding(objectives):
+    # 0 based front of every row of an (N, M) objective matrix, and its crowding distance
+    # within that front
+    objectives = np.asarray(objectives, dtype=np.float64)
+    ranks = np.empty(len(objectives), dtype=np.int64)
+    distances = np.empty(len(objectives))
+    for rank, front in enumerate(nondominated_sort(objectives)):
+        ranks[front] = rank
+        distances[front] = crowding_distances(objectives[front])
+    return ranks, distances
+
+
+def crowded_tournament(ranks, distances, count, r):
+    # indices of the winners of count binary tournaments between uniformly drawn rows, preferring
+    # the lower rank and then the lower, that is less crowded, negated crowding distance
+    first, second = r.choice(len(ranks), size=(2, count))
+    return tournament_winners(ranks, distances, first, second)
+
+
+def tournament_winners(ranks, distances, first, second):
+    # the winners of binary crowded tournaments between the rows first and second
+    first_wins = (ranks[first] < ranks[second]) | (
+        (ranks[first] == ranks[second]) & (distances[first] <= distances[second])
+    )
+    return np.where(first_wins, first, second)
+
+
+class IncrementalFronts(object):
+    # domination fronts of rows of an objective matrix, updated one insertion or removal at a time
+    #
+    # A new point joins the first front without a dominator, found by binary search since a
+    # point dominated by a member of a front is dominated by a member of every earlier front.
+    # Only the members it dominates move down a front, and in turn only those they dominate,
+    # so an update compares the point with a few fronts instead of sorting everything again.
+    # Rows refer to the objective matrix, which the caller keeps filled in.
+
+    def __init__(self, objectives, rows):
+        self.objectives = objectives
+        self.ranks = np.full(len(objectives), -1, dtype=np.int64)
+        rows = np.asarray(rows, dtype=np.int64)
+        self.fronts = []
+        for front in nondominated_sort(objectives[rows]):
+            self.fronts.append(rows[front].tolist())
+            self.ranks[rows[front]] = len(self.fronts) - 1
+
+    def __len__(self):
+        return len(self.fronts)
+
+    def dominated(self, front, points):
+        # mask of the members of a front dominated by any of the points
+        if len(front) == 0 or len(points) == 0:
+            return np.zeros(len(front), dtype=bool)
+        return dominates(self.objectives[points], self.objectives[front]).any(axis=0)
+
+    def dominating(self, front, row):
+        # whether any member of a front dominates the row
+        if len(front) == 0:
+            return False
+        return bool(dominates(self.objectives[front], self.objectives[[row]]).any())
+
+    def insert(self, row):
+        # adds a row, returning its rank
+        low, high = 0, len(self.fronts)
+        while low < high:
+            middle = (low + high) // 2
+            if self.dominating(self.fronts[middle], row):
+                low = middle + 1
+            else:
+                high = middle
+        rank = low
+        moving = [row]
+        k = rank
+        while moving:
+            if k == len(self.fronts):
+                self.fronts.append([])
+            front = self.fronts[k]
+            mask = self.dominated(front, moving)
+            pushed = [member for member, down in zip(front, mask) if down]
+            self.fronts[k] = [member for member, down in zip(front, mask) if not down]
+            self.fronts[k].extend(moving)
+            self.ranks[moving] = k
+            moving = pushed
+            k += 1
+        return rank
+
+    def remove(self, row):
+        # takes a row out, moving up the members of later fronts it alone kept down
+        k = self.ranks[row]
+        self.fronts[k].remove(row)
+        self.ranks[row] = -1
+        leaving = [row]
+        while leaving and k + 1 < len(self.fronts):
+            below = self.fronts[k + 1]
+            candidates = [
+                member
+                for member, down in zip(below, self.dominated(below, leaving))
+                if down
+            ]
+            rising = [
+                member
+                for member in candidates
+                if not self.dominating(self.fronts[k], member)
+            ]
+            if rising:
+                risen = set(rising)
+                self.fronts[k + 1] = [member for member in below if member not in risen]
+                self.fronts[k].extend(rising)
+                self.ranks[rising] = k
+            leaving = rising
+            k += 1
+        while self.fronts and not self.fronts[-1]:
+            self.fronts.pop()
+
+    def relabel(self, old, new):
+        # records that the point of row old now lives in row new
+        k = self.ranks[old]
+        front = self.fronts[k]
+        front[front.index(old)] = new
+        self.ranks[new] = k
+        self.ranks[old] = -1
@@ -0,0 +1,79 @@
+import time
+
+import numpy as np
+
+from evolutionary.hypervolume import hypervolume
+
+
+class Stopping(object):
+    # decides after each generation whether evolve should stop, and records the hypervolume
+    # of the parents for monitoring
+    #
+    # With a reference point the hypervolume of every generation is appended to hypervolumes,
+    # and with patience evolution stops once it has not improved on its best by more than
+    # tolerance for patience generations in a row. max_seconds bounds the wall clock time of a
+    # call to evolve, and max_evaluations the objectives NSGAII assigns over the run, stopping
+    # before a generation that would exceed it. samples makes hypervolumes of more than two
+    # objectives Monte Carlo estimates, drawn from r rather than the random state of the run so
+    # that monitoring does not change the evolution.
+
+    def __init__(
+        self,
+        reference=None,
+        tolerance=0.0,
+        patience=None,
+        max_seconds=None,
+        max_evaluations=None,
+        samples=None,
+        r=None,
+    ):
+        if patience is not None and reference is None:
+            raise ValueError("patience needs a reference point for the hypervolume")
+        self.reference = reference
+        self.tolerance = tolerance
+        self.patience = patience
+        self.max_seconds = max_seconds
+        self.max_evaluations = max_evaluations
+        self.samples = samples
+        self.r = np.random.RandomState(1) if r is None else r
+        self.hypervolumes = []
+        self.best = None
+        self.stale = 0
+        self.started = None
+        self.reason = None
+
+    def start(self):
+        self.started = time.perf_counter()
+        self.reason = None
+
+    def update(self, nsgaii):
+        # records the generation just evolved by nsgaii and gives whether to stop
+        store = nsgaii.store
+        if self.reference is not None:
+            value = hypervolume(
+                store.objectives[store.parents],
+                self.reference,
+                self.samples,
+                self.r,
+            )
+            self.hypervolumes.append(value)
+            if self.best is None or value > self.best + self.tolerance:
+                self.best = value
+                self.stale = 0
+            else:
+                self.stale += 1
+                self.best = max(self.best, value)
+
+        if self.patience is not None and self.stale >= self.patience:
+            self.reason = "converged"
+        elif (
+            self.max_seconds is not None
+            and time.perf_counter() - self.started >= self.max_seconds
+        ):
+            self.reason = "time"
+        elif (
+            self.max_evaluations is not None
+            and nsgaii.evaluations + store.num_parents > self.max_evaluations
+        ):
+            self.reason = "evaluations"
+        return self.reason is not None
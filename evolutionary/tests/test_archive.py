@@ -0,0 +1,123 @@
+import pytest
+import numpy as np
+
+from evolutionary import NSGAII
+from evolutionary import sorting
+from evolutionary.archive import ParetoArchive
+from evolutionary.context import Context
+from evolutionary.tests.test_nsga2 import ChromosomeTestImplementation
+
+
+@pytest.fixture
+def r():
+    return np.random.RandomState(3)
+
+
+def nondominated(points):
+    # the distinct points of the first front, as a sorted list of tuples
+    return sorted(
+        set(map(tuple, points[sorting.nondominated_sort(points)[0]].tolist()))
+    )
+
+
+@pytest.mark.parametrize("num_objectives", [2, 3, 4])
+@pytest.mark.parametrize("max_leaf", [2, 20])
+def test_update_matches_brute_force(r, num_objectives, max_leaf):
+    archive = ParetoArchive(max_leaf=max_leaf)
+    seen = np.empty((0, num_objectives))
+    for batch in range(30):
+        # points drifting towards the origin keep dominating earlier ones
+        points = r.randint(0, 12, size=(40, num_objectives)) * (1 - batch / 40)
+        archive.update(points, genes=points[:, :1])
+        seen = np.concatenate([seen, points])
+        objectives, genes, keys = archive.arrays()
+        assert len(archive) == len(objectives)
+        assert nondominated(seen) == sorted(map(tuple, objectives.tolist()))
+        np.testing.assert_array_equal(objectives[:, :1], genes)
+
+
+def test_update_counts():
+    archive = ParetoArchive()
+    assert 2 == archive.update([[1.0, 2.0], [2.0, 1.0], [2.0, 2.0], [1.0, 2.0]])
+    assert 0 == archive.update([[1.0, 2.0], [3.0, 3.0]])
+    # a point dominating both replaces them
+    assert 1 == archive.update([[0.0, 0.0]], index=[7], generation=[2])
+    objectives, genes, keys = archive.arrays()
+    assert [[0.0, 0.0]] == objectives.tolist()
+    assert [[7], [2]] == keys.tolist()
+    assert (1, 0) == genes.shape
+
+
+def test_growth_and_compaction(r):
+    archive = ParetoArchive(max_leaf=8)
+    # points on a line are mutually nondominated, so the archive keeps all of them
+    x = r.permutation(5000).astype(float)
+    archive.update(np.stack([x, -x], axis=1))
+    assert 5000 == len(archive)
+    # then a dominating front replaces them, which frees their rows
+    archive.update(np.stack([x[:100] - 1e4, -x[:100] - 1e4], axis=1))
+    assert 100 == len(archive)
+    objectives, _, _ = archive.arrays()
+    assert 100 == len(objectives)
+    assert archive.size <= 2 * 1024 + 100
+
+
+def test_restore(r):
+    archive = ParetoArchive(max_leaf=4)
+    archive.update(r.rand(200, 3), r.rand(200, 5), np.arange(200), np.zeros(200))
+    restored = ParetoArchive(max_leaf=4)
+    restored.update(r.rand(10, 3), r.rand(10, 5))
+    restored.restore(*archive.arrays())
+    for saved, loaded in zip(archive.arrays(), restored.arrays()):
+        np.testing.assert_array_equal(saved, loaded)
+    # later points meet the restored ones as they would the originals
+    points, genes = r.rand(50, 3), r.rand(50, 5)
+    assert archive.update(points, genes) == restored.update(points, genes)
+    np.testing.assert_array_equal(archive.arrays()[0], restored.arrays()[0])
+
+
+def test_best(r):
+    archive = ParetoArchive(max_leaf=4)
+    assert archive.best(0) is None
+    x = np.linspace(0.0, 1.0, 101)
+    points = np.stack([x, 1.0 - x, (x - 0.5) ** 2], axis=1)
+    archive.update(points, genes=x[:, None])
+
+    objectives, genes = archive.best(0)
+    assert 0.0 == objectives[0]
+    objectives, genes = archive.best(0, upper=[None, 0.25, None])
+    assert pytest.approx(0.75) == genes[0]
+    objectives, genes = archive.best(2, upper=[0.3, np.inf, np.inf])
+    assert pytest.approx(0.3) == genes[0]
+    assert archive.best(0, upper=[None, -1.0, None]) is None
+
+    # agrees with a scan of the exported arrays
+    objectives, genes, _ = archive.arrays()
+    for k in range(3):
+        upper = r.rand(3)
+        feasible = np.all(objectives <= upper, axis=1)
+        best = archive.best(k, upper=upper)
+        if not np.any(feasible):
+            assert best is None
+        else:
+            assert np.min(objectives[feasible, k]) == best[0][k]
+
+
+def test_nsgaii_archive():
+    context = Context(42)
+    pop = [ChromosomeTestImplementation(context) for i in range(10)]
+    archive = ParetoArchive()
+    nsgaii = NSGAII.NSGAII(context, pop, archive=archive)
+    nsgaii.evolve(10)
+
+    objectives, genes, keys = archive.arrays()
+    assert len(archive) > 0
+    # every archived point is nondominated by the final population, and archived genes give
+    # back their objectives
+    final = nsgaii.store.objectives[nsgaii.store.parents]
+    assert not np.any(sorting.dominates(final, objectives))
+    for point, g in zip(objectives.tolist(), genes.tolist()):
+        chromosome = pop[0].copy()
+        chromosome.genes = g
+        assert point == chromosome.getObjectives()
+    assert np.all(keys[1] <= 10)
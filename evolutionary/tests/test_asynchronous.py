@@ -0,0 +1,117 @@
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+import numpy as np
+
+from evolutionary import NSGAII
+from evolutionary import sorting
+from evolutionary.cache import ObjectiveCache
+from evolutionary.context import Context
+from evolutionary.tests.test_nsga2 import ChromosomeTestImplementation
+
+
+class SleepingChromosome(ChromosomeTestImplementation):
+    # evaluation times vary tenfold with the first decision gene
+    def copy(self):
+        return SleepingChromosome(self.context, self.genes)
+
+    def delay(self):
+        return 0.002 + 0.018 * self.genes[1]
+
+    def getObjectives(self):
+        time.sleep(self.delay())
+        return ChromosomeTestImplementation.getObjectives(self)
+
+
+@pytest.fixture
+def context():
+    return Context(42)
+
+
+def assert_consistent(nsgaii):
+    store = nsgaii.store
+    objectives = store.objectives[store.parents]
+    expected = [
+        sorted(front.tolist()) for front in sorting.nondominated_sort(objectives)
+    ]
+    assert expected == [sorted(front.tolist()) for front in nsgaii.front_rows]
+    for chromosome, row in zip(nsgaii.population.values(), objectives.tolist()):
+        assert ChromosomeTestImplementation.getObjectives(chromosome) == row
+    assert len(set(store.index[store.parents])) == store.num_parents
+
+
+def test_process_pool(context):
+    pop = [SleepingChromosome(context) for i in range(8)]
+    nsgaii = NSGAII.NSGAII(context, pop)
+    with ProcessPoolExecutor(4) as executor:
+        pop = nsgaii.evolve_asynchronous(executor, 40, in_flight=4)
+    assert 8 == len(pop)
+    assert_consistent(nsgaii)
+    # children have replaced part of the initial population
+    assert np.any(nsgaii.store.generation[nsgaii.store.parents] > 0)
+
+
+def test_no_barrier(context):
+    pop = [SleepingChromosome(context) for i in range(8)]
+    nsgaii = NSGAII.NSGAII(context, pop)
+    nsgaii.evaluate_parents()
+    lock = threading.Lock()
+    running = {}
+    starts = []
+    overtaken = []
+    original = SleepingChromosome.getObjectives
+
+    def getObjectives(self):
+        # notes, as each evaluation starts, whether one started four or more starts earlier is
+        # still running, which a barrier between batches of four would never allow
+        with lock:
+            start = len(starts)
+            starts.append(len(running))
+            overtaken.append(any(other <= start - 4 for other in running.values()))
+            running[id(self)] = start
+        try:
+            return original(self)
+        finally:
+            with lock:
+                del running[id(self)]
+
+    SleepingChromosome.getObjectives = getObjectives
+    try:
+        with ThreadPoolExecutor(4) as executor:
+            nsgaii.evolve_asynchronous(executor, 40, in_flight=4)
+    finally:
+        SleepingChromosome.getObjectives = original
+    assert 40 == len(starts)
+    # at most in_flight evaluations run at once, and fast ones overtake slow ones
+    assert max(starts) <= 3
+    assert any(overtaken)
+    assert_consistent(nsgaii)
+
+
+def test_cache_and_log_out(context):
+    generations = []
+
+    def log_out(generation, population, objectives, fronts):
+        generations.append(generation)
+
+    pop = [ChromosomeTestImplementation(context) for i in range(10)]
+    cache = ObjectiveCache()
+    nsgaii = NSGAII.NSGAII(context, pop, cache=cache)
+    with ThreadPoolExecutor(2) as executor:
+        nsgaii.evolve_asynchronous(executor, 30, log_out=log_out)
+    assert [0, 1, 2] == generations
+    assert 40 == cache.hits + cache.misses
+    assert_consistent(nsgaii)
+
+
+def test_generations(context):
+    pop = [ChromosomeTestImplementation(context) for i in range(10)]
+    nsgaii = NSGAII.NSGAII(context, pop)
+    with ThreadPoolExecutor(2) as executor:
+        nsgaii.evolve_asynchronous(executor, 30)
+        assert 3 == nsgaii.generation
+        nsgaii.evolve_asynchronous(executor, 20)
+    assert 5 == nsgaii.generation
+    assert nsgaii.store.generation[nsgaii.store.parents].max() <= 5
@@ -0,0 +1,125 @@
+import json
+import pickle
+
+import pytest
+import numpy as np
+
+from evolutionary import NSGAII
+from evolutionary import benchmarks
+from evolutionary.benchmarks import harness
+from evolutionary.context import Context
+
+
+@pytest.fixture
+def context():
+    return Context(3)
+
+
+@pytest.mark.parametrize("name", sorted(benchmarks.PROBLEMS))
+def test_problems(context, name):
+    chromosome = benchmarks.PROBLEMS[name](context)
+    assert 1 + chromosome.num_variables == len(chromosome.genes)
+    objectives = chromosome.getObjectives()
+    assert chromosome.num_objectives == len(objectives)
+    assert all(np.isfinite(objectives))
+
+    # the batched objectives agree with those of single chromosomes
+    copies = [chromosome.copy() for i in range(4)]
+    for copy in copies[1:]:
+        copy.mutate()
+    x = np.array([copy.genes[1:] for copy in copies])
+    np.testing.assert_allclose(
+        [copy.getObjectives() for copy in copies], chromosome.objectives(x)
+    )
+    np.testing.assert_allclose(
+        chromosome.objectives(x),
+        chromosome.batch_objectives(np.array([copy.genes for copy in copies])),
+    )
+    assert objectives == pickle.loads(pickle.dumps(chromosome)).getObjectives()
+
+
+@pytest.mark.parametrize("name", ["ZDT1", "ZDT2", "ZDT3", "ZDT4", "ZDT6"])
+def test_zdt_front(context, name):
+    # with every variable after the first at its optimum, g is 1
+    chromosome = benchmarks.PROBLEMS[name](context)
+    x = np.zeros((11, chromosome.num_variables))
+    x[:, 0] = np.linspace(0.0, 1.0, 11)
+    if name == "ZDT4":
+        x[:, 1:] = 0.5
+    f = chromosome.objectives(x)
+    f1 = chromosome.f1(x)
+    np.testing.assert_allclose(f[:, 1], chromosome.h(f1, np.ones(11)))
+
+
+def test_zdt5(context):
+    chromosome = benchmarks.ZDT5(context)
+    x = np.zeros((1, 80))
+    assert [[1.0, 20.0]] == chromosome.objectives(x).tolist()
+    x[:, 30:] = 1.0
+    x[:, :30] = 1.0
+    assert [[31.0, 10.0 / 31.0]] == chromosome.objectives(x).tolist()
+
+
+@pytest.mark.parametrize("name", ["DTLZ2", "DTLZ3", "DTLZ4", "DTLZ5"])
+@pytest.mark.parametrize("num_objectives", [2, 3, 5])
+def test_dtlz_sphere(context, name, num_objectives):
+    # on the front the objectives lie on the unit sphere
+    chromosome = benchmarks.PROBLEMS[name](context, num_objectives=num_objectives)
+    x = np.random.RandomState(0).rand(20, chromosome.num_variables)
+    x[:, num_objectives - 1 :] = 0.5
+    f = chromosome.objectives(x)
+    assert (20, num_objectives) == f.shape
+    np.testing.assert_allclose(1.0, np.sum(f**2, axis=1))
+
+
+def test_dtlz1_plane(context):
+    chromosome = benchmarks.DTLZ1(context, num_objectives=4)
+    x = np.random.RandomState(0).rand(20, chromosome.num_variables)
+    x[:, 3:] = 0.5
+    np.testing.assert_allclose(0.5, np.sum(chromosome.objectives(x), axis=1))
+
+
+def test_dtlz_copy(context):
+    chromosome = benchmarks.DTLZ7(context, num_objectives=5, k=3)
+    copy = chromosome.copy()
+    assert (5, 3, 7) == (copy.num_objectives, copy.k, copy.num_variables)
+    assert chromosome.genes == copy.genes
+
+
+def test_evolve(context):
+    pop = [benchmarks.DTLZ2(context) for i in range(10)]
+    assert 10 == len(NSGAII.NSGAII(context, pop).evolve(3))
+
+
+def test_run():
+    report = harness.run(sizes=[20, 10], num_objectives=[2, 3], repeat=1, generations=1)
+    json.dumps(report)
+    results = report["results"]
+    assert 2 * 2 * 7 == len(results)
+    assert [10, 20] == sorted(set(r["size"] for r in results))
+    assert all(r["seconds"] >= 0 for r in results)
+
+
+def test_skips_slow_operations():
+    report = harness.run(
+        sizes=[10, 20],
+        num_objectives=[2],
+        names=["evolve"],
+        repeat=1,
+        generations=1,
+        max_seconds=0.0,
+    )
+    first, second = report["results"]
+    assert first["seconds"] > 0
+    assert second["skipped"]
+
+
+def test_main(tmp_path):
+    argv = ["--sizes", "10", "--objectives", "2", "--repeat", "1"]
+    baseline = str(tmp_path / "baseline.json")
+    harness.main(argv + ["--output", baseline])
+    output = str(tmp_path / "report.json")
+    harness.main(argv + ["--output", output, "--baseline", baseline])
+    with open(output) as f:
+        report = json.load(f)
+    assert all("ratio" in r for r in report["results"])
@@ -0,0 +1,169 @@
+import asyncio
+import os
+
+import pytest
+import numpy as np
+
+from evolutionary import NSGAII
+from evolutionary.cache import ObjectiveCache
+from evolutionary.context import Context
+from evolutionary.metamodel import MetaModel
+from evolutionary.tests.test_nsga2 import ChromosomeTestImplementation
+
+
+class CountingChromosome(ChromosomeTestImplementation):
+    evaluations = 0
+
+    def copy(self):
+        return CountingChromosome(self.context, self.genes)
+
+    def getObjectives(self):
+        CountingChromosome.evaluations += 1
+        return ChromosomeTestImplementation.getObjectives(self)
+
+
+@pytest.fixture
+def context():
+    return Context(42)
+
+
+@pytest.fixture
+def chrome(context):
+    return ChromosomeTestImplementation(context, [0.1, 0.2, 0.3])
+
+
+def evaluate(chromosomes):
+    return [chromosome.getObjectives() for chromosome in chromosomes]
+
+
+def test_key(context, chrome):
+    cache = ObjectiveCache()
+    same = ChromosomeTestImplementation(context, [0.1, 0.2, 0.3])
+    other = ChromosomeTestImplementation(context, [0.1, 0.2, 0.30001])
+    assert cache.key(chrome) == cache.key(same)
+    assert cache.key(chrome) != cache.key(other)
+    assert cache.key(chrome) != cache.key(CountingChromosome(context, chrome.genes))
+
+    quantized = ObjectiveCache(quantum=0.001)
+    assert quantized.key(chrome) == quantized.key(other)
+
+
+def test_lru(context):
+    cache = ObjectiveCache(maxsize=2)
+    cache.put("a", [1.0])
+    cache.put("b", [2.0])
+    assert [1.0] == cache.get("a")
+    cache.put("c", [3.0])
+    assert 2 == len(cache)
+    assert cache.get("b") is None
+    assert [1.0] == cache.get("a")
+    assert [3.0] == cache.get("c")
+
+
+def test_evaluate(context, chrome):
+    cache = ObjectiveCache()
+    same = ChromosomeTestImplementation(context, list(chrome.genes))
+    other = ChromosomeTestImplementation(context, [0.5, 0.5, 0.5])
+    calls = []
+
+    def counting(chromosomes):
+        calls.append(len(chromosomes))
+        return evaluate(chromosomes)
+
+    expected = evaluate([chrome, same, other])
+    assert expected == cache.evaluate([chrome, same, other], counting)
+    assert expected == cache.evaluate([chrome, same, other], counting)
+    # the duplicate in the first batch and the whole second batch came from the cache
+    assert [2] == calls
+    assert 4 == cache.hits
+    assert 2 == cache.misses
+
+
+def test_spill(tmp_path, chrome):
+    filename = os.path.join(str(tmp_path), "objectives")
+    with ObjectiveCache(maxsize=0, filename=filename) as cache:
+        cache.evaluate([chrome], evaluate)
+        assert 0 == len(cache)
+
+    def fail(chromosomes):
+        raise AssertionError("should have been cached")
+
+    with ObjectiveCache(filename=filename) as cache:
+        assert evaluate([chrome]) == cache.evaluate([chrome], fail)
+        assert 1 == cache.hits
+
+
+class TimingOut(object):
+    # an evaluator giving penalty objectives to the first chromosome of every call, as though
+    # its deadline had passed, and counting the chromosomes it really evaluates
+    def __init__(self):
+        self.timed_out = []
+        self.evaluated = 0
+
+    def __call__(self, chromosomes):
+        objectives = evaluate(chromosomes)
+        objectives[0] = [np.inf, np.inf]
+        self.timed_out = [0]
+        self.evaluated += len(chromosomes) - 1
+        return objectives
+
+
+def test_timed_out(context, chrome):
+    cache = ObjectiveCache()
+    same = ChromosomeTestImplementation(context, list(chrome.genes))
+    other = ChromosomeTestImplementation(context, [0.5, 0.5, 0.5])
+    objectives = cache.evaluate([chrome, same, other], TimingOut())
+    assert [[np.inf, np.inf]] * 2 == objectives[:2]
+    # the duplicate shares the penalty, and neither is stored
+    assert [0, 1] == cache.timed_out
+    assert 1 == len(cache)
+    assert evaluate([chrome]) == cache.evaluate([chrome], evaluate)
+    assert [] == cache.timed_out
+
+
+def test_nsgaii_timed_out(context):
+    # penalty objectives are not counted as evaluations, learnt by the surrogate or cached
+    def run(cache):
+        context.reset()
+        pop = [ChromosomeTestImplementation(context) for i in range(10)]
+        nsgaii = NSGAII.NSGAII(
+            context, pop, cache=cache, surrogate=MetaModel(), evaluator=TimingOut()
+        )
+        nsgaii.evolve(3)
+        assert len(nsgaii.surrogate) == nsgaii.evaluations
+        assert np.all(np.isfinite(nsgaii.surrogate.y))
+        return nsgaii
+
+    nsgaii = run(None)
+    assert 0 < nsgaii.evaluate.evaluated == nsgaii.evaluations
+    cache = ObjectiveCache()
+    run(cache)
+    assert all(np.all(np.isfinite(value)) for value in cache.entries.values())
+
+
+def test_nsgaii_cache(context):
+    def run(cache):
+        context.reset()
+        CountingChromosome.evaluations = 0
+        pop = [CountingChromosome(context) for i in range(10)]
+        nsgaii = NSGAII.NSGAII(context, pop, cache=cache)
+        genes = [p.genes for p in nsgaii.evolve(20)]
+        return genes, CountingChromosome.evaluations
+
+    expected, uncached = run(None)
+    cache = ObjectiveCache()
+    actual, cached = run(cache)
+    assert expected == actual
+    assert cached == cache.misses
+    assert uncached == cache.misses + cache.hits
+    assert cached < uncached
+
+
+def test_nsgaii_cache_async(context):
+    pop = [ChromosomeTestImplementation(context) for i in range(10)]
+    expected = [p.genes for p in NSGAII.NSGAII(context, pop).evolve(5)]
+    context.reset()
+    pop = [ChromosomeTestImplementation(context) for i in range(10)]
+    nsgaii = NSGAII.NSGAII(context, pop, cache=ObjectiveCache())
+    actual = asyncio.run(nsgaii.evolve_async(5))
+    assert expected == [p.genes for p in actual]
@@ -0,0 +1,133 @@
+import json
+import os
+
+import pytest
+import numpy as np
+
+from evolutionary import NSGAII
+from evolutionary.archive import ParetoArchive
+from evolutionary.context import Context
+from evolutionary.metamodel import MetaModel
+from evolutionary.tests.test_nsga2 import ChromosomeTestImplementation
+
+
+def make(seed, legacy, tournament):
+    context = Context(seed, legacy=legacy)
+    pop = [ChromosomeTestImplementation(context) for i in range(10)]
+    return NSGAII.NSGAII(context, pop, tournament=tournament)
+
+
+@pytest.mark.parametrize("legacy", [True, False])
+@pytest.mark.parametrize("tournament", [False, True])
+def test_resume(tmp_path, legacy, tournament):
+    path = str(tmp_path / "run.npz")
+    expected = make(42, legacy, tournament).evolve(20)
+
+    interrupted = make(42, legacy, tournament)
+    interrupted.evolve(8)
+    interrupted.save_checkpoint(path)
+
+    # the resumed run starts from a different seed and population, which the checkpoint replaces
+    resumed = make(7, legacy, tournament)
+    resumed.load_checkpoint(path)
+    assert 8 == resumed.generation
+    assert interrupted.population.keys() == resumed.population.keys()
+    actual = resumed.evolve(12)
+    assert 20 == resumed.generation
+    assert [p.genes for p in expected] == [p.genes for p in actual]
+
+
+def test_resume_surrogate(tmp_path):
+    # the surrogate resumes with the points it had learnt from, so screening goes on as before
+    def make_screened(seed):
+        context = Context(seed)
+        pop = [ChromosomeTestImplementation(context) for i in range(10)]
+        return NSGAII.NSGAII(context, pop, surrogate=MetaModel(n_neighbors=3))
+
+    path = str(tmp_path / "run.npz")
+    expected = make_screened(42).evolve(6)
+    interrupted = make_screened(42)
+    interrupted.evolve(3)
+    interrupted.save_checkpoint(path)
+    resumed = make_screened(7)
+    resumed.load_checkpoint(path)
+    np.testing.assert_array_equal(interrupted.surrogate.x, resumed.surrogate.x)
+    assert interrupted.surrogate.indexed == resumed.surrogate.indexed
+    actual = resumed.evolve(3)
+    assert [p.genes for p in expected] == [p.genes for p in actual]
+
+
+def test_resume_archive(tmp_path):
+    def make_archived(seed):
+        context = Context(seed)
+        pop = [ChromosomeTestImplementation(context) for i in range(10)]
+        return NSGAII.NSGAII(context, pop, archive=ParetoArchive(max_leaf=4))
+
+    path = str(tmp_path / "run.npz")
+    expected = make_archived(42)
+    expected.evolve(6)
+    interrupted = make_archived(42)
+    interrupted.evolve(3)
+    interrupted.save_checkpoint(path)
+    resumed = make_archived(7)
+    resumed.evolve(1)
+    resumed.load_checkpoint(path)
+    assert len(interrupted.archive) > 0
+    for saved, restored in zip(interrupted.archive.arrays(), resumed.archive.arrays()):
+        np.testing.assert_array_equal(saved, restored)
+    resumed.evolve(3)
+    for a, b in zip(expected.archive.arrays(), resumed.archive.arrays()):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_resume_generations(tmp_path):
+    path = str(tmp_path / "run.npz")
+    generations = []
+
+    def log_out(generation, population, objectives, fronts):
+        generations.append(generation)
+
+    nsgaii = make(42, True, False)
+    nsgaii.evolve(3, log_out=log_out)
+    nsgaii.save_checkpoint(path)
+    resumed = make(42, True, False)
+    resumed.load_checkpoint(path)
+    resumed.evolve(2, log_out=log_out)
+    assert [0, 1, 2, 3, 4] == generations
+    # children born after the resume get indices not used before it
+    indices = [index for index, _ in resumed.population]
+    assert len(indices) == len(set(indices))
+    assert max(indices) < resumed.store.next_index
+
+
+def test_unevaluated_checkpoint(tmp_path):
+    path = str(tmp_path / "run.npz")
+    nsgaii = make(42, True, False)
+    nsgaii.save_checkpoint(path)
+    resumed = make(7, True, False)
+    resumed.load_checkpoint(path)
+    assert resumed.store.objectives is None
+    assert [p.genes for p in make(42, True, False).evolve(3)] == [
+        p.genes for p in resumed.evolve(3)
+    ]
+
+
+def test_evolve_checkpoints(tmp_path):
+    path = str(tmp_path / "run.npz")
+    saved = []
+    nsgaii = make(42, True, False)
+    save_checkpoint = nsgaii.save_checkpoint
+
+    def record(path):
+        saved.append(nsgaii.generation)
+        save_checkpoint(path)
+
+    nsgaii.save_checkpoint = record
+    nsgaii.evolve(7, checkpoint_path=path, checkpoint_every=3)
+    assert [3, 6, 7] == saved
+    assert not os.path.exists(path + ".tmp")
+
+    with np.load(path) as data:
+        assert 7 == json.loads(str(data["state"]))["generation"]
+        assert (10, 3) == data["genes"].shape
+        assert (10, 2) == data["objectives"].shape
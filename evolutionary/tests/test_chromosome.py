@@ -67,7 +67,7 @@ def test_len(chrome, zeros):
 def test_mutate(chrome):
     chrome.mutate()
     expected = np.array(
-        [0.2, 0.4, 0.5, 0.5, 0.15599452033620265, 0.8661761457749352, 0.3]
+        [0.2, 0.4, 0.5, 0.5, 0.8661761457749352, 0.6011150117432088, 0.7080725777960455]
     )
     np.testing.assert_allclose(expected, chrome.genes)
 
@@ -167,20 +167,87 @@ def test_softmax():
     np.testing.assert_allclose(expected, actual)
 
 
+def test_softmax_large_logits():
+    with np.errstate(over="raise"):
+        actual = chromosome.softmax([1000.0, 1000.0, 1000.0 - np.log(2)])
+    np.testing.assert_allclose([0.4, 0.4, 0.2], actual)
+
+    # rows of a matrix are normalised separately
+    actual = chromosome.softmax([[0.0, 0.0], [0.0, np.log(3)]])
+    np.testing.assert_allclose([[0.5, 0.5], [0.25, 0.75]], actual)
+
+
 def test_chromosome_select(chrome):
     objects = list("abc")
-    expected = ["b", "c"]
+    expected = ["a", "b"]
     actual = chrome.select(objects)
     assert expected == actual
 
-    expected = ["c", "b"]
-    actual = chrome.select(objects)
-    assert expected == actual
+    # the decoded phenotype is cached, drawing no more random numbers
+    state = chrome.r.get_state()[2]
+    assert expected == chrome.select(objects)
+    assert state == chrome.r.get_state()[2]
 
-    expected = ["a", "a"]
-    actual = chrome.select(objects)
-    assert expected == actual
+    # a different number of options is decoded separately
+    assert 3 == len(chrome.select(list("ab")))
 
-    expected = ["a", "c"]
-    actual = chrome.select(objects)
-    assert expected == actual
+    chrome.mutate()
+    assert {} == chrome.phenotype_cache
+    child0, child1 = chrome.crossover(chrome)
+    assert {} == child0.phenotype_cache
+
+
+def test_select_indices(context):
+    # each run of three genes after the mutation rate holds the logits of one choice
+    logits = np.array([1000.0, 1000.0 + np.log(2), 1000.0 + np.log(5)])
+    genes = np.concatenate([[0.1], logits, logits - 1000.0, [0.5]])
+    indices = chromosome.select_indices(np.tile(genes, (4000, 1)), 3, context.r)
+    assert (4000, 2) == indices.shape
+    frequencies = np.bincount(indices.ravel(), minlength=3) / indices.size
+    np.testing.assert_allclose([0.125, 0.25, 0.625], frequencies, atol=0.02)
+
+
+def test_mutate_genes(context):
+    # rows mutate at their own rate, given by their first gene
+    genes = np.zeros((4, 100))
+    genes[1, 0] = 1
+    genes[3, 0] = 0.5
+    genes[3, 1:] = 2
+    actual = chromosome.mutate_genes(genes.copy(), context.r)
+    np.testing.assert_array_equal(genes[[0, 2]], actual[[0, 2]])
+    assert np.all(actual[1] != genes[1])
+    assert np.all((0 <= actual[1]) & (actual[1] < 1))
+    assert 20 < np.count_nonzero(actual[3, 1:] != 2) < 80
+
+    rates = np.array([1.0, 0.0, 0.0, 0.0])
+    actual = chromosome.mutate_genes(genes.copy(), context.r, rates)
+    assert np.all(actual[0] != genes[0])
+    np.testing.assert_array_equal(genes[1:], actual[1:])
+
+
+def test_crossover_genes(context):
+    genes0 = np.zeros((3, 32))
+    genes1 = np.ones((3, 32))
+    child0, child1 = chromosome.crossover_genes(genes0, genes1, context.r)
+    np.testing.assert_array_equal(np.ones((3, 32)), child0 + child1)
+    assert 0 < child0.sum() < 3 * 32
+
+    # a single row draws the same numbers as the per object crossover
+    zeros = Chromosome(context, [0] * 32)
+    ones = Chromosome(context, [1] * 32)
+    context.reset()
+    expected = [child.genes for child in zeros.crossover(ones)]
+    context.reset()
+    actual = chromosome.crossover_genes(genes0[:1], genes1[:1], context.r)
+    assert expected == [child[0].tolist() for child in actual]
+
+
+def test_with_genes(chrome):
+    chrome.select(["a", "b"])
+    genes = np.array([[0.1] * 7, [0.2] * 7])
+    chromosomes = chromosome.with_genes(chrome, genes)
+    assert [[0.1] * 7, [0.2] * 7] == [c.genes for c in chromosomes]
+    assert all(type(c.genes[0]) is float for c in chromosomes)
+    # the copies do not keep the choices decoded from the genes of the prototype
+    assert [{}, {}] == [c.phenotype_cache for c in chromosomes]
+    assert chrome.phenotype_cache
@@ -1,4 +1,8 @@
+import json
 import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
 import numpy as np
 from evolutionary.context import Context
 
@@ -31,3 +35,80 @@ def test_update_seed():
     ctx.seed = seed
     assert ctx.seed == seed
     assert ctx.r.get_state()[1][0] == seed
+
+
+def test_generator():
+    ctx = Context(7, legacy=False)
+    assert not ctx.legacy
+    assert ctx.seed == 7
+    assert isinstance(ctx.r, np.random.Generator)
+    expected = np.random.default_rng(7).random(5)
+    np.testing.assert_array_equal(expected, ctx.r.random(5))
+
+    ctx.reset()
+    np.testing.assert_array_equal(expected, ctx.r.random(5))
+
+
+def test_update_random_state_generator():
+    ctx = Context()
+    ctx.random_state = np.random.default_rng(11)
+    assert not ctx.legacy
+    expected = ctx.r.random(3)
+    ctx.reset()
+    np.testing.assert_array_equal(expected, ctx.r.random(3))
+
+
+def test_legacy_random_matches_rand():
+    # the library draws with random, which both backends have, instead of rand
+    expected = np.random.RandomState(3).rand(4)
+    np.testing.assert_array_equal(expected, Context(3).r.random(4))
+
+
+@pytest.mark.parametrize("legacy", [True, False])
+def test_spawn(legacy):
+    ctx = Context(5, legacy=legacy)
+    children = ctx.spawn(3)
+    assert 3 == len(children)
+    assert all(child.legacy == legacy for child in children)
+    draws = [list(child.r.random(4)) for child in children]
+    assert len(set(map(tuple, draws))) == 3
+
+    # later spawns give new streams, reset starts again from the first ones
+    more = ctx.spawn(1)[0]
+    assert list(more.r.random(4)) not in draws
+    ctx.reset()
+    assert draws == [list(child.r.random(4)) for child in ctx.spawn(3)]
+
+    # spawning does not touch the parent stream
+    np.testing.assert_array_equal(
+        Context(5, legacy=legacy).r.random(2), Context(5, legacy=legacy).r.random(2)
+    )
+
+    # children can be reset and spawn grandchildren of their own
+    child = children[0]
+    child.reset()
+    assert draws[0] == list(child.r.random(4))
+    grandchildren = child.spawn(2)
+    assert list(grandchildren[0].r.random(4)) != list(grandchildren[1].r.random(4))
+
+
+def test_spawn_parallel_repeatable():
+    def draw(ctx):
+        return list(ctx.r.random(1000))
+
+    expected = [draw(child) for child in Context(9, legacy=False).spawn(4)]
+    with ThreadPoolExecutor(4) as executor:
+        actual = list(executor.map(draw, Context(9, legacy=False).spawn(4)))
+    assert expected == actual
+
+
+@pytest.mark.parametrize("legacy", [True, False])
+def test_get_state(legacy):
+    ctx = Context(3, legacy=legacy)
+    ctx.r.random(5)
+    state = json.loads(json.dumps(ctx.get_state()))
+    expected = list(ctx.r.random(10))
+
+    other = Context(11, legacy=legacy)
+    other.set_state(state)
+    assert expected == list(other.r.random(10))
@@ -0,0 +1,228 @@
+import multiprocessing
+import os
+import threading
+import time
+from multiprocessing.connection import AuthenticationError, Client
+
+import pytest
+import numpy as np
+
+from evolutionary import NSGAII
+from evolutionary import evaluation
+from evolutionary import sorting
+from evolutionary.benchmarks import DTLZ2
+from evolutionary.context import Context
+from evolutionary.distributed import (
+    Coordinator,
+    class_path,
+    load_class,
+    main,
+    specification,
+)
+from evolutionary.tests.test_nsga2 import ChromosomeTestImplementation
+
+
+class Misbehaving(ChromosomeTestImplementation):
+    # a chromosome which, evaluated in the process with the given pid, exits, hangs or sleeps
+    def __init__(self, context, genes=None, pid=None, behaviour=None):
+        ChromosomeTestImplementation.__init__(self, context, genes)
+        self.pid = pid
+        self.behaviour = behaviour
+
+    def copy(self):
+        return Misbehaving(self.context, self.genes, self.pid, self.behaviour)
+
+    def getObjectives(self):
+        if os.getpid() == self.pid:
+            if self.behaviour == "exit":
+                os._exit(1)
+            elif self.behaviour == "hang":
+                time.sleep(30)
+            elif self.behaviour == "slow":
+                time.sleep(0.6)
+            elif self.behaviour == "raise":
+                raise ValueError("cannot evaluate")
+        return ChromosomeTestImplementation.getObjectives(self)
+
+
+def population(context, n, *args):
+    return [Misbehaving(context, None, *args) for i in range(n)]
+
+
+def test_class_path():
+    chromosome = DTLZ2(Context(1), num_objectives=4)
+    path, attributes = specification(chromosome)
+    assert "evolutionary.benchmarks.problems:DTLZ2" == path
+    assert DTLZ2 is load_class(path)
+    assert 4 == attributes["num_objectives"]
+    assert "genes" not in attributes and "context" not in attributes
+    assert class_path(Misbehaving).endswith("test_distributed:Misbehaving")
+
+
+def test_evaluate():
+    chromosomes = population(Context(1), 50)
+    with Coordinator(batch_size=8) as coordinator:
+        coordinator.spawn_workers(2)
+        assert coordinator.wait_for_workers(2, timeout=10)
+        assert evaluation.evaluate(chromosomes) == coordinator(chromosomes)
+        assert [] == coordinator([])
+        assert 0 == coordinator.reassigned
+
+
+def test_nsgaii():
+    def run(evaluator):
+        context = Context(3)
+        nsgaii = NSGAII.NSGAII(context, population(context, 20), evaluator=evaluator)
+        nsgaii.evolve(3)
+        return nsgaii
+
+    with Coordinator(batch_size=6) as coordinator:
+        coordinator.spawn_workers(2)
+        distributed = run(coordinator)
+    local = run(None)
+    assert np.array_equal(local.store.genes, distributed.store.genes)
+    assert np.array_equal(local.store.objectives, distributed.store.objectives)
+    assert local.evaluations == distributed.evaluations
+
+
+def test_lost_worker():
+    # the tasks of a worker whose connection breaks go to another worker
+    with Coordinator(batch_size=4) as coordinator:
+        (crashing,) = coordinator.spawn_workers(1)
+        assert coordinator.wait_for_workers(1, timeout=10)
+        threading.Timer(0.1, coordinator.spawn_workers, (1,)).start()
+        chromosomes = population(Context(1), 20, crashing.pid, "exit")
+        assert evaluation.evaluate(chromosomes) == coordinator(chromosomes)
+        assert coordinator.reassigned > 0
+        crashing.join(timeout=10)
+        assert 1 == crashing.exitcode
+
+
+def test_silent_worker():
+    # a worker sending no heartbeat is dropped after the timeout, though its process lives
+    with Coordinator(batch_size=4, timeout=0.5) as coordinator:
+        (hanging,) = coordinator.spawn_workers(1, heartbeat=None)
+        assert coordinator.wait_for_workers(1, timeout=10)
+        threading.Timer(0.1, coordinator.spawn_workers, (1, 0.05)).start()
+        chromosomes = population(Context(1), 8, hanging.pid, "hang")
+        start = time.monotonic()
+        assert evaluation.evaluate(chromosomes) == coordinator(chromosomes)
+        assert time.monotonic() - start < 10
+        assert coordinator.reassigned > 0
+        assert hanging.is_alive()
+
+
+def test_heartbeat():
+    # heartbeats keep a worker busy for longer than the timeout from being dropped
+    with Coordinator(batch_size=1, timeout=0.3) as coordinator:
+        (slow,) = coordinator.spawn_workers(1, heartbeat=0.05)
+        chromosomes = population(Context(1), 2, slow.pid, "slow")
+        assert evaluation.evaluate(chromosomes) == coordinator(chromosomes)
+        assert 0 == coordinator.reassigned
+
+
+def test_worker_error():
+    with Coordinator() as coordinator:
+        (worker,) = coordinator.spawn_workers(1)
+        with pytest.raises(RuntimeError, match="cannot evaluate"):
+            coordinator(population(Context(1), 3, worker.pid, "raise"))
+        # the worker carries on with later evaluations
+        chromosomes = population(Context(1), 3)
+        assert evaluation.evaluate(chromosomes) == coordinator(chromosomes)
+
+
+def test_errors():
+    with pytest.raises(ValueError):
+        Coordinator(batch_size=0)
+
+
+def test_authkey(monkeypatch):
+    with Coordinator() as coordinator, Coordinator() as other:
+        # each coordinator has its own random key, and peers without it are refused
+        assert 32 == len(coordinator.authkey)
+        assert coordinator.authkey != other.authkey
+        with pytest.raises(AuthenticationError):
+            Client(coordinator.address, authkey=other.authkey)
+
+    monkeypatch.delenv("EVOLUTIONARY_AUTHKEY", raising=False)
+    with pytest.raises(SystemExit):
+        main(["localhost:1"])
+
+    # a worker started from the command line with the key of the coordinator evaluates
+    monkeypatch.setenv("EVOLUTIONARY_AUTHKEY", "secret")
+    with Coordinator(authkey=b"secret") as coordinator:
+        host, port = coordinator.address
+        worker = multiprocessing.Process(
+            target=main, args=(["%s:%d" % (host, port)],), daemon=True
+        )
+        worker.start()
+        coordinator.processes.append(worker)
+        chromosomes = population(Context(1), 4)
+        assert evaluation.evaluate(chromosomes) == coordinator(chromosomes)
+
+
+def test_speculation():
+    # an idle worker launches a copy of a task stuck on another, and its result is used
+    with Coordinator(
+        batch_size=4, prefetch=1, timeout=1.0, speculate_after=0.2
+    ) as coordinator:
+        (hanging,) = coordinator.spawn_workers(1, heartbeat=0.05)
+        assert coordinator.wait_for_workers(1, timeout=10)
+        threading.Timer(0.1, coordinator.spawn_workers, (1, 0.05)).start()
+        chromosomes = population(Context(1), 8, hanging.pid, "hang")
+        start = time.monotonic()
+        assert evaluation.evaluate(chromosomes) == coordinator(chromosomes)
+        assert time.monotonic() - start < 10
+        statistics = coordinator.statistics()
+        assert 1 == statistics["duplicates"]
+        assert 0 == statistics["timeouts"]
+        assert 0 == statistics["reassigned"]
+
+
+def test_deadline():
+    # a chromosome still unevaluated after the deadline gets the penalty objectives, which
+    # every other individual dominates, as wide as the objectives of the others though its
+    # deadline passes before any of them arrive
+    with Coordinator(
+        batch_size=1, prefetch=1, timeout=1.0, deadline=0.3
+    ) as coordinator:
+        (hanging,) = coordinator.spawn_workers(1, heartbeat=0.05)
+        assert coordinator.wait_for_workers(1, timeout=10)
+        threading.Timer(0.5, coordinator.spawn_workers, (1,)).start()
+        chromosomes = population(Context(1), 4, hanging.pid, "hang")
+        objectives = coordinator(chromosomes)
+        expected = evaluation.evaluate(chromosomes)
+        assert [[np.inf, np.inf]] == objectives[:1]
+        assert expected[1:] == objectives[1:]
+        assert [0] == list(sorting.nondominated_sort(np.array(objectives))[-1])
+        assert 1 == coordinator.statistics()["timeouts"]
+        assert [0] == coordinator.timed_out
+
+
+def test_deadline_prefetched():
+    # a task waiting behind another on its worker is timed from when the worker starts it, so
+    # evaluations each within the deadline all finish
+    with Coordinator(batch_size=1, prefetch=2, deadline=1.0) as coordinator:
+        (slow,) = coordinator.spawn_workers(1, heartbeat=0.05)
+        chromosomes = population(Context(1), 3, slow.pid, "slow")
+        assert evaluation.evaluate(chromosomes) == coordinator(chromosomes)
+        assert 0 == coordinator.statistics()["timeouts"]
+
+
+def test_deadline_penalty():
+    with Coordinator(timeout=1.0, deadline=0.1) as coordinator:
+        (hanging,) = coordinator.spawn_workers(1, heartbeat=0.05)
+        with pytest.raises(RuntimeError, match="penalty must be given"):
+            coordinator(population(Context(1), 1, hanging.pid, "hang"))
+    with Coordinator(timeout=1.0, deadline=0.1, penalty=[5.0, 6.0]) as coordinator:
+        (hanging,) = coordinator.spawn_workers(1, heartbeat=0.05)
+        chromosomes = population(Context(1), 2, hanging.pid, "hang")
+        assert [[5.0, 6.0]] * 2 == coordinator(chromosomes)
+        assert 2 == coordinator.statistics()["timeouts"]
+        assert [0, 1] == coordinator.timed_out
+    # the width of the penalty can come from the chromosomes
+    with Coordinator(timeout=1.0, deadline=0.1) as coordinator:
+        (hanging,) = coordinator.spawn_workers(1, heartbeat=0.05)
+        chromosomes = population(Context(1), 1, hanging.pid, "hang")
+        chromosomes[0].num_objectives = 2
+        assert [[np.inf, np.inf]] == coordinator(chromosomes)
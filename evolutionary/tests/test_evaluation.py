@@ -0,0 +1,279 @@
+import asyncio
+import threading
+import time
+
+import pytest
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from evolutionary import NSGAII
+from evolutionary import evaluation
+from evolutionary.context import Context
+from evolutionary.tests.test_nsga2 import ChromosomeTestImplementation
+
+
+@pytest.fixture
+def context():
+    return Context(42)
+
+
+@pytest.fixture
+def population(context):
+    return [ChromosomeTestImplementation(context) for i in range(10)]
+
+
+def evolved_genes(context, executor=None, chunksize=1):
+    context.reset()
+    pop = [ChromosomeTestImplementation(context) for i in range(10)]
+    nsgaii = NSGAII.NSGAII(context, pop, executor=executor, chunksize=chunksize)
+    return [p.genes for p in nsgaii.evolve(10)]
+
+
+def test_chunks():
+    assert [[0, 1, 2], [3, 4, 5], [6]] == evaluation.chunks(list(range(7)), 3)
+    assert [] == evaluation.chunks([], 3)
+
+
+def test_evaluate(population):
+    expected = [p.getObjectives() for p in population]
+    assert expected == evaluation.evaluate(population)
+
+
+@pytest.mark.parametrize("chunksize", [1, 3, 20])
+def test_executor_evaluator(population, chunksize):
+    expected = evaluation.evaluate(population)
+    with ThreadPoolExecutor(4) as executor:
+        evaluate = evaluation.ExecutorEvaluator(executor, chunksize)
+        assert expected == evaluate(population)
+
+
+def test_executor_evaluator_chunksize():
+    with pytest.raises(ValueError):
+        evaluation.ExecutorEvaluator(None, 0)
+
+
+def test_thread_pool(context):
+    expected = evolved_genes(context)
+    with ThreadPoolExecutor(4) as executor:
+        assert expected == evolved_genes(context, executor, chunksize=2)
+
+
+def test_process_pool(context):
+    expected = evolved_genes(context)
+    with ProcessPoolExecutor(2) as executor:
+        assert expected == evolved_genes(context, executor, chunksize=3)
+
+
+class JobRunner(object):
+    # local stand-in for an external job runner: answers each request with the test objectives
+    # after a delay, and records how many requests were in flight at once
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = 0
+
+    async def handle(self, reader, writer):
+        x, y = map(float, (await reader.readline()).split())
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        writer.write(b"%r %r\n" % ((x - y - 10) ** 2, (x - y - 20) ** 2))
+        await writer.drain()
+        writer.close()
+
+
+class RemoteChromosome(ChromosomeTestImplementation):
+    port = None
+
+    def copy(self):
+        return RemoteChromosome(self.context, self.genes)
+
+    async def getObjectives(self):
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        writer.write(b"%r %r\n" % (self.x(), self.y()))
+        await writer.drain()
+        objectives = [float(value) for value in (await reader.readline()).split()]
+        writer.close()
+        await writer.wait_closed()
+        return objectives
+
+
+def evolve_remote(context, runner, num_generations, concurrency=None):
+    async def run():
+        server = await asyncio.start_server(runner.handle, "127.0.0.1", 0)
+        RemoteChromosome.port = server.sockets[0].getsockname()[1]
+        async with server:
+            pop = [RemoteChromosome(context) for i in range(10)]
+            nsgaii = NSGAII.NSGAII(context, pop)
+            return await nsgaii.evolve_async(num_generations, concurrency=concurrency)
+
+    return list(asyncio.run(run()))
+
+
+def test_evaluate_async(population):
+    expected = evaluation.evaluate(population)
+    assert expected == asyncio.run(evaluation.evaluate_async(population))
+    assert expected == asyncio.run(evaluation.evaluate_async(population, 2))
+    with pytest.raises(ValueError):
+        asyncio.run(evaluation.evaluate_async(population, 0))
+
+
+def test_evolve_async_matches_evolve(context):
+    expected = evolved_genes(context)
+    context.reset()
+    pop = [ChromosomeTestImplementation(context) for i in range(10)]
+    nsgaii = NSGAII.NSGAII(context, pop)
+    assert expected == [p.genes for p in asyncio.run(nsgaii.evolve_async(10))]
+
+
+def test_evolve_async_remote(context):
+    expected = evolved_genes(context)
+    context.reset()
+    runner = JobRunner(0.05)
+    pop = evolve_remote(context, runner, 10)
+    assert expected == [p.genes for p in pop]
+
+    # every evaluation takes 50ms, but those of a generation are awaited together
+    assert 10 == runner.max_in_flight
+
+
+def test_evolve_async_concurrency(context):
+    runner = JobRunner(0.01)
+    evolve_remote(context, runner, 2, concurrency=3)
+    assert 3 == runner.max_in_flight
+
+
+class BatchChromosome(ChromosomeTestImplementation):
+    # the test objectives computed for a whole gene matrix at once
+    calls = 0
+
+    def copy(self):
+        return BatchChromosome(self.context, self.genes)
+
+    def getObjectives(self):
+        BatchChromosome.calls += 1
+        return ChromosomeTestImplementation.getObjectives(self)
+
+    def batch_objectives(self, genes):
+        d = 30.0 * (genes[:, 1] - genes[:, 2])
+        return np.stack([(d - 10) ** 2, (d - 20) ** 2], axis=1)
+
+
+def test_batch_evaluate(context):
+    population = [BatchChromosome(context) for i in range(10)]
+    expected = evaluation.evaluate(population)
+    BatchChromosome.calls = 0
+    assert np.allclose(expected, evaluation.batch_evaluate(population))
+    assert 0 == BatchChromosome.calls
+    assert [] == evaluation.batch_evaluate([])
+    # without batch_objectives each chromosome is evaluated on its own
+    plain = [ChromosomeTestImplementation(context) for i in range(3)]
+    assert evaluation.evaluate(plain) == evaluation.batch_evaluate(plain)
+
+
+def test_evolve_batch(context):
+    def evolve(cls):
+        context.reset()
+        nsgaii = NSGAII.NSGAII(context, [cls(context) for i in range(10)])
+        nsgaii.evolve(5)
+        return nsgaii
+
+    plain = evolve(ChromosomeTestImplementation)
+    BatchChromosome.calls = 0
+    batch = evolve(BatchChromosome)
+    assert 0 == BatchChromosome.calls
+    assert np.allclose(plain.store.objectives, batch.store.objectives)
+    assert np.array_equal(plain.store.genes, batch.store.genes)
+
+
+class HangingChromosome(ChromosomeTestImplementation):
+    # a chromosome whose evaluation, when hang is set, waits until the test releases it, at
+    # most on its first evaluation when once is set as well
+    release = threading.Event()
+    evaluated = set()
+
+    def __init__(self, context, genes=None, hang=False, once=False):
+        ChromosomeTestImplementation.__init__(self, context, genes)
+        self.hang = hang
+        self.once = once
+
+    def getObjectives(self):
+        key = tuple(self.genes)
+        if self.hang and not (self.once and key in HangingChromosome.evaluated):
+            HangingChromosome.evaluated.add(key)
+            HangingChromosome.release.wait(10)
+        return ChromosomeTestImplementation.getObjectives(self)
+
+
+@pytest.fixture
+def hanging(context):
+    def make(n, **kwargs):
+        return [HangingChromosome(context, None, i == 0, **kwargs) for i in range(n)]
+
+    HangingChromosome.release.clear()
+    HangingChromosome.evaluated.clear()
+    yield make
+    HangingChromosome.release.set()
+
+
+class SlowChromosome(ChromosomeTestImplementation):
+    # a chromosome taking 0.6s to evaluate, picklable for a process pool
+    def copy(self):
+        return SlowChromosome(self.context, self.genes)
+
+    def getObjectives(self):
+        time.sleep(0.6)
+        return ChromosomeTestImplementation.getObjectives(self)
+
+
+def test_executor_deadline_queued(context):
+    # chunks waiting behind others for a worker are not timed, so evaluations each within
+    # the deadline all finish even though the last ones end long after being submitted
+    chromosomes = [SlowChromosome(context) for i in range(6)]
+    expected = [ChromosomeTestImplementation.getObjectives(c) for c in chromosomes]
+    with ProcessPoolExecutor(2) as executor:
+        evaluate = evaluation.ExecutorEvaluator(executor, deadline=1.0)
+        assert expected == evaluate(chromosomes)
+    assert {"tasks": 6, "duplicates": 0, "timeouts": 0} == evaluate.statistics()
+
+
+def test_executor_deadline(hanging):
+    chromosomes = hanging(4)
+    with ThreadPoolExecutor(4) as executor:
+        evaluate = evaluation.ExecutorEvaluator(executor, deadline=0.2)
+        objectives = evaluate(chromosomes)
+        HangingChromosome.release.set()
+    assert [[np.inf, np.inf]] == objectives[:1]
+    assert evaluation.evaluate(chromosomes[1:]) == objectives[1:]
+    assert {"tasks": 4, "duplicates": 0, "timeouts": 1} == evaluate.statistics()
+    assert [0] == evaluate.timed_out
+
+
+def test_executor_speculation(hanging):
+    chromosomes = hanging(4, once=True)
+    with ThreadPoolExecutor(2) as executor:
+        evaluate = evaluation.ExecutorEvaluator(executor, 2, speculate_after=0.1)
+        objectives = evaluate(chromosomes)
+        HangingChromosome.release.set()
+    assert evaluation.evaluate(chromosomes) == objectives
+    assert {"tasks": 2, "duplicates": 1, "timeouts": 0} == evaluate.statistics()
+
+
+def test_executor_penalty(hanging):
+    # each hanging evaluation keeps its thread until released, so each needs another
+    with ThreadPoolExecutor(3) as executor:
+        evaluate = evaluation.ExecutorEvaluator(executor, deadline=0.1)
+        with pytest.raises(RuntimeError, match="penalty must be given"):
+            evaluate(hanging(1))
+        evaluate = evaluation.ExecutorEvaluator(executor, deadline=0.1, penalty=[5, 6])
+        assert [[5.0, 6.0]] == evaluate(hanging(1))
+        # the width of a single penalty value can come from the chromosomes
+        chromosomes = hanging(1)
+        chromosomes[0].num_objectives = 2
+        evaluate = evaluation.ExecutorEvaluator(executor, deadline=0.1)
+        assert [[np.inf, np.inf]] == evaluate(chromosomes)
+        HangingChromosome.release.set()
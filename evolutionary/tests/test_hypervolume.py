@@ -0,0 +1,50 @@
+import itertools
+
+import pytest
+import numpy as np
+
+from evolutionary import hypervolume
+
+
+@pytest.fixture
+def r():
+    return np.random.RandomState(11)
+
+
+def inclusion_exclusion(points, reference):
+    total = 0.0
+    for size in range(1, len(points) + 1):
+        for subset in itertools.combinations(points, size):
+            corner = np.max(subset, axis=0)
+            total += (-1) ** (size + 1) * np.prod(np.maximum(reference - corner, 0.0))
+    return total
+
+
+def test_hypervolume_2d():
+    points = [[1.0, 3.0], [2.0, 2.0], [3.0, 1.0], [2.5, 2.5]]
+    assert 6.0 == hypervolume.hypervolume(points, [4.0, 4.0])
+    # points beyond the reference add nothing
+    assert 6.0 == hypervolume.hypervolume(points + [[5.0, 0.0]], [4.0, 4.0])
+    assert 0.0 == hypervolume.hypervolume(np.zeros((0, 2)), [1.0, 1.0])
+    assert 0.5 == hypervolume.hypervolume([[0.5]], [1.0])
+
+
+@pytest.mark.parametrize("num_objectives", [2, 3, 4])
+def test_exact_matches_inclusion_exclusion(r, num_objectives):
+    for trial in range(5):
+        points = r.rand(7, num_objectives)
+        # duplicates and ties must not be counted twice
+        points[1] = points[0]
+        points[2, 0] = points[3, 0]
+        reference = np.full(num_objectives, 0.9)
+        expected = inclusion_exclusion(points, reference)
+        assert pytest.approx(expected) == hypervolume.hypervolume(points, reference)
+
+
+def test_monte_carlo(r):
+    points = r.rand(30, 3)
+    points /= np.linalg.norm(points, axis=1, keepdims=True)
+    reference = np.full(3, 1.1)
+    exact = hypervolume.hypervolume(points, reference)
+    estimate = hypervolume.hypervolume(points, reference, samples=100000, r=r)
+    assert pytest.approx(exact, rel=0.02) == estimate
@@ -0,0 +1,72 @@
+import tracemalloc
+
+from evolutionary import NSGAII
+from evolutionary.cache import ObjectiveCache
+from evolutionary.context import Context
+from evolutionary.instrumentation import NULL_INSTRUMENT, Instrument
+from evolutionary.tests.test_nsga2 import ChromosomeTestImplementation
+
+
+def make(instrument=None, cache=None):
+    context = Context(42)
+    pop = [ChromosomeTestImplementation(context) for i in range(10)]
+    return NSGAII.NSGAII(context, pop, cache=cache, instrument=instrument)
+
+
+def test_default_is_null():
+    assert NULL_INSTRUMENT is make().instrument
+
+
+def test_does_not_change_the_run():
+    genes = [p.genes for p in make(Instrument()).evolve(5)]
+    assert genes == [p.genes for p in make().evolve(5)]
+
+
+def test_phases_and_counters():
+    instrument = Instrument()
+    with ObjectiveCache() as cache:
+        nsgaii = make(instrument, cache)
+        nsgaii.evolve(4)
+        hits = cache.hits
+
+    assert [0, 1, 2, 3] == [record["generation"] for record in instrument.generations]
+    for record in instrument.generations:
+        assert 10 == record["evaluations"]
+        phases = {"make_children", "evaluate", "select", "sort", "log"}
+        assert phases <= set(record["phases"]) <= phases | {"crowding"}
+        assert record["phases"]["sort"] <= record["phases"]["select"]
+        assert record["seconds"] >= record["phases"]["evaluate"]
+        assert 20 == sum(record["front_sizes"])
+
+    summary = instrument.summary()
+    assert 4 == summary["generations"]
+    assert 4 == summary["phases"]["make_children"]["calls"]
+    assert 40 == summary["counters"]["evaluations"]
+    assert hits == summary["counters"]["cache_hits"]
+    assert summary["evaluations_per_second"] > 0
+    assert "make_children" in instrument.report()
+
+
+def test_trace_memory():
+    instrument = Instrument(trace_memory=True)
+    make(instrument).evolve(2)
+    instrument.close()
+    assert not tracemalloc.is_tracing()
+    assert all(record["peak_memory"] > 0 for record in instrument.generations)
+    assert "peak_memory" in instrument.summary()
+
+
+def test_profile_generation():
+    instrument = Instrument(profile_generation=1)
+    make(instrument).evolve(3)
+    assert instrument.profile is not None
+    functions = [name for _, _, name in instrument.profile.stats]
+    assert "new_population" in functions
+    assert "new_population" in instrument.report()
+
+
+def test_count():
+    instrument = Instrument()
+    instrument.count("restarts")
+    instrument.count("restarts", 2)
+    assert {"restarts": 3} == instrument.summary()["counters"]
@@ -0,0 +1,109 @@
+import pytest
+import numpy as np
+
+from evolutionary.benchmarks import ZDT1
+from evolutionary.chromosome import Chromosome
+from evolutionary.context import Context
+from evolutionary.islands import Islands, Migration, elites, sources
+
+
+def zdt1_population(context):
+    return [ZDT1(context) for i in range(12)]
+
+
+def failing_population(context):
+    raise RuntimeError("no population")
+
+
+class Unevaluated(Chromosome):
+    # a chromosome without a num_objectives attribute, which must never be evaluated
+    def __init__(self, context, genes=None):
+        Chromosome.__init__(self, context, genes, numberOfGenes=4)
+
+    def copy(self):
+        return Unevaluated(self.context, self.genes)
+
+    def getObjectives(self):
+        raise AssertionError("evaluated")
+
+
+def unevaluated_population(context):
+    return [Unevaluated(context) for i in range(12)]
+
+
+def test_sources():
+    assert [3] == sources(0, 4, "ring")
+    assert [1] == sources(2, 4, "ring")
+    assert [0, 1, 3] == sources(2, 4, "full")
+    assert [] == sources(0, 1, "ring")
+
+
+def test_elites():
+    objectives = np.array([[3.0, 3.0], [0.0, 2.0], [1.0, 1.0], [2.0, 0.0], [2.0, 2.0]])
+    assert [1, 3, 2] == list(elites(objectives, 3))
+    assert [1, 3, 2, 4] == list(elites(objectives, 4))
+
+
+def test_migration_buffers():
+    migration = Migration(3, 2, 4, 2)
+    try:
+        other = Migration(3, 2, 4, 2, name=migration.name)
+        migration.genes[1] = 7.0
+        migration.objectives[2] = 5.0
+        assert np.all(other.genes[1] == 7.0)
+        assert np.all(other.objectives[2] == 5.0)
+        other.close()
+    finally:
+        migration.close()
+        migration.memory.unlink()
+
+
+@pytest.mark.parametrize("topology", ["ring", "full"])
+def test_run(topology):
+    def run():
+        islands = Islands(Context(5), zdt1_population, 3, topology=topology, interval=2)
+        return islands, islands.run(5)
+
+    islands, chromosomes = run()
+    assert 36 == len(chromosomes)
+    assert (3, 12, 31) == islands.genes.shape
+    assert (3, 12, 2) == islands.objectives.shape
+    # the islands evolve on independent streams but repeatably
+    assert not np.array_equal(islands.genes[0], islands.genes[1])
+    assert [c.genes for c in chromosomes] == [c.genes for c in run()[1]]
+    for chromosome, objectives in zip(chromosomes, islands.objectives.reshape(-1, 2)):
+        assert chromosome.getObjectives() == objectives.tolist()
+    # migrants are not evaluated again
+    assert [12 + 5 * 12] * 3 == islands.evaluations
+
+
+def test_migrants_spread():
+    # with a single generation between migrations on a ring, the elites of an island
+    # reach its neighbour
+    islands = Islands(Context(5), zdt1_population, 2, interval=1, migrants=3)
+    islands.run(2)
+    shared = set(map(tuple, islands.genes[0].tolist())) & set(
+        map(tuple, islands.genes[1].tolist())
+    )
+    assert shared
+
+
+def test_errors():
+    with pytest.raises(ValueError):
+        Islands(Context(5), zdt1_population, 2, topology="star")
+    with pytest.raises(ValueError):
+        Islands(Context(5), zdt1_population, 5, topology="full", migrants=4)
+    # the width of the objectives comes from num_objectives rather than an evaluation
+    assert 2 == Islands(Context(5), zdt1_population, 2).num_objectives
+    assert (
+        3
+        == Islands(
+            Context(5), unevaluated_population, 2, num_objectives=3
+        ).num_objectives
+    )
+    with pytest.raises(ValueError, match="num_objectives"):
+        Islands(Context(5), unevaluated_population, 2)
+    islands = Islands(Context(5), zdt1_population, 2, num_objectives=2)
+    islands.make_population = failing_population
+    with pytest.raises(RuntimeError):
+        islands.run(3)
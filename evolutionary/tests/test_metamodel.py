@@ -0,0 +1,76 @@
+import pytest
+import numpy as np
+from sklearn.neighbors import KNeighborsRegressor
+
+from evolutionary.metamodel import MetaModel
+
+
+@pytest.fixture
+def r():
+    return np.random.RandomState(5)
+
+
+def test_matches_full_refit(r):
+    model = MetaModel()
+    x_seen = np.empty((0, 3))
+    y_seen = np.empty((0, 2))
+    queries = r.rand(50, 3)
+    for batch in range(40):
+        x = r.rand(37, 3)
+        y = np.stack([np.sum(x, axis=1), np.prod(x, axis=1)], axis=1)
+        model.fit(x, y)
+        x_seen = np.concatenate([x_seen, x])
+        y_seen = np.concatenate([y_seen, y])
+
+        expected = KNeighborsRegressor().fit(x_seen, y_seen).predict(queries)
+        np.testing.assert_allclose(expected, model.predict(queries))
+    np.testing.assert_array_equal(x_seen, model.x)
+    np.testing.assert_array_equal(y_seen, model.y)
+    assert len(x_seen) == len(model)
+
+
+def test_rebuild_schedule(r):
+    model = MetaModel(rebuild_fraction=0.5)
+    rebuilds = []
+    rebuild = model.rebuild
+
+    def record():
+        rebuilds.append(model.size)
+        rebuild()
+
+    model.rebuild = record
+    for batch in range(20):
+        model.fit(r.rand(10, 2), r.rand(10))
+    # the index is rebuilt geometrically rather than on every fit
+    assert [10, 20, 40, 70, 110, 170] == rebuilds
+    assert 200 == len(model)
+
+
+def test_restore(r):
+    model = MetaModel()
+    for batch in range(5):
+        model.fit(r.rand(30, 3), r.rand(30, 2))
+    restored = MetaModel()
+    restored.fit(r.rand(10, 3), r.rand(10, 2))
+    restored.restore(model.x, model.y, model.indexed)
+    assert len(model) == len(restored)
+    assert model.indexed == restored.indexed
+    queries = r.rand(20, 3)
+    np.testing.assert_array_equal(model.predict(queries), restored.predict(queries))
+
+
+def test_one_dimensional_targets(r):
+    model = MetaModel(n_neighbors=1, rebuild_fraction=10.0)
+    x = r.rand(20, 2)
+    model.fit(x[:10], np.arange(10.0))
+    model.fit(x[10:], np.arange(10.0, 20.0))
+    np.testing.assert_array_equal(np.arange(20.0), model.predict(x))
+
+
+def test_too_few_points(r):
+    model = MetaModel()
+    with pytest.raises(ValueError):
+        model.predict(r.rand(1, 2))
+    model.fit(r.rand(3, 2), r.rand(3))
+    with pytest.raises(ValueError):
+        model.predict(r.rand(1, 2))
@@ -1,4 +1,7 @@
+import copy
+
 import pytest
+import numpy as np
 
 from evolutionary import NSGAII
 from evolutionary import chromosome
@@ -140,35 +143,211 @@ def test_nsgaii(context):
     nsgaii = NSGAII.NSGAII(context, pop)
     pop = nsgaii.evolve(100)
     expected = [
-        14.40994751148137,
-        0.3806553304952569,
-        14.40994751148137,
-        8.555278841790408,
-        7.226496201659565,
-        5.693737419385982,
-        5.693737419385982,
-        5.693737419385982,
-        5.693737419385982,
-        12.232062995325382,
+        10.985284373248057,
+        1.0303882508838917,
+        1.0303882508838917,
+        10.0337475856829,
+        7.870836411215183,
+        7.50992327459868,
+        10.985284373248057,
+        6.897705578574634,
+        1.9955449676349026,
+        10.0337475856829,
     ]
     actual = [p.x() for p in pop]
     assert expected == actual
 
     expected = [
-        -5.541289865081691,
-        -9.704159039834753,
-        -5.541289865081691,
-        -4.000868997106306,
-        -10.522515907755782,
-        -5.541289865081691,
-        -10.522515907755782,
-        -13.25347463773981,
-        -9.704159039834753,
-        -2.138939370406991,
+        -9.009786535249209,
+        -9.009786535249209,
+        -9.009786535249209,
+        -2.7967875428398443,
+        -10.683715338306595,
+        -9.009786535249209,
+        -9.009786535249209,
+        -10.683715338306595,
+        -9.330430200864747,
+        -2.7967875428398443,
     ]
     actual = [p.y() for p in pop]
     assert expected == actual
 
+    # every generation replaces the parents with as many survivors
+    assert 10 == len(nsgaii.population)
+    assert 10 == len(set(nsgaii.population.keys()))
+
+
+class OwnVariationChromosome(ChromosomeTestImplementation):
+    mutations = 0
+
+    def copy(self):
+        return OwnVariationChromosome(self.context, self.genes)
+
+    def mutate(self):
+        OwnVariationChromosome.mutations += 1
+        ChromosomeTestImplementation.mutate(self)
+
+
+def test_batched_variation(context):
+    pop = [ChromosomeTestImplementation(context) for i in range(10)]
+    assert NSGAII.NSGAII(context, pop).batched_variation()
+
+    # chromosomes with their own variation keep breeding one object at a time
+    pop = [OwnVariationChromosome(context) for i in range(10)]
+    nsgaii = NSGAII.NSGAII(context, pop)
+    assert not nsgaii.batched_variation()
+    children = nsgaii.make_children(0)
+    assert 10 == OwnVariationChromosome.mutations
+    assert [child.genes for child in children] == nsgaii.store.genes[10:].tolist()
+
+
+class ShallowCopyChromosome(ChromosomeTestImplementation):
+    def copy(self):
+        return copy.copy(self)
+
+
+def test_chromosomes_phenotype(context):
+    # chromosomes made from a prototype that decoded its own genes decode theirs afresh
+    pop = [ShallowCopyChromosome(context) for i in range(4)]
+    nsgaii = NSGAII.NSGAII(context, pop)
+    pop[0].select("abc")
+    for chromosome in nsgaii.chromosomes(nsgaii.store.parents):
+        assert {} == chromosome.phenotype_cache
+        assert chromosome.phenotype_cache is not pop[0].phenotype_cache
+
+
+def test_make_children(context):
+    pop = [ChromosomeTestImplementation(context) for i in range(10)]
+    nsgaii = NSGAII.NSGAII(context, pop)
+    children = nsgaii.make_children(0)
+    assert 10 == len(children)
+    assert [(i, 1) for i in range(10, 20)] == nsgaii.store.keys(nsgaii.store.children)
+    assert [child.genes for child in children] == nsgaii.store.genes[10:].tolist()
+
+
+@pytest.mark.parametrize("size", [9, 10])
+def test_mating_pairs(context, size):
+    pop = [ChromosomeTestImplementation(context) for i in range(size)]
+    first, second = NSGAII.NSGAII(context, pop).mating_pairs()
+    assert size // 2 == len(first) == len(second)
+    # every parent mates at most once
+    mates = list(first) + list(second)
+    assert len(mates) == len(set(mates))
+    assert set(mates) <= set(range(size))
+
+
+def test_tournament(context):
+    pop = [ChromosomeTestImplementation(context) for i in range(10)]
+    nsgaii = NSGAII.NSGAII(context, pop, tournament=True)
+    pop = nsgaii.evolve(20)
+    assert 10 == len(pop)
+
+    # ranks and crowding distances of the parents come from the last selection
+    ranks, crowding = NSGAII.sorting.ranks_and_crowding(
+        nsgaii.store.objectives[nsgaii.store.parents]
+    )
+    np.testing.assert_array_equal(ranks, nsgaii.ranks)
+    first, second = nsgaii.mating_pairs()
+    assert 5 == len(first) == len(second)
+
+
+@pytest.mark.parametrize("tournament", [False, True])
+def test_empty_population(context, tournament):
+    nsgaii = NSGAII.NSGAII(context, [], tournament=tournament)
+    assert [] == list(nsgaii.evolve(2))
+    assert [] == nsgaii.make_children(2)
+    assert 2 == nsgaii.generation
+
+
+@pytest.mark.parametrize("tournament", [False, True])
+def test_single_parent(context, tournament):
+    # one parent breeds no children, and evolve keeps it
+    pop = [ChromosomeTestImplementation(context)]
+    nsgaii = NSGAII.NSGAII(context, pop, tournament=tournament)
+    assert [pop[0].genes] == [p.genes for p in nsgaii.evolve(3)]
+    assert 1 == nsgaii.evaluations
+
+
+@pytest.mark.parametrize("tournament", [False, True])
+def test_evolve_steady_state(context, tournament):
+    def run():
+        context.reset()
+        pop = [ChromosomeTestImplementation(context) for i in range(10)]
+        nsgaii = NSGAII.NSGAII(context, pop, tournament=tournament)
+        return nsgaii, [p.genes for p in nsgaii.evolve_steady_state(200)]
+
+    nsgaii, genes = run()
+    assert genes == run()[1]
+    assert 10 == len(genes)
+
+    # the incrementally maintained fronts are those of the final parents
+    store = nsgaii.store
+    objectives = store.objectives[store.parents]
+    expected = [
+        sorted(front.tolist()) for front in NSGAII.sorting.nondominated_sort(objectives)
+    ]
+    assert expected == [sorted(front.tolist()) for front in nsgaii.front_rows]
+    for chromosome, row in zip(nsgaii.population.values(), objectives.tolist()):
+        assert chromosome.getObjectives() == row
+
+
+def test_evolve_steady_state_generations(context):
+    # every mu steps count as a generation, and later calls carry on the numbering
+    pop = [ChromosomeTestImplementation(context) for i in range(10)]
+    nsgaii = NSGAII.NSGAII(context, pop)
+    nsgaii.evolve_steady_state(50)
+    assert 5 == nsgaii.generation
+    assert nsgaii.store.generation[nsgaii.store.parents].max() <= 5
+    nsgaii.evolve_steady_state(25)
+    assert 7 == nsgaii.generation
+    # children of the second call are born after generation 5, not from generation 1 again
+    assert 5 < nsgaii.store.generation[nsgaii.store.parents].max() <= 8
+    nsgaii.evolve(1)
+    assert 8 == nsgaii.generation
+
+
+def test_evolve_steady_state_log_out(context):
+    generations = []
+
+    def log_out(generation, population, objectives, fronts):
+        generations.append(generation)
+        assert 10 == len(population)
+
+    pop = [ChromosomeTestImplementation(context) for i in range(10)]
+    NSGAII.NSGAII(context, pop).evolve_steady_state(35, log_out=log_out)
+    assert [0, 1, 2] == generations
+
+
+def test_log_out(context):
+    logged = []
+
+    def log_out(generation, population, objectives, fronts):
+        logged.append((generation, population, objectives, fronts))
+
+    pop = [ChromosomeTestImplementation(context) for i in range(10)]
+    nsgaii = NSGAII.NSGAII(context, pop)
+    nsgaii.evolve(3, log_out=log_out)
+    assert [0, 1, 2] == [generation for generation, _, _, _ in logged]
+
+    generation, population, objectives, fronts = logged[-1]
+    assert population.keys() == objectives.keys()
+    for key in population:
+        assert population[key].getObjectives() == objectives[key]
+    # the fronts partition the parents and children of the last generation
+    keys = [key for front in fronts for key in front]
+    assert 20 == len(set(keys))
+    assert set(population.keys()) <= set(keys)
+
+
+def test_generator_context():
+    def run():
+        context = Context(42, legacy=False)
+        pop = [ChromosomeTestImplementation(context) for i in range(10)]
+        nsgaii = NSGAII.NSGAII(context, pop, tournament=True)
+        return [p.genes for p in nsgaii.evolve(10)]
+
+    assert run() == run()
+
 
 def test_fast_nondominated_sort(experiment_data):
     def test_rank_list(expected, actual):
@@ -307,6 +486,15 @@ def test_fast_nondominated_sort(experiment_data):
     test_domination_fronts(expected[1], actual[1])
 
 
+def test_nondominated_sort(experiment_data):
+    # the dispatcher finds the same fronts, ordering each of them by key
+    expected = [
+        sorted(front) for front in NSGAII.fast_nondominated_sort(experiment_data)[1]
+    ]
+    actual = NSGAII.NSGAII(None, []).nondominated_sort(experiment_data)
+    assert expected == actual
+
+
 def test_crowding_distance(experiment_data):
     expected = {
         1: -0.005277881727443084,
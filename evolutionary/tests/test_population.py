@@ -0,0 +1,77 @@
+import pytest
+import numpy as np
+
+from evolutionary.population import Population
+
+
+@pytest.fixture
+def store():
+    return Population.from_genes(np.arange(12.0).reshape(4, 3))
+
+
+def test_from_genes(store):
+    assert 4 == store.capacity
+    assert 4 == store.num_parents
+    assert 4 == len(store)
+    assert 3 == store.num_genes
+    assert store.num_objectives is None
+    assert (8, 3) == store.genes.shape
+    assert [(0, 0), (1, 0), (2, 0), (3, 0)] == store.keys()
+    np.testing.assert_array_equal(
+        np.arange(12.0).reshape(4, 3), store.genes[store.parents]
+    )
+
+
+def test_empty():
+    store = Population.from_genes([])
+    assert 0 == len(store)
+    assert [] == store.keys()
+
+
+def test_add(store):
+    rows = store.add(np.ones((2, 3)), 1)
+    assert slice(4, 6) == rows
+    assert rows == store.children
+    assert [(4, 1), (5, 1)] == store.keys(store.children)
+    assert 6 == len(store)
+
+    # the buffer holds at most as many children as parents
+    with pytest.raises(ValueError):
+        store.add(np.ones((3, 3)), 1)
+
+    store.clear_children()
+    assert 4 == len(store)
+    assert [(6, 2)] == store.keys(store.add(np.ones((1, 3)), 2))
+
+
+def test_set_objectives(store):
+    store.set_objectives(store.parents, [[1.0, 2.0]] * 4)
+    assert 2 == store.num_objectives
+    store.add(np.ones((1, 3)), 1)
+    assert np.all(np.isnan(store.objectives[store.children]))
+    # no rows to set, as in a generation without children
+    store.clear_children()
+    store.set_objectives(store.children, [])
+    assert 2 == store.num_objectives
+
+
+def test_survive(store):
+    store.set_objectives(store.parents, np.arange(8.0).reshape(4, 2))
+    store.add(np.full((4, 3), -1.0), 1)
+    store.set_objectives(store.children, np.full((4, 2), -1.0))
+    genes = store.genes
+
+    store.survive(np.array([6, 1, 3]))
+    assert 3 == store.num_parents
+    assert 3 == len(store)
+    assert [(6, 1), (1, 0), (3, 0)] == store.keys()
+    np.testing.assert_array_equal(
+        [[-1, -1, -1], [3, 4, 5], [9, 10, 11]], store.genes[:3]
+    )
+    np.testing.assert_array_equal([[-1, -1], [2, 3], [6, 7]], store.objectives[:3])
+
+    # survival moves rows within the preallocated buffers
+    assert genes is store.genes
+
+    with pytest.raises(ValueError):
+        store.survive(np.arange(5))
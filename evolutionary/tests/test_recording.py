@@ -0,0 +1,95 @@
+import json
+
+import pytest
+import numpy as np
+
+from evolutionary import NSGAII
+from evolutionary import recording
+from evolutionary.context import Context
+from evolutionary.tests.test_nsga2 import ChromosomeTestImplementation
+
+
+def make(tournament=False):
+    context = Context(42)
+    pop = [ChromosomeTestImplementation(context) for i in range(10)]
+    return NSGAII.NSGAII(context, pop, tournament=tournament)
+
+
+def read_ndjson(filename):
+    with open(filename) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_ndjson(tmp_path):
+    filename = str(tmp_path / "run.ndjson")
+    nsgaii = make()
+    with recording.RecordLogger(filename) as log_out:
+        nsgaii.evolve(3, log_out=log_out)
+
+    records = read_ndjson(filename)
+    assert 30 == len(records)
+    assert [0] * 10 + [1] * 10 + [2] * 10 == [r["generation"] for r in records]
+
+    # the last generation is the final population
+    last = records[-10:]
+    population = nsgaii.population
+    assert list(population.keys()) == [tuple(r["key"]) for r in last]
+    for r in last:
+        chromosome = population[tuple(r["key"])]
+        assert chromosome.genes == r["genes"]
+        assert chromosome.getObjectives() == r["objectives"]
+    ranks = [r["rank"] for r in last]
+    assert ranks == sorted(ranks)
+    assert 0 == ranks[0]
+
+
+def test_npy_sampling(tmp_path):
+    filename = str(tmp_path / "run.npy")
+    nsgaii = make(tournament=True)
+    with recording.RecordLogger(
+        filename, format="npy", every=2, front_only=True
+    ) as log_out:
+        nsgaii.evolve(5, log_out=log_out)
+        log_out.flush()
+        assert 0 < len(recording.read_records(filename))
+
+    records = recording.read_records(filename)
+    assert {0, 2, 4} == set(records["generation"].tolist())
+    assert np.all(records["rank"] == 0)
+    assert (3,) == records["genes"].shape[1:]
+    assert (2,) == records["objectives"].shape[1:]
+
+    # the ranks handed over agree with those kept for tournaments
+    last = records[records["generation"] == 4]
+    assert np.sum(nsgaii.ranks == 0) == len(last)
+
+
+def test_dictionary_api(tmp_path):
+    filename = str(tmp_path / "run.ndjson")
+    population = {(0, 0): ChromosomeTestImplementation(Context(1))}
+    with recording.RecordLogger(filename, front_only=True) as log_out:
+        log_out(0, population, {(0, 0): [1.0, 2.0]}, [[(0, 0)]])
+        log_out(1, population, {(0, 0): [1.0, 2.0]}, [[(1, 1)], [(0, 0)]])
+
+    records = read_ndjson(filename)
+    assert 1 == len(records)
+    assert [0, 0] == records[0]["key"]
+    assert [1.0, 2.0] == records[0]["objectives"]
+
+
+def test_invalid_arguments(tmp_path):
+    with pytest.raises(ValueError):
+        recording.RecordLogger(str(tmp_path / "a"), format="csv")
+    with pytest.raises(ValueError):
+        recording.RecordLogger(str(tmp_path / "b"), every=0)
+
+
+def test_steady_state(tmp_path):
+    filename = str(tmp_path / "run.ndjson")
+    nsgaii = make()
+    with recording.RecordLogger(filename) as log_out:
+        nsgaii.evolve_steady_state(30, log_out=log_out)
+
+    records = read_ndjson(filename)
+    assert 30 == len(records)
+    assert all(r["rank"] >= 0 for r in records)
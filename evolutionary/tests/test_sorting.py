@@ -0,0 +1,188 @@
+import pytest
+import numpy as np
+
+from evolutionary import NSGAII
+from evolutionary import sorting
+
+
+def reference_sort(population):
+    # the original pure python sort, peeling fronts from domination counts and sets
+    domination_dict = {}
+    for key in population:
+        domination_dict[key] = NSGAII.domination_count_and_set(population, key)
+    fronts = [[key for key in domination_dict if domination_dict[key][0] == 0]]
+    while fronts[-1]:
+        fronts.append([])
+        for key in fronts[-2]:
+            for other in domination_dict[key][1]:
+                domination_dict[other][0] -= 1
+                if domination_dict[other][0] == 0:
+                    fronts[-1].append(other)
+    return fronts[:-1]
+
+
+@pytest.fixture
+def r():
+    return np.random.RandomState(7)
+
+
+def test_dominates():
+    rows = np.array([[0.0, 0.0], [1.0, 1.0]])
+    columns = np.array([[0.0, 0.0], [0.0, 1.0], [2.0, 0.5]])
+    expected = np.array([[False, True, True], [False, False, False]])
+    np.testing.assert_array_equal(expected, sorting.dominates(rows, columns))
+
+
+def test_domination_counts():
+    objectives = np.array([[0.0, 0.0], [1.0, 1.0], [0.0, 0.0], [2.0, 0.0]])
+    expected = [0, 2, 0, 2]
+    assert expected == list(sorting.domination_counts(objectives))
+
+
+@pytest.mark.parametrize("chunk_elements", [1, 7, sorting.CHUNK_ELEMENTS])
+@pytest.mark.parametrize("num_objectives", [2, 3, 5])
+def test_nondominated_fronts_matches_reference(r, chunk_elements, num_objectives):
+    # integer valued objectives produce plenty of ties and duplicates
+    objectives = r.randint(0, 6, size=(60, num_objectives)).astype(float)
+    population = dict((i, list(row)) for i, row in enumerate(objectives))
+    expected = reference_sort(population)
+    actual = sorting.nondominated_fronts(objectives, chunk_elements)
+    assert expected == [list(front) for front in actual]
+
+
+def test_nondominated_fronts_empty():
+    assert [] == sorting.nondominated_fronts(np.zeros((0, 2)))
+    assert [{}, []] == NSGAII.fast_nondominated_sort({})
+
+
+def test_chunk_rows():
+    assert 1 == sorting.chunk_rows(1000, 3, chunk_elements=10)
+    assert 5 == sorting.chunk_rows(10, 2, chunk_elements=100)
+
+
+def ranks_of(fronts, n):
+    ranks = np.empty(n, dtype=int)
+    for rank, front in enumerate(fronts):
+        ranks[front] = rank
+    return ranks
+
+
+@pytest.mark.parametrize("high", [3, 20, 1000])
+def test_nondominated_ranks_2d(r, high):
+    objectives = r.randint(0, high, size=(200, 2)).astype(float)
+    expected = ranks_of(sorting.nondominated_fronts(objectives), len(objectives))
+    np.testing.assert_array_equal(expected, sorting.nondominated_ranks_2d(objectives))
+
+
+@pytest.mark.parametrize("high", [3, 20, 1000])
+def test_nondominated_ranks_3d(r, high):
+    objectives = r.randint(0, high, size=(200, 3)).astype(float)
+    expected = ranks_of(sorting.nondominated_fronts(objectives), len(objectives))
+    np.testing.assert_array_equal(expected, sorting.nondominated_ranks_3d(objectives))
+
+
+def test_fronts_from_ranks():
+    actual = sorting.fronts_from_ranks(np.array([1, 0, 2, 0, 1]))
+    assert [[1, 3], [0, 4], [2]] == [list(front) for front in actual]
+    assert [] == sorting.fronts_from_ranks(np.array([], dtype=int))
+
+
+@pytest.mark.parametrize("num_objectives", [1, 2, 3, 4])
+def test_nondominated_sort(r, num_objectives):
+    objectives = r.randint(0, 5, size=(100, num_objectives)).astype(float)
+    expected = [sorted(front) for front in sorting.nondominated_fronts(objectives)]
+    actual = [sorted(front) for front in sorting.nondominated_sort(objectives)]
+    assert expected == actual
+
+
+def test_crowding_distances():
+    objectives = np.array([[0.0, 4.0], [1.0, 3.0], [3.0, 1.0], [4.0, 0.0]])
+    expected = [-np.inf, -1.5, -1.5, -np.inf]
+    np.testing.assert_array_equal(expected, sorting.crowding_distances(objectives))
+
+    # identical points are all equally crowded
+    np.testing.assert_array_equal(
+        [0.0, -2.0, 0.0], sorting.crowding_distances(np.ones((3, 2)))
+    )
+    assert 0 == len(sorting.crowding_distances(np.zeros((0, 2))))
+
+
+def test_crowding_distances_constant_objective():
+    objectives = np.array([[0.0, 1.0], [1.0, 1.0], [2.0, 1.0]])
+    np.testing.assert_array_equal(
+        [-np.inf, -1.0, -np.inf], sorting.crowding_distances(objectives)
+    )
+
+
+def test_least_crowded(r):
+    distances = np.array([-1.0, -np.inf, -0.5, -2.0, -np.inf])
+    assert [1, 3, 4] == list(sorting.least_crowded(distances, 3))
+    assert [0, 1, 2, 3, 4] == list(sorting.least_crowded(distances, 5))
+    assert [] == list(sorting.least_crowded(distances, 0))
+
+    # agrees with a full sort of the crowding distances when there are no ties
+    distances = sorting.crowding_distances(r.rand(50, 3))
+    expected = sorted(np.argsort(distances)[:20])
+    assert expected == list(sorting.least_crowded(distances, 20))
+
+
+def test_ranks_and_crowding():
+    objectives = np.array([[0.0, 2.0], [1.0, 1.0], [2.0, 0.0], [2.0, 2.0], [3.0, 3.0]])
+    ranks, distances = sorting.ranks_and_crowding(objectives)
+    assert [0, 0, 0, 1, 2] == list(ranks)
+    np.testing.assert_array_equal([-np.inf, -2.0, -np.inf, 0.0, 0.0], distances)
+
+
+def test_crowded_tournament(r):
+    ranks = np.array([0, 0, 1, 2])
+    distances = np.array([-np.inf, -1.0, -np.inf, -np.inf])
+    winners = sorting.crowded_tournament(ranks, distances, 1000, r)
+    assert 1000 == len(winners)
+    # the worst row only wins against itself, the best loses to nothing
+    counts = np.bincount(winners, minlength=4)
+    assert counts[0] > counts[1] > counts[2] > counts[3]
+    assert 0 < counts[3] < 1000 / 16 * 1.5
+
+
+def assert_fronts_match(incremental, objectives, rows):
+    expected = [
+        sorted(rows[front].tolist())
+        for front in sorting.nondominated_sort(objectives[rows])
+    ]
+    assert expected == [sorted(front) for front in incremental.fronts]
+    for rank, front in enumerate(incremental.fronts):
+        assert np.all(incremental.ranks[front] == rank)
+
+
+@pytest.mark.parametrize("num_objectives", [2, 3])
+def test_incremental_fronts(r, num_objectives):
+    objectives = r.randint(0, 8, size=(120, num_objectives)).astype(float)
+    rows = list(range(40))
+    incremental = sorting.IncrementalFronts(objectives, rows)
+    assert_fronts_match(incremental, objectives, np.array(rows))
+
+    for row in range(40, 120):
+        incremental.insert(row)
+        rows.append(row)
+        assert_fronts_match(incremental, objectives, np.array(rows))
+        removed = rows.pop(r.randint(len(rows)))
+        incremental.remove(removed)
+        assert -1 == incremental.ranks[removed]
+        assert_fronts_match(incremental, objectives, np.array(rows))
+
+
+def test_incremental_fronts_insert_rank():
+    objectives = np.array([[1.0, 1.0], [2.0, 2.0], [3.0, 3.0], [0.0, 0.0], [1.5, 1.5]])
+    incremental = sorting.IncrementalFronts(objectives, [0, 1, 2])
+    assert 3 == len(incremental)
+    # a point dominating everything pushes every front down
+    assert 0 == incremental.insert(3)
+    assert [[3], [0], [1], [2]] == incremental.fronts
+    assert 2 == incremental.insert(4)
+    assert [[3], [0], [4], [1], [2]] == incremental.fronts
+
+    incremental.remove(0)
+    assert [[3], [4], [1], [2]] == incremental.fronts
+    incremental.relabel(4, 0)
+    assert [[3], [0], [1], [2]] == incremental.fronts
+    assert 1 == incremental.ranks[0]
@@ -0,0 +1,65 @@
+import os
+
+import pytest
+
+from evolutionary import NSGAII
+from evolutionary.context import Context
+from evolutionary.hypervolume import hypervolume
+from evolutionary.stopping import Stopping
+from evolutionary.tests.test_nsga2 import ChromosomeTestImplementation
+
+
+def make():
+    context = Context(42)
+    pop = [ChromosomeTestImplementation(context) for i in range(10)]
+    return NSGAII.NSGAII(context, pop)
+
+
+def test_hypervolumes_do_not_change_the_run():
+    stopping = Stopping(reference=[1000.0, 1000.0])
+    monitored = make()
+    genes = [p.genes for p in monitored.evolve(8, stopping=stopping)]
+    assert genes == [p.genes for p in make().evolve(8)]
+
+    assert 8 == len(stopping.hypervolumes)
+    assert stopping.reason is None
+    objectives = monitored.store.objectives[monitored.store.parents]
+    assert hypervolume(objectives, [1000.0, 1000.0]) == stopping.hypervolumes[-1]
+
+
+def test_converged():
+    stopping = Stopping(reference=[1000.0, 1000.0], tolerance=1.0, patience=3)
+    nsgaii = make()
+    nsgaii.evolve(200, stopping=stopping)
+    assert "converged" == stopping.reason
+    assert nsgaii.generation == len(stopping.hypervolumes) < 200
+    # the last patience generations improved on the best before them by at most tolerance
+    best = max(stopping.hypervolumes[:-3])
+    assert max(stopping.hypervolumes[-3:]) <= best + 1.0
+
+
+def test_evaluation_budget():
+    stopping = Stopping(max_evaluations=55)
+    nsgaii = make()
+    nsgaii.evolve(100, stopping=stopping)
+    assert "evaluations" == stopping.reason
+    # the initial parents and four generations of children fit the budget, a fifth would not
+    assert 50 == nsgaii.evaluations
+    assert 4 == nsgaii.generation
+    assert [] == stopping.hypervolumes
+
+
+def test_wall_clock(tmp_path):
+    path = str(tmp_path / "run.npz")
+    stopping = Stopping(max_seconds=0.0)
+    nsgaii = make()
+    nsgaii.evolve(100, checkpoint_path=path, stopping=stopping)
+    assert "time" == stopping.reason
+    assert 1 == nsgaii.generation
+    # stopping early still saves a checkpoint
+    assert os.path.exists(path)
+
+
+def test_patience_needs_reference():
+    with pytest.raises(ValueError):
+        Stopping(patience=3)
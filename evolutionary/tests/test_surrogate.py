@@ -0,0 +1,61 @@
+import pytest
+import numpy as np
+
+from evolutionary import NSGAII
+from evolutionary.benchmarks import ZDT1
+from evolutionary.context import Context
+from evolutionary.hypervolume import hypervolume
+from evolutionary.metamodel import MetaModel
+
+
+class ZDT1_10(ZDT1):
+    # the ZDT1 problem on 10 variables rather than 30, so a short run gets near the front
+    num_variables = 10
+
+
+def evaluations_to(target, surrogate, seed, size=20, limit=60):
+    # evolves one generation at a time until the parents reach the target hypervolume,
+    # giving the number of true evaluations that took
+    context = Context(seed)
+    nsgaii = NSGAII.NSGAII(
+        context, [ZDT1_10(context) for i in range(size)], surrogate=surrogate
+    )
+    for generation in range(limit):
+        nsgaii.evolve(1)
+        objectives = nsgaii.store.objectives[nsgaii.store.parents]
+        if hypervolume(objectives, np.array([1.0, 10.0])) >= target:
+            return size * (generation + 2)
+    return None
+
+
+def test_screened_children():
+    context = Context(42)
+    surrogate = MetaModel()
+    nsgaii = NSGAII.NSGAII(
+        context, [ZDT1_10(context) for i in range(10)], surrogate=surrogate
+    )
+    assert not nsgaii.screening()
+    nsgaii.evaluate_parents()
+    assert 10 == len(surrogate)
+    assert nsgaii.screening()
+
+    children = nsgaii.make_children(0)
+    assert 10 == len(children)
+    # screening does not use up indices for the children it drops
+    assert [(i, 1) for i in range(10, 20)] == nsgaii.store.keys(nsgaii.store.children)
+    assert [child.genes for child in children] == nsgaii.store.genes[10:].tolist()
+
+    # the surrogate learns from every true evaluation and nothing else
+    nsgaii.evolve(3)
+    assert 40 == len(surrogate)
+    seen = set(map(tuple, surrogate.x.tolist()))
+    assert set(map(tuple, nsgaii.store.genes[:10, 1:].tolist())) <= seen
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2, 3])
+def test_fewer_evaluations(seed):
+    # on ZDT1 the surrogate reaches the same hypervolume with fewer true evaluations
+    baseline = evaluations_to(9.2, None, seed)
+    screened = evaluations_to(9.2, MetaModel(), seed)
+    assert screened is not None
+    assert baseline is None or screened < baseline